@@ -0,0 +1,77 @@
+"""
+Synthetic task graphs for the scheduler benchmarks.
+
+Every generator returns, for task i, the indices of the tasks it depends on; parents always have
+lower indices, so index order is a topological order.
+"""
+import random
+from typing import Any, Callable, Dict, List
+
+Parents = List[List[int]]
+
+
+def chain(size: int) -> Parents:
+    """t0 -> t1 -> ... -> tN: no parallelism, every task waits for the previous one."""
+    return [[]] + [[i - 1] for i in range(1, size)]
+
+
+def fan_out(size: int) -> Parents:
+    """One root releasing every other task at once."""
+    return [[]] + [[0] for _ in range(1, size)]
+
+
+def diamond(size: int, width: int = 8) -> Parents:
+    """Repeated split/join stages: a head, `width` parallel tasks, then a join that heads the next stage."""
+    parents: Parents = [[]]
+    head = 0
+    while len(parents) < size:
+        middle = []
+        for _ in range(min(width, size - len(parents))):
+            middle.append(len(parents))
+            parents.append([head])
+        if len(parents) < size:
+            head = len(parents)
+            parents.append(middle)
+    return parents
+
+
+def random_dag(size: int, max_inputs: int = 3, window: int = 100, seed: int = 0) -> Parents:
+    """Each task depends on 1..max_inputs tasks among the `window` before it (deterministic per seed)."""
+    rng = random.Random(seed)
+    parents: Parents = [[]]
+    for i in range(1, size):
+        candidates = range(max(0, i - window), i)
+        parents.append(sorted(rng.sample(candidates, min(len(candidates), rng.randint(1, max_inputs)))))
+    return parents
+
+
+SHAPES: Dict[str, Callable[[int], Parents]] = {
+    "chain": chain,
+    "fan_out": fan_out,
+    "diamond": diamond,
+    "random": random_dag,
+}
+
+
+def workflow(parents: Parents, plugin: str = "noop", seconds: float = 0.0) -> Dict[str, Any]:
+    """The workflow YAML document for a graph: task i is `t<i>`, consuming `t<parent>.OUT`."""
+    tasks = []
+    for i, inputs in enumerate(parents):
+        task: Dict[str, Any] = {
+            "name": f"t{i}",
+            "plugin": plugin,
+            "inputs": [f"t{p}.OUT" for p in inputs],
+            "outputs": ["OUT"],
+        }
+        if seconds:
+            task["params"] = {"seconds": seconds}
+        tasks.append(task)
+    return {"workflow": {"name": "benchmark", "tasks": tasks}}
+
+
+def critical_path(parents: Parents, seconds: float) -> float:
+    """Length of the longest dependency chain when every task takes `seconds`."""
+    finish: List[float] = []
+    for inputs in parents:
+        finish.append(max((finish[p] for p in inputs), default=0.0) + seconds)
+    return max(finish, default=0.0)
@@ -0,0 +1,11 @@
+from typing import Any, Dict
+
+from chestra.orchestrator import TaskPlugin
+
+
+class NoopPlugin(TaskPlugin):
+    """Benchmark plugin that does nothing, so a run measures pure orchestration overhead."""
+    OUTPUTS = ["OUT"]
+
+    def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        return {"OUT": "1"}
@@ -0,0 +1,19 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+from chestra.orchestrator import TaskPlugin
+
+
+class SleepPlugin(TaskPlugin):
+    """Benchmark plugin that waits `seconds` (an I/O-bound task with a known duration)."""
+    OUTPUTS = ["OUT"]
+    PARAMS = [{"name": "seconds", "type": "float", "default": 0.01}]
+
+    def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        time.sleep(float(params.get("seconds", 0.01)))
+        return {"OUT": "1"}
+
+    async def execute_async(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        await asyncio.sleep(float(params.get("seconds", 0.01)))
+        return {"OUT": "1"}
@@ -0,0 +1,192 @@
+"""
+Scheduler benchmarks: drive synthetic workflows through TaskOrchestrator.load_workflow()/run()
+and report load time, scheduling overhead per task, makespan against the ideal, and peak RSS.
+
+    python benchmarks/run.py                              # default matrix, table on stdout
+    python benchmarks/run.py --sizes 10,1000,50000 -o after.json
+    python benchmarks/run.py --sleep 0.01 --shapes diamond,random --compare before.json
+
+Each case runs in a fresh interpreter, so peak RSS and import state do not leak between cases.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "src"))
+
+import yaml  # noqa: E402
+from dags import SHAPES, critical_path, workflow  # noqa: E402
+
+DEFAULT_SIZES = "10,100,1000,10000"
+PLUGINS_DIR = os.path.join(HERE, "plugins")
+# Fields that identify a case when comparing two result files
+CASE_KEYS = ("shape", "size", "plugin", "seconds", "engine", "workers", "log")
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_case(
+    shape: str, size: int, seconds: float, engine: str, workers: Optional[str], log: bool = False
+) -> Dict[str, Any]:
+    """Run one benchmark case in this process and return its measurements."""
+    from chestra.orchestrator import TaskOrchestrator
+
+    if log:
+        from chestra import log as chestra_log
+        chestra_log.configure(logging.INFO)
+    else:
+        # Per-task INFO logging would dominate the numbers
+        logging.disable(logging.INFO)
+    plugin = "sleep" if seconds else "noop"
+    parents = SHAPES[shape](size)
+    with tempfile.TemporaryDirectory() as tmp:
+        # A cold plugin index cache every case, so results do not depend on earlier runs
+        os.environ["CHESTRA_CACHE_DIR"] = os.path.join(tmp, "cache")
+        path = os.path.join(tmp, "workflow.yaml")
+        with open(path, "w") as f:
+            yaml.safe_dump(workflow(parents, plugin, seconds), f, sort_keys=False)
+        orchestrator = TaskOrchestrator(plugins_dir=PLUGINS_DIR, workers=workers, engine=engine)
+        started = time.perf_counter()
+        orchestrator.load_workflow(path)
+        load_s = time.perf_counter() - started
+        # Loading again reads the compiled plan the first load cached
+        started = time.perf_counter()
+        TaskOrchestrator(plugins_dir=PLUGINS_DIR, workers=workers, engine=engine).load_workflow(path)
+        reload_s = time.perf_counter() - started
+        started = time.perf_counter()
+        orchestrator.run()
+        run_s = time.perf_counter() - started
+    stats = orchestrator.stats.as_dict()
+    if not all(task.completed for task in orchestrator.tasks):
+        raise RuntimeError(f"{shape}/{size}: not every task completed")
+    critical = critical_path(parents, seconds)
+    # The pool bounds how much of the work can overlap (native async tasks are not pooled)
+    pooled = engine == "thread" or not seconds
+    ideal = max(critical, size * seconds / max(stats["peak_workers"], 1)) if pooled else critical
+    return {
+        "shape": shape,
+        "size": size,
+        "plugin": plugin,
+        "seconds": seconds,
+        "engine": engine,
+        "workers": workers,
+        "log": log,
+        "edges": sum(len(p) for p in parents),
+        "load_s": load_s,
+        "load_per_task_us": load_s / size * 1e6,
+        "reload_s": reload_s,
+        "run_s": run_s,
+        "critical_path_s": critical,
+        "ideal_s": ideal,
+        "overhead_s": run_s - ideal,
+        "overhead_per_task_us": (run_s - ideal) / size * 1e6,
+        "peak_rss_mb": peak_rss_mb(),
+        "stats": stats,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    import chestra
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "chestra": chestra.__version__,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def spawn_case(args: argparse.Namespace, shape: str, size: int) -> Dict[str, Any]:
+    command = [
+        sys.executable, __file__, "--case", f"{shape}:{size}", "--sleep", str(args.sleep), "--engine", args.engine,
+    ]
+    if args.workers:
+        command += ["--workers", args.workers]
+    if args.log:
+        command.append("--log")
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{shape}/{size} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def case_key(result: Dict[str, Any]) -> tuple:
+    return tuple(result.get(key) for key in CASE_KEYS)
+
+
+def print_table(results: List[Dict[str, Any]], baseline: Optional[Dict[tuple, Dict[str, Any]]] = None) -> None:
+    header = f"{'shape':<8} {'size':>6} {'load s':>8} {'load us/task':>12} {'reload s':>8} " \
+             f"{'run s':>8} {'ideal s':>8} {'overhead us/task':>16} {'rss MB':>7}"
+    print(header)
+    for r in results:
+        line = f"{r['shape']:<8} {r['size']:>6} {r['load_s']:>8.3f} {r['load_per_task_us']:>12.1f} " \
+               f"{r['reload_s']:>8.3f} {r['run_s']:>8.3f} {r['ideal_s']:>8.3f} {r['overhead_per_task_us']:>16.1f} " \
+               f"{r['peak_rss_mb']:>7.1f}"
+        before = (baseline or {}).get(case_key(r))
+        if before is not None:
+            line += "   vs baseline: " + ", ".join(
+                f"{field} {r[field] / before[field]:.2f}x"
+                for field in ("load_s", "reload_s", "run_s", "peak_rss_mb")
+                if before.get(field)
+            )
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chestra scheduler benchmarks")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"Comma-separated shapes ({', '.join(SHAPES)})")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated task counts ({DEFAULT_SIZES})")
+    parser.add_argument("--sleep", type=float, default=0.0, help="Seconds each task sleeps (default: 0, no-op tasks)")
+    parser.add_argument("--engine", choices=["thread", "async"], default="thread")
+    parser.add_argument("--workers", help="Worker pool size or 'auto' (default: chestra's default)")
+    parser.add_argument("--log", action="store_true", help="Keep Chestra's INFO logging on (to stderr)")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        shape, size = args.case.split(":")
+        print(json.dumps(run_case(shape, int(size), args.sleep, args.engine, args.workers, args.log)))
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {case_key(r): r for r in json.load(f)["results"]}
+    results = []
+    for shape in args.shapes.split(","):
+        if shape not in SHAPES:
+            parser.error(f"Unknown shape: {shape}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            results.append(spawn_case(args, shape, size))
+    print_table(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
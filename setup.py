@@ -13,8 +13,12 @@ setup(
         "PyYAML>=6.0",
         "requests>=2.28"
     ],
+    extras_require={
+        "async": ["httpx>=0.23"],
+    },
     python_requires=">=3.7",
     include_package_data=True,
+    package_data={"chestra.plugins": ["manifest.json"]},
     entry_points={
         "console_scripts": [
             "chestra=chestra.cli:main"
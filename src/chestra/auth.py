@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Tuple
+
+from chestra import metrics
+
+Permissions = Dict[str, bool]
+
+AUTH_LOOKUPS = metrics.counter(
+    "chestra_auth_lookups_total", "Permission lookups by outcome: hit, miss, coalesced or error", ["result"]
+)
+
+
+class PermissionCache:
+    """
+    Token-keyed cache in front of the auth service.
+
+    Entries expire after `ttl` seconds and the least recently used token is evicted once more
+    than `max_size` tokens are cached. Concurrent lookups of the same token share a single
+    in-flight request (single-flight); failed lookups are not cached.
+    """
+    hits: int
+    misses: int
+    coalesced: int
+
+    def __init__(self, fetch: Callable[[str], Permissions], ttl: float = 300.0, max_size: int = 128) -> None:
+        """
+        Args:
+            fetch: Blocking lookup for one token; raises on failure.
+            ttl: Seconds a successful lookup stays valid.
+            max_size: Maximum number of tokens kept.
+        """
+        self._fetch = fetch
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Permissions]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, auth_token: str) -> Permissions:
+        """
+        Return the permissions for a token, fetching them at most once per TTL. Every caller gets
+        its own copy, so changing it leaves the cached entry alone.
+        """
+        with self._lock:
+            entry = self._entries.get(auth_token)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(auth_token)
+                self.hits += 1
+                AUTH_LOOKUPS.labels("hit").inc()
+                return dict(entry[1])
+            pending = self._inflight.get(auth_token)
+            owner = pending is None
+            if owner:
+                self.misses += 1
+                pending = self._inflight[auth_token] = Future()
+            else:
+                self.coalesced += 1
+        AUTH_LOOKUPS.labels("miss" if owner else "coalesced").inc()
+        if not owner:
+            # Another thread is already asking the auth service for this token
+            return dict(pending.result())
+        try:
+            perms = self._fetch(auth_token)
+        except BaseException as e:
+            AUTH_LOOKUPS.labels("error").inc()
+            with self._lock:
+                del self._inflight[auth_token]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[auth_token]
+            self._entries[auth_token] = (time.monotonic() + self.ttl, perms)
+            self._entries.move_to_end(auth_token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        pending.set_result(perms)
+        return dict(perms)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "size": len(self._entries)}
@@ -0,0 +1,25 @@
+import os
+from typing import Optional
+
+from chestra.log import get_logger
+
+logger = get_logger(__name__)
+
+
+def cache_dir() -> Optional[str]:
+    """
+    Directory for Chestra's on-disk caches, created on first use.
+    $CHESTRA_CACHE_DIR, then $XDG_CACHE_HOME/chestra, then ~/.cache/chestra.
+    Returns:
+        The directory, or None if it cannot be created (caching is then skipped).
+    """
+    path = os.environ.get("CHESTRA_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "chestra")
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError as e:
+        logger.info("Cache directory %s unavailable: %s", path, e)
+        return None
+    return path
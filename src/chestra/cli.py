@@ -6,39 +6,40 @@ import sys
 
 import yaml
 
-from .orchestrator import TaskOrchestrator
+from . import log, metrics
+from .orchestrator import PluginManager, TaskOrchestrator, WorkflowValidationError
+from .plan import load_plan
 
 # Set default log level to ERROR
 logging.basicConfig(level=logging.ERROR)
 
 
 def generate_plantuml(yaml_file: str, output_file: str = None):
-    with open(yaml_file, 'r') as f:
-        workflow = yaml.safe_load(f)
-    tasks = workflow['workflow']['tasks']
-    name = workflow['workflow'].get('name', 'Workflow')
+    plan = load_plan(yaml_file)
+    tasks = plan.tasks
+    name = plan.options.get('name', 'Workflow')
     lines = ["@startuml", f'title {name}']
     # Define components
     for task in tasks:
-        lines.append(f'component [{task["name"]}]')
+        lines.append(f'component [{task.name}]')
     # Build a map of output var -> task name
     output_to_task = {}
     for task in tasks:
-        for outvar in task.get('outputs', []):
-            output_to_task[(task['name'], outvar)] = task['name']
+        for outvar in task.outputs:
+            output_to_task[(task.name, outvar)] = task.name
     # Draw edges for each input, label links with VARS only (no notes)
     for task in tasks:
-        for inp in task.get('inputs', []):
+        for inp in task.inputs:
             m = re.match(r'([^.]+)\.(.+)', inp)
             if m:
                 src, var = m.group(1), m.group(2)
-                dst = task['name']
+                dst = task.name
                 lines.append(f'[{src}] --> [{dst}] : {var}')
             else:
                 # Fallback: try to find the producing task by output name
                 for (prod_task, outvar), src in output_to_task.items():
                     if outvar == inp:
-                        dst = task['name']
+                        dst = task.name
                         lines.append(f'[{prod_task}] --> [{dst}] : {outvar}')
     lines.append("@enduml")
     plantuml_text = '\n'.join(lines)
@@ -101,7 +102,7 @@ class {plugin_class_name}(TaskPlugin):
         Returns:
             Dictionary of output variables that will be available to subsequent tasks
         """
-        logger.info(f"Executing {plugin_name} plugin")
+        logger.info("Executing {plugin_name} plugin")
 
         # Check permissions if required
         if self.REQUIRES_AUTH:
@@ -259,6 +260,41 @@ python -m pytest tests/test_{plugin_name}_plugin.py
     print(f"   6. Move the test to tests/ for proper test organization")
 
 
+def validate_workflow(workflow_path: str, plugins_dir: str) -> bool:
+    """Load and statically validate a workflow without running any task."""
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    try:
+        orchestrator.load_workflow(workflow_path)
+    except WorkflowValidationError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return False
+    except KeyError as e:
+        print(f"❌ Invalid workflow: {e.args[0]}", file=sys.stderr)
+        return False
+    except (ValueError, yaml.YAMLError) as e:
+        # e.g. a duplicate task name, or YAML that does not parse (its message spans several lines)
+        print(f"❌ Invalid workflow: {' '.join(str(e).split())}", file=sys.stderr)
+        return False
+    print(f"✅ Workflow is valid: {len(orchestrator.tasks)} tasks")
+    return True
+
+
+def write_manifest(plugins_dir: str, builtin_only: bool = False, output_file: str = None) -> None:
+    """Describe the available plugins (for the UI palette and the packaged built-in manifest)."""
+    from .manifest import build_manifest, dump_manifest
+    manager = PluginManager()
+    # Scan the plugin sources rather than reading the packaged manifest being regenerated
+    manager.load_builtin_plugins()
+    if not builtin_only:
+        manager.index_entry_point_plugins()
+        manager.index_user_plugins(plugins_dir)
+    text = dump_manifest(build_manifest(manager), output_file)
+    if output_file is None:
+        print(text, end='')
+    else:
+        print(f"✅ Wrote {len(manager.specs)} plugins to {output_file}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Chestra Orchestrator CLI")
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -279,9 +315,110 @@ def main():
         default='/workflows',
         help='Directory to load workflow YAMLs from (default: /workflows)'
     )
+    run_parser.add_argument(
+        '--workers',
+        help="Worker pool size, or 'auto' to adapt it to I/O vs CPU load (default: workflow setting or 8)"
+    )
+    run_parser.add_argument(
+        '--engine',
+        choices=['thread', 'async'],
+        help='Execution engine: thread pool or asyncio event loop (default: workflow setting or thread)'
+    )
+    run_parser.add_argument(
+        '--scoped-env',
+        action='store_true',
+        default=None,
+        help='Give each task only its declared inputs plus AUTH_TOKEN/TIMEOUT instead of the whole env'
+    )
+    run_parser.add_argument(
+        '--cache',
+        action='store_true',
+        default=None,
+        help='Reuse outputs of tasks whose plugin, params and inputs are unchanged since an earlier run'
+    )
+    run_parser.add_argument(
+        '--resume',
+        metavar='RUN_ID',
+        help='Resume an interrupted run: skip the tasks its journal records as completed'
+    )
+    run_parser.add_argument(
+        '--journal',
+        action='store_true',
+        help='Journal the run so it can be resumed; every task\'s outputs are written to the runs directory in '
+             'the cache (~/.cache/chestra/runs or $CHESTRA_CACHE_DIR/runs)'
+    )
+    run_parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        help='Write a trace of every task (queued, permissions, execute, merge) to FILE, e.g. to open in Perfetto'
+    )
+    run_parser.add_argument(
+        '--trace-format',
+        choices=['chrome', 'otlp'],
+        default='chrome',
+        help='Trace file format: Chrome trace events or OTLP JSON (default: chrome)'
+    )
+    run_parser.add_argument(
+        '--metrics-file',
+        metavar='FILE',
+        help='Write Prometheus metrics to FILE during and after the run (e.g. for a textfile collector)'
+    )
+    run_parser.add_argument(
+        '--metrics-interval',
+        type=float,
+        default=metrics.DEFAULT_INTERVAL,
+        help=f'Seconds between rewrites of --metrics-file (default: {metrics.DEFAULT_INTERVAL:g})'
+    )
+    run_parser.add_argument(
+        '--metrics-port',
+        type=int,
+        metavar='PORT',
+        help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while the run lasts'
+    )
     run_parser.add_argument('--verbose', action='store_true', help='Enable INFO logging to stdout')
+    run_parser.add_argument(
+        '--log-format',
+        choices=['text', 'json'],
+        default='text',
+        help='Log as text, or as JSON lines tagged with the task and run id (default: text)'
+    )
+    run_parser.add_argument('--log-file', metavar='FILE', help='Append logs to FILE instead of stderr')
     run_parser.add_argument('--plantuml', nargs='?', const=True, help='Output PlantUML DAG diagram to file or stdout')
 
+    # Validate workflow command
+    validate_parser = subparsers.add_parser('validate', help='Check a workflow for cycles and unsatisfiable inputs')
+    validate_parser.add_argument(
+        'workflow',
+        help='Path to workflow YAML file (relative to --workflows)'
+    )
+    validate_parser.add_argument(
+        '--plugins',
+        default='/plugins',
+        help='Directory to load user plugins from (default: /plugins)'
+    )
+    validate_parser.add_argument(
+        '--workflows',
+        default='/workflows',
+        help='Directory to load workflow YAMLs from (default: /workflows)'
+    )
+
+    # Plugin manifest command
+    manifest_parser = subparsers.add_parser('manifest', help='Describe the available plugins as YAML or JSON')
+    manifest_parser.add_argument(
+        '--plugins',
+        default='/plugins',
+        help='Directory to load user plugins from (default: /plugins)'
+    )
+    manifest_parser.add_argument(
+        '--builtin-only',
+        action='store_true',
+        help='Only describe the built-in plugins (used to generate chestra/plugins/manifest.json)'
+    )
+    manifest_parser.add_argument(
+        '-o', '--output',
+        help='File to write; JSON if it ends in .json, YAML otherwise (default: YAML to stdout)'
+    )
+
     # Init plugin command
     init_parser = subparsers.add_parser('init-plugin', help='Initialize a new plugin')
     init_parser.add_argument('plugin_name', help='Name of the plugin to create')
@@ -294,50 +431,76 @@ def main():
     args = parser.parse_args()
 
     # Set log level after parsing args
-    verbose = getattr(args, 'verbose', False)
-    if verbose:
-        logging.getLogger().setLevel(logging.INFO)
-        for logger_name in [
-            "chestra.orchestrator",
-            "chestra.plugins.cmd",
-            "chestra.plugins.df",
-            "chestra.plugins.end",
-            "chestra.plugins.start",
-            "chestra.plugins.changed",
-        ]:
-            logger = logging.getLogger(logger_name)
-            logger.setLevel(logging.INFO)
-            logger.propagate = False
-    else:
-        logging.getLogger().setLevel(logging.ERROR)
-        for logger_name in [
-            "chestra.orchestrator",
-            "chestra.plugins.cmd",
-            "chestra.plugins.df",
-            "chestra.plugins.end",
-            "chestra.plugins.start",
-            "chestra.plugins.changed",
-        ]:
-            logger = logging.getLogger(logger_name)
-            logger.setLevel(logging.ERROR)
-            logger.propagate = False
+    level = logging.INFO if getattr(args, 'verbose', False) else logging.ERROR
+    logging.getLogger().setLevel(level)
 
     if args.command == 'init-plugin':
         init_plugin(args.plugin_name, args.plugins_dir)
         return
 
+    if args.command == 'manifest':
+        write_manifest(args.plugins, args.builtin_only, args.output)
+        return
+
+    if args.command == 'validate':
+        workflow_path = os.path.join(args.workflows, args.workflow)
+        sys.exit(0 if validate_workflow(workflow_path, args.plugins) else 1)
+
     if args.command == 'run':
         if args.plantuml:
             output_file = None if args.plantuml is True else args.plantuml
             generate_plantuml(args.workflow, output_file)
             sys.exit(0)
 
+        try:
+            log.configure(level, format=args.log_format, path=args.log_file)
+        except OSError as e:
+            print(f"❌ Cannot open log file: {e}", file=sys.stderr)
+            sys.exit(1)
+
         orchestrator = TaskOrchestrator(
             plugins_dir=args.plugins,
-            workflows_dir=args.workflows
+            workflows_dir=args.workflows,
+            workers=args.workers,
+            engine=args.engine,
+            scoped_env=args.scoped_env,
+            cache=args.cache,
         )
         workflow_path = os.path.join(args.workflows, args.workflow)
-        orchestrator.load_workflow(workflow_path)
-        orchestrator.run()
+        try:
+            orchestrator.load_workflow(workflow_path)
+        except WorkflowValidationError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        try:
+            if args.resume:
+                restored = orchestrator.resume(args.resume)
+                print(f"Resuming run {args.resume}: {len(restored)} tasks already completed", file=sys.stderr)
+            elif args.journal:
+                journal = orchestrator.start_journal()
+                print(f"Run {journal.run_id} (resume with --resume {journal.run_id})", file=sys.stderr)
+        except (OSError, ValueError) as e:
+            if args.resume:
+                print(f"❌ Cannot resume run {args.resume}: {e}", file=sys.stderr)
+                sys.exit(1)
+            print(f"⚠️  Run is not journaled: {e}", file=sys.stderr)
+        tracer = orchestrator.start_trace() if args.trace else None
+        metrics_writer = metrics.TextfileWriter(args.metrics_file, args.metrics_interval) if args.metrics_file else None
+        if metrics_writer is not None:
+            metrics_writer.start()
+        metrics_server = metrics.serve(args.metrics_port) if args.metrics_port else None
+        try:
+            orchestrator.run()
+        finally:
+            if metrics_writer is not None:
+                metrics_writer.close()
+            if metrics_server is not None:
+                metrics_server.shutdown()
+            if tracer is not None:
+                tracer.dump(args.trace, args.trace_format)
+                print(f"Trace of {len(tracer.spans)} spans written to {args.trace}", file=sys.stderr)
+        if orchestrator.result_cache is not None:
+            stats = orchestrator.result_cache.stats()
+            print(f"Result cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
     else:
         parser.print_help()
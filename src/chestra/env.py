@@ -0,0 +1,156 @@
+import itertools
+import threading
+import weakref
+from typing import Any, Dict, Iterator, List, Mapping, MutableMapping, Optional, Tuple
+
+_MISSING = object()
+
+
+class Environment(MutableMapping[str, Any]):
+    """
+    Workflow variables, versioned so tasks can read a consistent view without copying.
+
+    Every write bumps a version counter. snapshot() captures the current version in O(1) and the
+    returned EnvSnapshot only sees values written at or before it. Each finished task's namespaced
+    outputs are added as one layer (one version). Overwritten or deleted values are kept in a
+    small per-key history so older snapshots keep seeing them, until no live snapshot is old
+    enough to see them any more.
+    """
+
+    def __init__(self, initial: Optional[Mapping[str, Any]] = None) -> None:
+        # key -> (version it was written at, value); replaced as a whole so readers need no lock
+        self._current: Dict[str, Tuple[int, Any]] = {}
+        # key -> [(first version, last version + 1, value)] for values that were overwritten/deleted
+        self._history: Dict[str, List[Tuple[int, int, Any]]] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        # Live snapshots, to find the oldest version still readable (EnvSnapshot is unhashable, hence
+        # a WeakValueDictionary rather than a WeakSet)
+        self._snapshots: "weakref.WeakValueDictionary[int, EnvSnapshot]" = weakref.WeakValueDictionary()
+        self._snapshot_ids = itertools.count()
+        # History that ended at or before this version has been dropped
+        self._trimmed_to = 0
+        if initial:
+            self.add_layer(initial)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def add_layer(self, values: Mapping[str, Any]) -> None:
+        """Write several variables as a single new version."""
+        with self._lock:
+            version = self._version + 1
+            for key, value in values.items():
+                self._retire(key, version)
+                self._current[key] = (version, value)
+            self._version = version
+            self._trim()
+
+    def snapshot(self) -> "EnvSnapshot":
+        """Read-only view of the environment as it is now."""
+        with self._lock:
+            snapshot = EnvSnapshot(self, self._version)
+            self._snapshots[next(self._snapshot_ids)] = snapshot
+        return snapshot
+
+    def _retire(self, key: str, version: int) -> None:
+        old = self._current.get(key)
+        if old is not None:
+            self._history.setdefault(key, []).append((old[0], version, old[1]))
+
+    def _trim(self) -> None:
+        # Drop the history no live snapshot can see; called with the lock held. A value retired at
+        # version `end` is only visible to snapshots older than that, so once the oldest live
+        # snapshot has reached it the value is gone for good.
+        if not self._history:
+            return
+        oldest = min((snapshot._version for snapshot in self._snapshots.values()), default=self._version)
+        if oldest <= self._trimmed_to:
+            return
+        self._trimmed_to = oldest
+        for key, entries in list(self._history.items()):
+            kept = [entry for entry in entries if entry[1] > oldest]
+            if not kept:
+                del self._history[key]
+            elif len(kept) < len(entries):
+                # Replaced rather than edited, as readers iterate it without the lock
+                self._history[key] = kept
+
+    def _lookup(self, key: str, version: int) -> Any:
+        entry = self._current.get(key)
+        if entry is not None and entry[0] <= version:
+            return entry[1]
+        for start, end, value in reversed(self._history.get(key, ())):
+            if start <= version < end:
+                return value
+        return _MISSING
+
+    def _keys(self, version: int) -> Iterator[str]:
+        for key, entry in list(self._current.items()):
+            if entry[0] <= version:
+                yield key
+        for key in list(self._history):
+            entry = self._current.get(key)
+            if (entry is None or entry[0] > version) and self._lookup(key, version) is not _MISSING:
+                yield key
+
+    def __getitem__(self, key: str) -> Any:
+        entry = self._current.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry[1]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.add_layer({key: value})
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            if key not in self._current:
+                raise KeyError(key)
+            self._version += 1
+            self._retire(key, self._version)
+            del self._current[key]
+            self._trim()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._current
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._current))
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def __repr__(self) -> str:
+        return repr({key: entry[1] for key, entry in list(self._current.items())})
+
+
+class EnvSnapshot(Mapping[str, Any]):
+    """Immutable view of an Environment at one version; creating it copies nothing."""
+
+    def __init__(self, env: Environment, version: int) -> None:
+        self._env = env
+        self._version = version
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._env._lookup(key, self._version)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return self._env._lookup(key, self._version) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return self._env._keys(self._version)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def copy(self) -> Dict[str, Any]:
+        """Materialise the view as a plain dict."""
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return f"EnvSnapshot({self.copy()!r})"
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from chestra.cache import cache_dir
+from chestra.log import get_logger
+from chestra.sensors import get_reactor
+
+logger = get_logger(__name__)
+
+# Seconds between fsyncs of a journal: lines reach the OS as soon as they are written, so a crash of
+# the chestra process loses nothing, and a crash of the machine at most this much
+FSYNC_INTERVAL: float = 0.5
+# Journals of older runs are deleted when a new run starts
+KEEP_RUNS: int = 50
+
+
+def new_run_id() -> str:
+    """A sortable, unique run id such as 20240131-142501-a1b2c3."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+def runs_dir() -> Optional[str]:
+    """Directory holding run journals ($CHESTRA_CACHE_DIR/runs by default), or None if unavailable."""
+    directory = cache_dir()
+    if directory is None:
+        return None
+    path = os.path.join(directory, "runs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def journal_path(run_id: str, directory: Optional[str] = None) -> str:
+    directory = directory or runs_dir()
+    if directory is None:
+        raise FileNotFoundError("No directory for run journals (the cache directory is not writable)")
+    if os.sep in run_id or run_id.startswith("."):
+        raise ValueError(f"Invalid run id: {run_id!r}")
+    return os.path.join(directory, f"{run_id}.jsonl")
+
+
+def prune_runs(directory: str, keep: int = KEEP_RUNS) -> None:
+    """Delete all but the `keep` most recently written journals in `directory`."""
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".jsonl")]
+        if len(entries) <= keep:
+            return
+        # By modification time rather than name, so a resumed run counts as recent
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+    except OSError:
+        return
+    for entry in entries[:len(entries) - keep]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def _drop_torn_line(path: str) -> None:
+    # A crash can leave the last line without its newline; appending to it would merge the next
+    # record into a line read_journal() skips, so cut the file back to its last complete line
+    try:
+        f = open(path, "rb+")
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - 64 * 1024)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            logger.warning("Dropping an incomplete last line of %s", path)
+            f.truncate(position)
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_journal(path: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, str]]]:
+    """
+    Replay a run journal.
+    Args:
+        path: The journal file.
+    Returns:
+        The run's header record and, per completed task, its namespaced outputs. A line cut short
+        by a crash is ignored.
+    """
+    header: Dict[str, Any] = {}
+    completed: Dict[str, Dict[str, str]] = {}
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning("Ignoring unreadable line %s of %s", number, path)
+                continue
+            if record.get("type") == "run" and not header:
+                header = record
+            elif record.get("type") == "task":
+                completed[record["task"]] = record["outputs"]
+    return header, completed
+
+
+class RunJournal:
+    """
+    Append-only JSONL log of a workflow run, from which `chestra run --resume` restarts it.
+
+    The first line describes the run, then every successfully completed task appends its namespaced
+    outputs, and a finished run ends with an "end" line. Resuming appends to the same file. Each line
+    is flushed as it is written; fsyncs are batched (see FSYNC_INTERVAL) on the reactor's poke pool.
+    """
+    run_id: str
+    path: str
+
+    def __init__(self, run_id: str, path: str) -> None:
+        self.run_id = run_id
+        self.path = path
+        _drop_torn_line(path)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._sync_pending = False
+
+    @classmethod
+    def create(cls, workflow_path: str, run_id: Optional[str] = None, directory: Optional[str] = None) -> "RunJournal":
+        """Start the journal of a new run of `workflow_path`."""
+        run_id = run_id or new_run_id()
+        path = journal_path(run_id, directory)
+        prune_runs(os.path.dirname(path))
+        journal = cls(run_id, path)
+        journal._write({
+            "type": "run",
+            "run_id": run_id,
+            "workflow": os.path.abspath(workflow_path),
+            "digest": file_digest(workflow_path),
+            "started": time.time(),
+        })
+        return journal
+
+    def record(self, task_name: str, outputs: Dict[str, str]) -> None:
+        """Append a completed task and its namespaced outputs."""
+        self._write({"type": "task", "task": task_name, "outputs": outputs, "time": time.time()})
+
+    def end(self, completed: bool) -> None:
+        """Mark the run finished and sync the journal to disk."""
+        self._write({"type": "end", "completed": completed, "time": time.time()})
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if not self._sync_pending:
+                self._sync_pending = True
+                reactor = get_reactor()
+                reactor.call_later(FSYNC_INTERVAL, lambda: reactor.poke(self._sync))
+
+    def _sync(self) -> None:
+        with self._lock:
+            self._sync_pending = False
+            if not self._file.closed:
+                os.fsync(self._file.fileno())
@@ -1,11 +1,292 @@
+"""
+Logging for Chestra and its plugins.
+
+Once configured, every chestra logger writes through one QueueHandler: the calling thread only builds the record and
+queues it, and a background QueueListener formats and writes it, so worker threads never wait on
+the output stream. Messages use lazy %-style arguments (`logger.info("Ran %s", name)`); they are
+only formatted if the record is written. configure() installs this pipeline and chooses the level,
+the destination and the format: text, or JSON lines carrying the task and run id the record was
+logged under. Until then, records propagate to the application's own handlers.
+"""
+import atexit
+import json
 import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+ROOT_LOGGER = "chestra"
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+LOG_FORMATS = ("text", "json")
+# Characters of a clip()ped payload (command output, env dumps) that are logged
+MAX_PAYLOAD: int = 2000
+
+_task: ContextVar[Optional[str]] = ContextVar("chestra_task", default=None)
+_run_id: ContextVar[Optional[str]] = ContextVar("chestra_run_id", default=None)
+
+_handler: Optional["AsyncHandler"] = None
+_settings: Optional[Dict[str, Any]] = None
+# Loggers outside the chestra tree (user plugins) handed out by get_logger()
+_plugin_loggers: List[logging.Logger] = []
+# Level and propagate flag of each logger configure() attached the handler to
+_saved_loggers: Dict[logging.Logger, Tuple[int, bool]] = {}
+_configure_lock = threading.RLock()
+# Record attributes neither format uses; configure() skips collecting them (see the logging HOWTO's
+# "Optimization" section) and shutdown() restores them
+_RECORD_FLAGS = ("_srcfile", "logThreads", "logProcesses", "logMultiprocessing")
+_saved_flags: Dict[str, Any] = {}
+
+
+class Clipped:
+    """A logging argument cut to `limit` characters when, and only if, the record is written."""
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int = MAX_PAYLOAD) -> None:
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return _clip(str(self.value), self.limit)
+
+    def __repr__(self) -> str:
+        return _clip(repr(self.value), self.limit)
+
+
+def clip(value: Any, limit: int = MAX_PAYLOAD) -> Clipped:
+    """Wrap a potentially large logging argument, e.g. `logger.info("stdout: %r", clip(stdout))`."""
+    return Clipped(value, limit)
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... [{len(text) - limit} more characters]"
+
+
+@contextmanager
+def log_context(task: Optional[str] = None, run_id: Optional[str] = None) -> Iterator[None]:
+    """Tag the records logged in this block (on this thread or asyncio task) with a task and run id."""
+    task_token = _task.set(task) if task is not None else None
+    run_token = _run_id.set(run_id) if run_id is not None else None
+    try:
+        yield
+    finally:
+        if run_token is not None:
+            _run_id.reset(run_token)
+        if task_token is not None:
+            _task.reset(task_token)
+
+
+class TextFormatter(logging.Formatter):
+    """A Formatter that renders the date and time part of asctime once per second, not per record."""
+
+    def __init__(self, fmt: Optional[str] = TEXT_FORMAT) -> None:
+        super().__init__(fmt)
+        self._second: Tuple[int, str] = (-1, "")
+
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        second = int(record.created)
+        if self._second[0] != second:
+            self._second = (second, time.strftime(self.default_time_format, self.converter(second)))
+        return self.default_msec_format % (self._second[1], record.msecs)
+
+
+class JsonFormatter(TextFormatter):
+    """One JSON object per record: time, level, logger, message, and task/run_id when known."""
+
+    def __init__(self) -> None:
+        super().__init__(None)
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in ("task", "run_id"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _ContextFilter(logging.Filter):
+    """Copies the task and run id from the logging thread's context onto the record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.task = _task.get()
+        record.run_id = _run_id.get()
+        return True
+
+
+class _BatchedStreamHandler(logging.StreamHandler):
+    """A StreamHandler that only flushes once the listener has caught up with the queue."""
+
+    def __init__(self, stream: IO[str], pending: Callable[[], bool], owned: bool = False) -> None:
+        super().__init__(stream)
+        self._pending = pending
+        self._owned = owned
+
+    def flush(self) -> None:
+        if not self._pending():
+            super().flush()
+
+    def close(self) -> None:
+        try:
+            super().flush()
+            if self._owned:
+                self.stream.close()
+        finally:
+            super().close()
+
+
+class AsyncHandler(QueueHandler):
+    """
+    Queues records for a QueueListener thread that writes them to `targets`.
+    The listener starts with the first record in each process, so importing Chestra starts no
+    thread (the process pool's forkserver imports it) and a forked child gets a listener of its own.
+    """
+
+    def __init__(self, targets: List[logging.Handler]) -> None:
+        super().__init__(queue.SimpleQueue())
+        self.targets = targets
+        self._listener: Optional[QueueListener] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.addFilter(_ContextFilter())
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merging msg and args is left to the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        self.queue.put_nowait(record)
+
+    def pending(self) -> bool:
+        return not self.queue.empty()
+
+    def stop(self) -> None:
+        """Write every queued record, then stop the listener."""
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+        for target in self.targets:
+            target.flush()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # A forked child inherits the queue but not the listener thread
+            self.queue = queue.SimpleQueue()
+            self._listener = QueueListener(self.queue, *self.targets, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+
+def configure(
+    level: int = logging.INFO,
+    format: str = "text",
+    path: Optional[str] = None,
+    stream: Optional[IO[str]] = None,
+) -> None:
+    """
+    Route every chestra logger, and the user plugin loggers from get_logger(), through one
+    background writer, replacing any earlier configuration. Meant for applications that run
+    workflows (the CLI's `run` command); a library importing Chestra should configure logging its
+    own way. Until shutdown(), records no longer carry the caller's file, line, thread or process,
+    and these loggers no longer propagate to the root logger.
+    Args:
+        level: Level of the chestra loggers.
+        format: "text" or "json" (JSON lines with task and run ids).
+        path: Append to this file instead of writing to `stream`.
+        stream: Stream to write to (default: stderr).
+    """
+    global _handler, _settings
+    if format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format: {format!r} (expected one of {LOG_FORMATS})")
+    with _configure_lock:
+        shutdown()
+        handler = AsyncHandler([])
+        if path is not None:
+            target = _BatchedStreamHandler(open(path, "a", encoding="utf-8"), handler.pending, owned=True)
+        else:
+            target = _BatchedStreamHandler(stream or sys.stderr, handler.pending)
+        target.setFormatter(JsonFormatter() if format == "json" else TextFormatter())
+        handler.targets.append(target)
+        for flag in _RECORD_FLAGS:
+            _saved_flags[flag] = getattr(logging, flag)
+        logging._srcfile = None
+        logging.logThreads = logging.logProcesses = logging.logMultiprocessing = False
+        _handler = handler
+        _settings = {"level": level, "format": format, "path": path} if stream is None else None
+        for logger in [logging.getLogger(ROOT_LOGGER), *_plugin_loggers]:
+            _attach(logger, level)
+
+
+def settings() -> Optional[Dict[str, Any]]:
+    """configure()'s arguments while it is in effect, to configure worker processes the same way."""
+    return dict(_settings) if _settings is not None else None
+
+
+def shutdown() -> None:
+    """Write out queued records and restore the logging state configure() changed."""
+    global _handler, _settings
+    with _configure_lock:
+        handler, _handler = _handler, None
+        _settings = None
+        if handler is None:
+            return
+        handler.stop()
+        for logger, (level, propagate) in _saved_loggers.items():
+            logger.removeHandler(handler)
+            logger.setLevel(level)
+            logger.propagate = propagate
+        _saved_loggers.clear()
+        for target in handler.targets:
+            target.close()
+        handler.close()
+        for flag, value in _saved_flags.items():
+            setattr(logging, flag, value)
+        _saved_flags.clear()
 
 
 def get_logger(name: str) -> logging.Logger:
+    """
+    The logger for a module, e.g. get_logger(__name__).
+    Records go wherever the application's logging sends them. Once configure() is called, loggers
+    outside the chestra package, such as those of user plugins, share its pipeline and level.
+    """
     logger = logging.getLogger(name)
-    if not logger.hasHandlers():
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+    if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + "."):
+        with _configure_lock:
+            if logger not in _plugin_loggers:
+                _plugin_loggers.append(logger)
+                if _handler is not None:
+                    _attach(logger, logging.getLogger(ROOT_LOGGER).level)
     return logger
+
+
+def _attach(logger: logging.Logger, level: int) -> None:
+    _saved_loggers[logger] = (logger.level, logger.propagate)
+    logger.addHandler(_handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+# Library logging: silent unless the application configures handlers (or calls configure())
+logging.getLogger(ROOT_LOGGER).addHandler(logging.NullHandler())
+atexit.register(shutdown)
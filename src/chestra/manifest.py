@@ -0,0 +1,66 @@
+import json
+from typing import Any, Dict, List, Optional, Type
+
+import yaml
+
+from chestra.log import get_logger
+from chestra.orchestrator import PluginManager, TaskPlugin
+from chestra.plugin_index import MANIFEST_VERSION, PluginSpec
+
+logger = get_logger(__name__)
+
+
+def describe(spec: PluginSpec, plugin_class: Type[TaskPlugin]) -> Dict[str, Any]:
+    """Manifest entry for one plugin, from its class attributes (see TaskPlugin)."""
+    doc = (plugin_class.__doc__ or "").strip().splitlines()
+    entry: Dict[str, Any] = {
+        "name": spec.name,
+        "label": plugin_class.LABEL or spec.name.capitalize(),
+    }
+    if plugin_class.COLOR:
+        entry["color"] = plugin_class.COLOR
+    entry["description"] = plugin_class.DESCRIPTION or (doc[0] if doc else "")
+    if spec.module is not None:
+        entry["module"] = spec.module
+    else:
+        entry["path"] = spec.path
+    entry["class"] = spec.class_name
+    entry["outputs"] = list(plugin_class.OUTPUTS)
+    entry["params"] = [dict(param) for param in plugin_class.PARAMS]
+    permissions = list(getattr(plugin_class, "REQUIRED_PERMISSIONS", []))
+    if permissions:
+        entry["permissions"] = permissions
+    return entry
+
+
+def build_manifest(manager: PluginManager, names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Import the indexed plugins and describe them.
+    Args:
+        manager: A PluginManager whose plugins have been indexed.
+        names: Plugins to include (default: every indexed plugin).
+    Returns:
+        The manifest: {"version": ..., "plugins": [entry, ...]} sorted by name.
+    """
+    entries = []
+    for name in sorted(names if names is not None else manager.specs):
+        spec = manager.specs[name]
+        try:
+            plugin_class = manager.get_plugin_class(name)
+        except Exception as e:
+            logger.warning("Skipping plugin %s: %s", name, e)
+            continue
+        entries.append(describe(spec, plugin_class))
+    return {"version": MANIFEST_VERSION, "plugins": entries}
+
+
+def dump_manifest(manifest: Dict[str, Any], path: Optional[str] = None) -> str:
+    """Serialise a manifest as JSON (for .json paths) or YAML, writing it to `path` if given."""
+    if path is not None and path.endswith(".json"):
+        text = json.dumps(manifest, indent=2) + "\n"
+    else:
+        text = yaml.safe_dump(manifest, sort_keys=False, default_flow_style=None, width=120)
+    if path is not None:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
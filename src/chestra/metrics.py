@@ -0,0 +1,456 @@
+"""
+Counters, gauges and histograms in Prometheus text exposition format.
+
+The orchestrator, tasks and built-in plugins record into the default registry; plugins can add
+their own metrics the same way:
+
+    from chestra import metrics
+
+    ROWS = metrics.counter("myplugin_rows_total", "Rows loaded by myplugin", ["table"])
+    ROWS.labels("orders").inc(len(rows))
+
+Counters and histograms aggregate per thread, so recording takes no lock; the shards are only
+summed when the registry is exposed. Expose it with TextfileWriter (a file rewritten
+periodically, e.g. for node_exporter's textfile collector) or serve() (a local HTTP endpoint).
+"""
+import math
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from chestra.log import get_logger
+from chestra.sensors import TimerHandle, get_reactor
+
+logger = get_logger(__name__)
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Seconds between rewrites of a metrics file
+DEFAULT_INTERVAL: float = 15.0
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_NAME = re.compile(r"^[a-zA-Z_:][a-zA-Z0-9_:]*$")
+_LABEL = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+
+LabelValues = Tuple[str, ...]
+# (name suffix, label names and values, value)
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+
+class Metric(ABC):
+    """Base class of the metric types: a name, help text and label names, with a child per label set."""
+    TYPE: str = "untyped"
+    name: str
+    documentation: str
+    labelnames: Tuple[str, ...]
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        if not _NAME.match(name):
+            raise ValueError(f"Invalid metric name: {name!r}")
+        for label in labelnames:
+            if not _LABEL.match(label) or label.startswith("__") or label == "le":
+                raise ValueError(f"Invalid label name for {name}: {label!r}")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any, **labels: Any) -> Any:
+        """The child recording for one combination of label values, given in order or by name."""
+        if labels:
+            try:
+                values = tuple(labels.pop(name) for name in self.labelnames)
+            except KeyError as e:
+                raise ValueError(f"{self.name}: missing label {e}") from None
+            if labels:
+                raise ValueError(f"{self.name}: unknown labels {sorted(labels)}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._child(key))
+        return child
+
+    @abstractmethod
+    def samples(self) -> List[Sample]:
+        """The metric's samples, as exposed."""
+        pass
+
+    @abstractmethod
+    def _child(self, key: LabelValues) -> Any:
+        """A new child recording for one combination of label values."""
+        pass
+
+    def _unlabelled(self) -> Any:
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use labels()")
+        return self.labels()
+
+    def _label_pairs(self, key: LabelValues) -> Tuple[Tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, key))
+
+
+class _Sharded(Metric):
+    """
+    A metric whose values each thread updates in its own dict, so recording needs no lock.
+    Shards of threads that have exited are folded into `_retired` when the metric is collected.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[LabelValues, Any]]] = []
+        self._retired: Dict[LabelValues, Any] = {}
+
+    def _shard(self) -> Dict[LabelValues, Any]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values: Dict[LabelValues, Any] = {}
+            self._local.values = values
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def _collect(self) -> Dict[LabelValues, Any]:
+        """The sum of every thread's shard."""
+        with self._lock:
+            live = []
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    live.append((thread, values))
+                else:
+                    for key, value in list(values.items()):
+                        self._retired[key] = self._add(self._retired.get(key), value)
+            self._shards = live
+            total = {key: self._add(None, value) for key, value in self._retired.items()}
+        for _, values in live:
+            for key, value in list(values.items()):
+                total[key] = self._add(total.get(key), value)
+        return total
+
+    @abstractmethod
+    def _add(self, total: Any, value: Any) -> Any:
+        """Merge one shard's value into a running total (None to start a new total)."""
+        pass
+
+
+class _CounterChild:
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric: "Counter", key: LabelValues) -> None:
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        values = self._metric._shard()
+        values[self._key] = values.get(self._key, 0.0) + amount
+
+
+class Counter(_Sharded):
+    """A monotonically increasing total, e.g. tasks started."""
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def samples(self) -> List[Sample]:
+        totals = self._collect()
+        return [("", self._label_pairs(key), totals.get(key, 0.0)) for key in sorted(self._children)]
+
+    def _child(self, key: LabelValues) -> _CounterChild:
+        return _CounterChild(self, key)
+
+    def _add(self, total: Optional[float], value: float) -> float:
+        return (total or 0.0) + value
+
+
+class _HistogramChild:
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric: "Histogram", key: LabelValues) -> None:
+        self._metric = metric
+        self._key = key
+
+    def observe(self, value: float) -> None:
+        metric = self._metric
+        values = metric._shard()
+        # Per-bucket (not yet cumulative) counts, then the sum of observations
+        state = values.get(self._key)
+        if state is None:
+            state = values[self._key] = [0] * (len(metric.buckets) + 1) + [0.0]
+        state[bisect_left(metric.buckets, value)] += 1
+        state[-1] += value
+
+
+class Histogram(_Sharded):
+    """Observations counted into buckets, e.g. task durations."""
+    TYPE = "histogram"
+    buckets: Tuple[float, ...]
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    def samples(self) -> List[Sample]:
+        states = self._collect()
+        samples: List[Sample] = []
+        for key in sorted(self._children):
+            state = states.get(key) or [0] * (len(self.buckets) + 1) + [0.0]
+            labels = self._label_pairs(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state):
+                cumulative += count
+                samples.append(("_bucket", labels + (("le", _format(bound)),), cumulative))
+            samples.append(("_sum", labels, state[-1]))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+    def _child(self, key: LabelValues) -> _HistogramChild:
+        return _HistogramChild(self, key)
+
+    def _add(self, total: Optional[List[float]], value: List[float]) -> List[float]:
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+
+class _GaugeChild:
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric: "Gauge", key: LabelValues) -> None:
+        self._metric = metric
+        self._key = key
+
+    def set(self, value: float) -> None:
+        self._metric._values[self._key] = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._metric._lock:
+            self._metric._values[self._key] = self._metric._values.get(self._key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class Gauge(Metric):
+    """A value that goes up and down, e.g. busy workers. The last set() wins across threads."""
+    TYPE = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled().dec(amount)
+
+    def samples(self) -> List[Sample]:
+        return [("", self._label_pairs(key), self._values.get(key, 0.0)) for key in sorted(self._children)]
+
+    def _child(self, key: LabelValues) -> _GaugeChild:
+        return _GaugeChild(self, key)
+
+
+class Registry:
+    """A set of metrics exposed together."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter. Names of counters should end in _total."""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram; `buckets` are the upper bounds (+Inf is implied)."""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def get_sample_value(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """
+        The current value of one sample, e.g. get_sample_value("chestra_tasks_started_total", {"plugin": "cmd"}).
+        Args:
+            name: Sample name, including any _bucket, _sum or _count suffix.
+            labels: The sample's labels.
+        Returns:
+            The value, or None if there is no such sample.
+        """
+        wanted = labels or {}
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            if not name.startswith(metric.name):
+                continue
+            for suffix, sample_labels, value in metric.samples():
+                if metric.name + suffix == name and dict(sample_labels) == wanted:
+                    return value
+        return None
+
+    def exposition(self) -> str:
+        """Every metric in Prometheus text format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            for suffix, labels, value in metric.samples():
+                if labels:
+                    rendered = ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels)
+                    lines.append(f"{metric.name}{suffix}{{{rendered}}} {_format(value)}")
+                else:
+                    lines.append(f"{metric.name}{suffix} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Write the exposition to `path` atomically, so a collector never reads a partial file."""
+        import tempfile
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix=".chestra-metrics-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.exposition())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _get_or_create(self, cls: type, name: str, documentation: str, labelnames: Sequence[str], **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+                if not metric.labelnames:
+                    # Exposed as 0 before the first update
+                    metric.labels()
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(
+                    f"Metric {name} is already registered as a {metric.TYPE} with labels {metric.labelnames}"
+                )
+            return metric
+
+
+class TextfileWriter:
+    """Rewrites a registry's exposition to a file every `interval` seconds, from the reactor's poke pool."""
+
+    def __init__(self, path: str, interval: float = DEFAULT_INTERVAL, registry: Optional[Registry] = None) -> None:
+        self.path = path
+        self.interval = interval
+        self.registry = registry or REGISTRY
+        self._handle: Optional[TimerHandle] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Write the file now and then periodically until close()."""
+        self.registry.write(self.path)
+        self._schedule()
+
+    def close(self) -> None:
+        """Stop the periodic writes and write the final values."""
+        with self._lock:
+            self._closed = True
+            if self._handle is not None:
+                self._handle.cancel()
+            self.registry.write(self.path)
+
+    def _schedule(self) -> None:
+        reactor = get_reactor()
+        with self._lock:
+            if not self._closed:
+                self._handle = reactor.call_later(self.interval, lambda: reactor.poke(self._tick))
+
+    def _tick(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self.registry.write(self.path)
+            except OSError as e:
+                logger.warning("Cannot write metrics to %s: %s", self.path, e)
+        self._schedule()
+
+
+def serve(port: int, host: str = "127.0.0.1", registry: Optional[Registry] = None) -> Any:
+    """
+    Serve the registry on http://host:port/metrics from a daemon thread.
+    Returns:
+        The http.server instance; call its shutdown() to stop serving.
+    """
+    # http.server is only imported when metrics are served
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    registry = registry or REGISTRY
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="chestra-metrics", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%s/metrics", host, server.server_address[1])
+    return server
+
+
+def _format(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+
+# The API for plugins: metrics in the default registry
+counter: Callable[..., Counter] = REGISTRY.counter
+gauge: Callable[..., Gauge] = REGISTRY.gauge
+histogram: Callable[..., Histogram] = REGISTRY.histogram
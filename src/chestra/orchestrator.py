@@ -1,26 +1,96 @@
 import importlib
-import logging
-import pkgutil
+import importlib.util
+import os
 import threading
 import time
 from abc import ABC, abstractmethod
-from concurrent.futures import Future, ThreadPoolExecutor
-from typing import Any, Callable, Dict, List, Optional, Type
+from collections import ChainMap, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Mapping, Optional, Tuple, Type, Union
 
-import requests
-import yaml
+from . import metrics
+from .auth import PermissionCache
+from .env import Environment
+from .journal import RunJournal, file_digest, journal_path, new_run_id, read_journal
+from .log import clip, get_logger, log_context
+from .plan import load_plan
+from .plugin_index import BUILTIN_MANIFEST, PluginIndex, PluginSpec, load_manifest
+from .process_pool import EXECUTORS, PROCESS_EXECUTOR, THREAD_EXECUTOR, ProcessTaskPool
+from .result_cache import ResultCache, plugin_version, task_key
+from .sensors import Trigger, get_reactor
+from .template import compile_value, render_value
+from .tracing import EXECUTE, MERGE, NULL_TRACER, PERMISSIONS, QUEUED, NullTracer, Tracer, output_sizes
+from .validation import WorkflowValidationError, validate_workflow  # noqa: F401 (re-exported)
+from .workers import AUTO_WORKERS, DEFAULT_WORKERS, RunStats, WorkerPoolSizer, parse_workers
 
-# Set up a standard logger for the orchestrator
-logger = logging.getLogger("chestra.orchestrator")
-handler = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s')
-handler.setFormatter(formatter)
-if not logger.hasHandlers():
-    logger.addHandler(handler)
-logger.setLevel(logging.INFO)
+if TYPE_CHECKING:
+    import requests
+
+logger = get_logger(__name__)
+
+THREAD_ENGINE: str = "thread"
+ASYNC_ENGINE: str = "async"
+ENGINES = (THREAD_ENGINE, ASYNC_ENGINE)
+# asyncio (and requests, for the auth service) are imported where they are used, so a threaded
+# run of a small workflow does not pay for importing them
+# Non-namespaced variables a scoped task still sees alongside its declared inputs
+SYSTEM_ENV_KEYS = ("AUTH_TOKEN", "TIMEOUT")
+
+# Plugin concurrency models (TaskPlugin.CONCURRENCY)
+SHARED = "shared"
+PER_TASK = "per_task"
+POOLED = "pooled"
+CONCURRENCY_MODELS = (SHARED, PER_TASK, POOLED)
+
+TASKS_STARTED = metrics.counter("chestra_tasks_started_total", "Tasks started, by plugin", ["plugin"])
+TASKS_SUCCEEDED = metrics.counter(
+    "chestra_tasks_succeeded_total", "Tasks that produced all their declared outputs, by plugin", ["plugin"]
+)
+TASKS_FAILED = metrics.counter(
+    "chestra_tasks_failed_total", "Tasks that failed or were missing declared outputs, by plugin", ["plugin"]
+)
+TASK_DURATION = metrics.histogram(
+    "chestra_task_duration_seconds", "Time tasks spent executing on a worker, by plugin", ["plugin"]
+)
+QUEUE_WAIT = metrics.histogram(
+    "chestra_task_queue_wait_seconds", "Time tasks waited between becoming ready and starting, by plugin", ["plugin"]
+)
+POOL_WORKERS = metrics.gauge("chestra_worker_pool_size", "Tasks the worker pool may run at once")
+POOL_BUSY = metrics.gauge("chestra_worker_pool_busy", "Tasks holding a worker")
+ENV_BYTES = metrics.gauge("chestra_env_bytes", "Size of the run's environment (keys and values, UTF-8 encoded)")
 
 class TaskPlugin(ABC):
     """Abstract base class for all task plugins."""
+    # Params holding `$task.VAR` templates, rendered by the plugin (and for the result-cache key);
+    # load_workflow() parses every param string containing `$` into a Template once
+    TEMPLATE_PARAMS: List[str] = []
+
+    # Manifest metadata (`chestra manifest`): UI label and colour, a one-line description (defaults
+    # to the docstring's first line), the outputs the plugin can emit and the params it accepts,
+    # e.g. {"name": "url", "type": "string", "required": True}
+    LABEL: Optional[str] = None
+    COLOR: Optional[str] = None
+    DESCRIPTION: Optional[str] = None
+    OUTPUTS: List[str] = []
+    PARAMS: List[Dict[str, Any]] = []
+
+    # How tasks share instances of the plugin:
+    #   SHARED: one instance serves every task, concurrently, so execute() must be thread-safe
+    #   PER_TASK: each task gets its own instance, so state kept on self is never shared
+    #   POOLED: a task borrows one of at most POOL_SIZE instances while it runs; for plugins that
+    #       are expensive to construct (DB clients) and not thread-safe
+    CONCURRENCY: str = SHARED
+    POOL_SIZE: int = 4
+
+    # Where execute() runs: "thread" (the worker pool) or "process" (worker processes, for
+    # CPU-bound plugins; params, env and outputs must be picklable). A task's `executor` wins.
+    EXECUTOR: str = THREAD_EXECUTOR
+
+    # Outputs depend only on params and input values, so workflows with `cache: true` may reuse
+    # them across runs (see ResultCache). VERSION, when set, replaces the source hash in the key.
+    CACHEABLE: bool = True
+    VERSION: Optional[str] = None
+
     @abstractmethod
     def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
         """
@@ -33,6 +103,136 @@ class TaskPlugin(ABC):
         """
         pass
 
+    async def execute_async(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Asynchronous variant of execute(), used by the asyncio engine.
+        Plugins that wait on I/O override this to run natively on the event loop. The default
+        runs the synchronous execute() on the loop's default executor.
+        Args:
+            env: Current environment variables.
+            params: Parameters from the workflow YAML.
+        Returns:
+            Dictionary of output variables.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.execute, env, params)
+
+    def close(self) -> None:
+        """
+        Release resources the plugin keeps between tasks (sessions, clients, pools).
+        Called once when an orchestrator run finishes; the default does nothing.
+        """
+
+    async def aclose(self) -> None:
+        """Asynchronous close(), awaited when an asyncio engine run finishes."""
+        self.close()
+
+class SensorPlugin(TaskPlugin):
+    """
+    Base class for plugins that wait for an external condition (a file event, a timer, an HTTP
+    endpoint coming up) instead of doing work.
+
+    trigger() describes the condition; the orchestrator arms it on the shared Reactor and frees the
+    worker, so waiting sensors do not count against the pool size. on_event() is called once the
+    trigger fires (with None on timeout) and returns the task outputs; it runs on the reactor
+    thread and must not block.
+    """
+    # What a sensor observes is outside its inputs
+    CACHEABLE: bool = False
+
+    @abstractmethod
+    def trigger(self, env: Mapping[str, str], params: Dict[str, Any]) -> Trigger:
+        """
+        Describe what the task waits for.
+        Args:
+            env: Current environment variables.
+            params: Parameters from the workflow YAML.
+        Returns:
+            The Trigger to arm (see chestra.sensors).
+        """
+
+    def on_event(self, env: Mapping[str, str], params: Dict[str, Any], event: Any) -> Dict[str, str]:
+        """
+        Turn the trigger's event into output variables.
+        Args:
+            env: Current environment variables.
+            params: Parameters from the workflow YAML.
+            event: The value the trigger fired with, or None if it timed out.
+        Returns:
+            Dictionary of output variables.
+        """
+        return {}
+
+    def arm(self, env: Mapping[str, str], params: Dict[str, Any]) -> Future:
+        """Arm the trigger on the shared reactor; the Future resolves with its event."""
+        return get_reactor().defer(self.trigger(env, params))
+
+    def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        """Blocking variant, used when the plugin is run outside the scheduler."""
+        return self.on_event(env, params, self.arm(env, params).result())
+
+    async def execute_async(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        """Await the trigger on the event loop; the asyncio engine needs no thread for sensors."""
+        import asyncio
+        event = await asyncio.wrap_future(self.arm(env, params))
+        return self.on_event(env, params, event)
+
+def has_native_async(plugin: Union[TaskPlugin, Type[TaskPlugin]]) -> bool:
+    """True if the plugin (or plugin class) overrides TaskPlugin.execute_async with its own coroutine."""
+    plugin_class = plugin if isinstance(plugin, type) else type(plugin)
+    return plugin_class.execute_async is not TaskPlugin.execute_async
+
+
+def _entry_size(key: str, value: Any) -> int:
+    """Bytes an env variable takes, key and value UTF-8 encoded (as chestra_env_bytes counts them)."""
+    return len(key.encode()) + len(str(value).encode())
+
+
+class PluginPool:
+    """
+    Instances of a POOLED plugin class, created on demand up to `size` and lent to one task at a time.
+    acquire() blocks while every instance is in use.
+    """
+
+    def __init__(self, plugin_class: Type[TaskPlugin], size: int) -> None:
+        self.plugin_class = plugin_class
+        self.size = max(1, int(size))
+        self.instances: List[TaskPlugin] = []
+        self._idle: Deque[TaskPlugin] = deque()
+        self._creating = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, blocking: bool = True) -> Optional[TaskPlugin]:
+        """
+        Borrow an instance, constructing a new one if none is idle and the pool is not full.
+        Returns:
+            The instance, or None if `blocking` is False and the pool is exhausted.
+        """
+        with self._condition:
+            while not self._idle and len(self.instances) + self._creating >= self.size:
+                if not blocking:
+                    return None
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._creating += 1
+        # Construct outside the lock: expensive constructors must not stall release()
+        try:
+            plugin = self.plugin_class()
+        finally:
+            with self._condition:
+                self._creating -= 1
+                self._condition.notify()
+        with self._condition:
+            self.instances.append(plugin)
+        return plugin
+
+    def release(self, plugin: TaskPlugin) -> None:
+        with self._condition:
+            self._idle.append(plugin)
+            self._condition.notify()
+
 class Task:
     """Represents a single task in the workflow."""
     name: str
@@ -41,9 +241,14 @@ class Task:
     outputs: List[str]
     params: Dict[str, Any]
     completed: bool
-    plugin: Optional[TaskPlugin]
     requires_auth: bool
     permissions: List[str]
+    scoped_env: bool
+    executor: Optional[str]
+    result_cache: Optional[ResultCache]
+    cache_ttl: Optional[float]
+    tracer: NullTracer
+    pending_inputs: int
 
     def __init__(
         self,
@@ -54,16 +259,68 @@ class Task:
         params: Dict[str, Any],
         requires_auth: bool = False,
         permissions: Optional[List[str]] = None,
+        scoped_env: bool = False,
+        executor: Optional[str] = None,
     ) -> None:
+        if executor is not None and executor not in EXECUTORS:
+            raise ValueError(f"Task {name}: unknown executor {executor!r} (expected one of {EXECUTORS})")
         self.name = name
         self.plugin_name = plugin_name
         self.inputs = inputs
         self.outputs = outputs
         self.params = params or {}
         self.completed = False
-        self.plugin = None
+        # An instance assigned directly; otherwise plugin_manager supplies one per its CONCURRENCY
+        self._plugin: Optional[TaskPlugin] = None
+        # Resolves plugin_name on first use, so a plugin is only imported when its task runs
+        self.plugin_manager: Optional['PluginManager'] = None
+        self._plugin_class: Optional[Type[TaskPlugin]] = None
         self.requires_auth = requires_auth
         self.permissions = permissions or []
+        self.scoped_env = scoped_env
+        # None: the plugin's EXECUTOR decides
+        self.executor = executor
+        # Set by the orchestrator when the task's outputs may be cached
+        self.result_cache = None
+        self.cache_ttl = None
+        # Set by the orchestrator when the run is traced
+        self.tracer = NULL_TRACER
+        self.pending_inputs = len(set(inputs))
+
+    @property
+    def plugin_class(self) -> Optional[Type[TaskPlugin]]:
+        """The task's plugin class, imported on first access."""
+        if self._plugin is not None:
+            return type(self._plugin)
+        if self._plugin_class is None and self.plugin_manager is not None:
+            self._plugin_class = self.plugin_manager.get_plugin_class(self.plugin_name)
+        return self._plugin_class
+
+    @property
+    def plugin(self) -> Optional[TaskPlugin]:
+        """
+        The instance the task runs with: the one assigned directly, else the shared or per-task
+        instance from plugin_manager. POOLED plugins have no fixed instance (None).
+        """
+        if self._plugin is not None or self.plugin_manager is None:
+            return self._plugin
+        if self.plugin_class is None or self.plugin_class.CONCURRENCY == POOLED:
+            return None
+        plugin = self.plugin_manager.acquire(self.plugin_name, self.name)
+        self.plugin_manager.release(self.plugin_name, plugin)
+        return plugin
+
+    @plugin.setter
+    def plugin(self, plugin: Optional[TaskPlugin]) -> None:
+        self._plugin = plugin
+
+    @property
+    def runs_in_process(self) -> bool:
+        """True if the task's plugin runs in a worker process (see ProcessTaskPool)."""
+        executor = self.executor
+        if executor is None:
+            executor = self.plugin_class.EXECUTOR if self.plugin_class is not None else THREAD_EXECUTOR
+        return executor == PROCESS_EXECUTOR
 
     def can_run(self, env: Dict[str, str]) -> bool:
         """
@@ -72,6 +329,20 @@ class Task:
         """
         return all(var in env for var in self.inputs) and not self.completed
 
+    def scope(self, env: Mapping[str, str]) -> Dict[str, str]:
+        """
+        Build the minimal view of env a scoped task runs with.
+        Args:
+            env: Current environment variables.
+        Returns:
+            A new dict holding only the task's declared inputs and the SYSTEM_ENV_KEYS present in env.
+        """
+        view: Dict[str, str] = {key: env[key] for key in self.inputs}
+        for key in SYSTEM_ENV_KEYS:
+            if key in env:
+                view[key] = env[key]
+        return view
+
     def execute(
         self,
         env: Dict[str, str],
@@ -80,103 +351,505 @@ class Task:
         """
         Execute the task using its plugin. Handles permission checks if required.
         Args:
+            env: Current environment variables. Scoped tasks only pass their inputs and
+                SYSTEM_ENV_KEYS on to the plugin.
+            get_permissions: Function to fetch permissions if needed.
+        Returns:
+            Dictionary of output variables.
+        """
+        env = self._enter(env, get_permissions)
+        if env is None:
+            return {}
+        self._check_plugin()
+        key, cached = self._lookup(env)
+        if cached is not None:
+            return self._finish(cached)
+        plugin = self._acquire()
+        started = self.tracer.now()
+        try:
+            result: Dict[str, str] = plugin.execute(env, self.params)
+            self.tracer.add(self.name, EXECUTE, started, plugin=self.plugin_name, **output_sizes(result))
+            return self._store(key, self._finish(result))
+        except Exception as e:
+            self.tracer.add(self.name, EXECUTE, started, plugin=self.plugin_name, error=str(e))
+            logger.error("Task %s failed: %s", self.name, e)
+            return {}
+        finally:
+            self._release_plugin(plugin)
+
+    def defer(
+        self,
+        env: Dict[str, str],
+        get_permissions: Optional[Callable[[str], Dict[str, bool]]] = None,
+    ) -> Future:
+        """
+        Start a sensor task without blocking: arm its plugin's trigger and return right away.
+        Args:
+            env: Current environment variables.
+            get_permissions: Function to fetch permissions if needed.
+        Returns:
+            A Future resolved with the task's output variables once the trigger fires or times out.
+        """
+        outputs: Future = Future()
+        outputs.set_running_or_notify_cancel()
+        env = self._enter(env, get_permissions)
+        if env is None:
+            outputs.set_result({})
+            return outputs
+        self._check_plugin()
+        # The instance stays with the task until its trigger fires
+        plugin = self._acquire()
+        started = self.tracer.now()
+
+        def resume(event: Future) -> None:
+            try:
+                result = plugin.on_event(env, self.params, event.result())
+                self.tracer.add(
+                    self.name, EXECUTE, started, asynchronous=True, plugin=self.plugin_name, **output_sizes(result)
+                )
+                outputs.set_result(self._finish(result))
+            except Exception as e:
+                logger.error("Task %s failed: %s", self.name, e)
+                outputs.set_result({})
+            finally:
+                self._release_plugin(plugin)
+
+        try:
+            plugin.arm(env, self.params).add_done_callback(resume)
+        except Exception as e:
+            logger.error("Task %s failed: %s", self.name, e)
+            self._release_plugin(plugin)
+            outputs.set_result({})
+        return outputs
+
+    def submit(
+        self,
+        pool: ProcessTaskPool,
+        env: Dict[str, str],
+        get_permissions: Optional[Callable[[str], Dict[str, bool]]] = None,
+    ) -> Future:
+        """
+        Hand the task to a worker process and return right away.
+        Inputs and permissions are checked here; only a plain dict of the env the plugin may see
+        is shipped to the worker.
+        Args:
+            pool: The run's process pool.
             env: Current environment variables.
             get_permissions: Function to fetch permissions if needed.
+        Returns:
+            A Future resolved with the task's output variables.
+        """
+        outputs: Future = Future()
+        outputs.set_running_or_notify_cancel()
+        env = self._enter(env, get_permissions)
+        if env is None:
+            outputs.set_result({})
+            return outputs
+        self._check_plugin()
+        key, cached = self._lookup(env)
+        if cached is not None:
+            outputs.set_result(self._finish(cached))
+            return outputs
+
+        def collect(remote: Future) -> None:
+            try:
+                result, pid, tid, started, ended = remote.result()
+                self.tracer.add(
+                    self.name, EXECUTE, started, ended, pid=pid, tid=tid, plugin=self.plugin_name,
+                    **output_sizes(result)
+                )
+                outputs.set_result(self._store(key, self._finish(result)))
+            except Exception as e:
+                logger.error("Task %s failed: %s", self.name, e)
+                outputs.set_result({})
+
+        try:
+            pool.submit(self.name, dict(env)).add_done_callback(collect)
+        except Exception as e:
+            logger.error("Task %s failed: %s", self.name, e)
+            outputs.set_result({})
+        return outputs
+
+    async def execute_async(
+        self,
+        env: Dict[str, str],
+        get_permissions: Optional[Callable[[str], Dict[str, bool]]] = None,
+    ) -> Dict[str, str]:
+        """
+        Execute the task on the running event loop via the plugin's execute_async().
+        The (blocking) permission lookup is pushed to the loop's default executor.
+        Args:
+            env: Current environment variables. Scoped tasks only pass their inputs and
+                SYSTEM_ENV_KEYS on to the plugin.
+            get_permissions: Function to fetch permissions if needed.
         Returns:
             Dictionary of output variables.
         """
         if not self.can_run(env):
             return {}
+        if self.scoped_env:
+            env = self.scope(env)
         if self.requires_auth and get_permissions:
-            auth_token: Optional[str] = env.get('AUTH_TOKEN')
-            perms: Dict[str, bool] = get_permissions(auth_token)
-            env['_permissions'] = perms
-            if self.permissions and not all(perms.get(p, False) for p in self.permissions):
-                logger.warning(f"Task {self.name} failed permission check")
+            import asyncio
+            loop = asyncio.get_running_loop()
+            started = self.tracer.now()
+            perms: Dict[str, bool] = await loop.run_in_executor(None, get_permissions, env.get('AUTH_TOKEN'))
+            self.tracer.add(self.name, PERMISSIONS, started, asynchronous=True)
+            if not self._authorize(env, perms):
                 return {}
-        logger.info(f"Executing task: {self.name} ({self.plugin_name})")
-        if not self.plugin:
-            logger.error(f"Plugin not loaded for task {self.name}")
-            raise RuntimeError(f"Plugin not loaded for task {self.name}")
+        self._check_plugin()
+        key, cached = self._lookup(env)
+        if cached is not None:
+            return self._finish(cached)
+        if self._plugin is not None:
+            plugin = self._plugin
+        else:
+            plugin = await self.plugin_manager.acquire_async(self.plugin_name, self.name)
+        started = self.tracer.now()
         try:
-            result: Dict[str, str] = self.plugin.execute(env, self.params)
-            self.completed = True
-            # Only return variables that are declared as outputs
-            return {k: v for k, v in result.items() if k in self.outputs}
+            result: Dict[str, str] = await plugin.execute_async(env, self.params)
+            self.tracer.add(
+                self.name, EXECUTE, started, asynchronous=True, plugin=self.plugin_name, **output_sizes(result)
+            )
+            return self._store(key, self._finish(result))
         except Exception as e:
-            logger.error(f"Task {self.name} failed: {e}")
+            self.tracer.add(self.name, EXECUTE, started, asynchronous=True, plugin=self.plugin_name, error=str(e))
+            logger.error("Task %s failed: %s", self.name, e)
             return {}
+        finally:
+            self._release_plugin(plugin)
+
+    def _enter(
+        self,
+        env: Dict[str, str],
+        get_permissions: Optional[Callable[[str], Dict[str, bool]]],
+    ) -> Optional[Dict[str, str]]:
+        """Check inputs and permissions; returns the env for the plugin, or None if the task cannot run."""
+        if not self.can_run(env):
+            return None
+        if self.scoped_env:
+            env = self.scope(env)
+        if self.requires_auth and get_permissions:
+            with self.tracer.span(self.name, PERMISSIONS):
+                perms: Dict[str, bool] = get_permissions(env.get('AUTH_TOKEN'))
+            if not self._authorize(env, perms):
+                return None
+        return env
+
+    def _authorize(self, env: Dict[str, str], perms: Dict[str, bool]) -> bool:
+        env['_permissions'] = perms
+        if self.permissions and not all(perms.get(p, False) for p in self.permissions):
+            logger.warning("Task %s failed permission check", self.name)
+            return False
+        return True
+
+    def _check_plugin(self) -> None:
+        logger.info("Executing task: %s (%s)", self.name, self.plugin_name)
+        if self.plugin_class is None:
+            logger.error("Plugin not loaded for task %s", self.name)
+            raise RuntimeError(f"Plugin not loaded for task {self.name}")
+
+    def _lookup(self, env: Mapping[str, str]) -> Tuple[Optional[str], Optional[Dict[str, str]]]:
+        """
+        The task's result-cache key for this env and the outputs cached under it.
+        The key covers the plugin name and version, the params (templated ones rendered against
+        env) and the values of the declared inputs. Returns (None, None) when caching is off.
+        """
+        plugin_class = self.plugin_class
+        if self.result_cache is None or not plugin_class.CACHEABLE:
+            return None, None
+        params = dict(self.params)
+        for param in plugin_class.TEMPLATE_PARAMS:
+            if param in params:
+                params[param] = render_value(params[param], env)
+        inputs = {key: env[key] for key in self.inputs}
+        key = task_key(self.plugin_name, plugin_version(plugin_class), params, inputs)
+        cached = self.result_cache.get(key, self.cache_ttl)
+        if cached is not None:
+            logger.info("Task %s: reusing cached outputs", self.name)
+        return key, cached
+
+    def produced_all(self, outputs: Mapping[str, str]) -> bool:
+        """
+        True if `outputs` holds every declared output. A result missing some is most likely a
+        failure, so it is neither cached nor journaled and the task runs again next time.
+        """
+        return all(name in outputs for name in self.outputs)
+
+    def _store(self, key: Optional[str], outputs: Dict[str, str]) -> Dict[str, str]:
+        if key is not None and self.produced_all(outputs):
+            self.result_cache.put(key, outputs)
+        return outputs
+
+    def _acquire(self) -> TaskPlugin:
+        if self._plugin is not None:
+            return self._plugin
+        return self.plugin_manager.acquire(self.plugin_name, self.name)
+
+    def _release_plugin(self, plugin: TaskPlugin) -> None:
+        if self._plugin is None:
+            self.plugin_manager.release(self.plugin_name, plugin)
+
+    def _finish(self, result: Dict[str, str]) -> Dict[str, str]:
+        self.completed = True
+        # Only return variables that are declared as outputs
+        return {k: v for k, v in result.items() if k in self.outputs}
 
 class PluginManager:
-    """Manages loading and retrieval of plugins."""
+    """
+    Manages loading and retrieval of plugins.
+
+    The index_* methods only record where each plugin lives (a PluginSpec); a plugin's module is
+    imported the first time it is asked for, so a workflow only pays for the plugins it uses.
+    Built-ins come from the packaged manifest (falling back to scanning chestra/plugins), then
+    installed `chestra.plugins` entry points, then the user plugins directory; later sources
+    shadow earlier ones with the same name.
+
+    Tasks obtain instances with acquire()/release(), which honour each class's CONCURRENCY:
+    SHARED plugins have one instance (`plugins`), PER_TASK plugins one per task and POOLED
+    plugins a PluginPool of at most POOL_SIZE instances.
+    """
     plugins: Dict[str, TaskPlugin]
-    def __init__(self) -> None:
+    specs: Dict[str, PluginSpec]
+    classes: Dict[str, Type[TaskPlugin]]
+    def __init__(self, index: Optional[PluginIndex] = None) -> None:
         self.plugins = {}
+        self.specs = {}
+        self.classes = {}
+        self._per_task: Dict[Tuple[str, str], TaskPlugin] = {}
+        self._pools: Dict[str, PluginPool] = {}
+        self._index = index
+        self._builtins_scanned = False
+        self._lock = threading.RLock()
+    @property
+    def index(self) -> PluginIndex:
+        if self._index is None:
+            self._index = PluginIndex()
+        return self._index
+    def index_builtin_plugins(self) -> None:
+        """Record the built-in plugins from the packaged manifest, without importing them."""
+        specs = load_manifest(BUILTIN_MANIFEST)
+        if specs is None:
+            self._scan_builtin_plugins()
+            return
+        for spec in specs:
+            self.specs.setdefault(spec.name, spec)
+    def index_entry_point_plugins(self) -> None:
+        """Record plugins other distributions register under the `chestra.plugins` entry point group."""
+        for spec in self.index.entry_points():
+            self._shadow(spec)
+        self.index.save()
+    def index_user_plugins(self, plugins_dir: str) -> None:
+        """Record the plugins in a user-supplied directory (each non-test .py file is a plugin)."""
+        if not os.path.isdir(plugins_dir):
+            logger.info("User plugins directory %s does not exist or is not a directory.", plugins_dir)
+            return
+        for spec in self.index.scan(plugins_dir):
+            self._shadow(spec)
+        self.index.save()
     def load_builtin_plugins(self) -> None:
         """Dynamically load all plugins from the plugins directory."""
-        import chestra.plugins
-        package = chestra.plugins
-        for _, modname, ispkg in pkgutil.iter_modules(package.__path__):
-            if not ispkg:
-                module = importlib.import_module(f"chestra.plugins.{modname}")
-                class_name = ''.join([part.capitalize() for part in modname.split('_')]) + 'Plugin'
-                plugin_class: Type[TaskPlugin] = getattr(module, class_name, None)
-                if plugin_class:
-                    self.plugins[modname] = plugin_class()
-                    logger.info(f"Loaded plugin: {modname} -> {plugin_class.__name__}")
-                else:
-                    logger.warning(f"No plugin class found in module: {modname}")
+        self._scan_builtin_plugins()
+        for name, spec in list(self.specs.items()):
+            if spec.module is not None and spec.module.startswith('chestra.plugins.'):
+                self.get_plugin(name)
     def load_user_plugins(self, plugins_dir: str) -> None:
-        """Load plugins from a user-supplied directory (each .py file is a plugin)."""
-        import importlib.util
-        import os
-        if not os.path.isdir(plugins_dir):
-            logger.info(f"User plugins directory {plugins_dir} does not exist or is not a directory.")
-            return
-        for fname in os.listdir(plugins_dir):
-            if fname.endswith('.py') and not fname.startswith('_'):
-                modname = fname[:-3]
-                fpath = os.path.join(plugins_dir, fname)
-                spec = importlib.util.spec_from_file_location(modname, fpath)
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    # Convention: plugin class is <CamelCase>Plugin
-                    class_name = ''.join([part.capitalize() for part in modname.split('_')]) + 'Plugin'
-                    plugin_class: Type[TaskPlugin] = getattr(module, class_name, None)
-                    if plugin_class:
-                        self.plugins[modname] = plugin_class()
-                        logger.info(f"Loaded plugin: {modname} -> {plugin_class.__name__}")
-                    else:
-                        logger.warning(f"No plugin class found in user module: {modname}")
+        """Load plugins from a user-supplied directory (each non-test .py file is a plugin)."""
+        self.index_user_plugins(plugins_dir)
+        for name, spec in list(self.specs.items()):
+            if spec.path is not None:
+                self.get_plugin(name)
+    def has_plugin(self, name: str) -> bool:
+        """True if a plugin of that name is indexed or loaded (nothing is imported)."""
+        if name not in self.specs and name not in self.plugins and not self._builtins_scanned:
+            # The packaged manifest may predate a new built-in plugin
+            self._scan_builtin_plugins()
+        return name in self.specs or name in self.plugins
+    def get_plugin_class(self, name: str) -> Type[TaskPlugin]:
+        """Retrieve a plugin class by name, importing it on first use."""
+        with self._lock:
+            if name not in self.classes:
+                if name in self.plugins:
+                    return type(self.plugins[name])
+                if self.has_plugin(name) and name in self.specs:
+                    self._load(self.specs[name])
+            if name not in self.classes:
+                logger.error("Plugin %s not found", name)
+                raise KeyError(f"Plugin {name} not found")
+            return self.classes[name]
     def get_plugin(self, name: str) -> TaskPlugin:
-        """Retrieve a plugin by name."""
-        if name not in self.plugins:
-            logger.error(f"Plugin {name} not found")
-            raise KeyError(f"Plugin {name} not found")
-        return self.plugins[name]
+        """Retrieve the shared instance of a plugin by name, importing it on first use."""
+        with self._lock:
+            if name not in self.plugins:
+                self.plugins[name] = self.get_plugin_class(name)()
+            return self.plugins[name]
+    def acquire(self, name: str, owner: str) -> TaskPlugin:
+        """
+        Get an instance of a plugin for a task to run with, per the class's CONCURRENCY.
+        Args:
+            name: Plugin name.
+            owner: Name of the task the instance is for (PER_TASK plugins keep one per owner).
+        Returns:
+            The instance; hand it back with release() when the task is done with it.
+        """
+        plugin_class = self.get_plugin_class(name)
+        if plugin_class.CONCURRENCY == POOLED:
+            return self._pool(name, plugin_class).acquire()
+        if plugin_class.CONCURRENCY == PER_TASK:
+            with self._lock:
+                key = (name, owner)
+                if key not in self._per_task:
+                    self._per_task[key] = plugin_class()
+                return self._per_task[key]
+        return self.get_plugin(name)
+    async def acquire_async(self, name: str, owner: str) -> TaskPlugin:
+        """acquire() for the event loop: waiting for a pooled instance does not block the loop."""
+        plugin_class = self.get_plugin_class(name)
+        if plugin_class.CONCURRENCY != POOLED:
+            return self.acquire(name, owner)
+        pool = self._pool(name, plugin_class)
+        plugin = pool.acquire(blocking=False)
+        if plugin is None:
+            import asyncio
+            plugin = await asyncio.get_running_loop().run_in_executor(None, pool.acquire)
+        return plugin
+    def release(self, name: str, plugin: TaskPlugin) -> None:
+        """Hand back an instance obtained from acquire()."""
+        pool = self._pools.get(name)
+        if pool is not None and isinstance(plugin, pool.plugin_class):
+            pool.release(plugin)
+    def instances(self) -> List[TaskPlugin]:
+        """Every plugin instance created so far (shared, per-task and pooled)."""
+        with self._lock:
+            instances = list(self.plugins.values()) + list(self._per_task.values())
+            for pool in self._pools.values():
+                instances.extend(pool.instances)
+        return instances
+    def close(self) -> None:
+        """Release the resources of every plugin instance (see TaskPlugin.close)."""
+        for plugin in self.instances():
+            plugin.close()
+    async def aclose(self) -> None:
+        for plugin in self.instances():
+            await plugin.aclose()
+    def _pool(self, name: str, plugin_class: Type[TaskPlugin]) -> PluginPool:
+        with self._lock:
+            if name not in self._pools:
+                self._pools[name] = PluginPool(plugin_class, plugin_class.POOL_SIZE)
+            return self._pools[name]
+    def _shadow(self, spec: PluginSpec) -> None:
+        self.specs[spec.name] = spec
+        self.plugins.pop(spec.name, None)
+        self.classes.pop(spec.name, None)
+        self._pools.pop(spec.name, None)
+    def _scan_builtin_plugins(self) -> None:
+        import chestra.plugins
+        for directory in chestra.plugins.__path__:
+            for spec in self.index.scan(directory, package='chestra.plugins'):
+                self.specs.setdefault(spec.name, spec)
+        self.index.save()
+        self._builtins_scanned = True
+    def _load(self, spec: PluginSpec) -> None:
+        if spec.module is not None:
+            module = importlib.import_module(spec.module)
+        else:
+            module_spec = importlib.util.spec_from_file_location(spec.name, spec.path)
+            if not module_spec or not module_spec.loader:
+                return
+            module = importlib.util.module_from_spec(module_spec)
+            module_spec.loader.exec_module(module)
+        plugin_class: Type[TaskPlugin] = getattr(module, spec.class_name, None)
+        if not plugin_class:
+            logger.warning("No plugin class found in module: %s", spec.name)
+            return
+        if plugin_class.CONCURRENCY not in CONCURRENCY_MODELS:
+            logger.error("Plugin %s declares unknown CONCURRENCY %r", spec.name, plugin_class.CONCURRENCY)
+            raise ValueError(
+                f"Plugin {spec.name}: CONCURRENCY must be one of {', '.join(CONCURRENCY_MODELS)}, "
+                f"not {plugin_class.CONCURRENCY!r}"
+            )
+        self.classes[spec.name] = plugin_class
+        logger.info("Loaded plugin: %s -> %s", spec.name, plugin_class.__name__)
 
 class TaskOrchestrator:
     """Main orchestrator for loading workflows and running tasks."""
     tasks: List[Task]
-    env: Dict[str, str]
+    env: Environment
+    consumers: Dict[str, List[Task]]
     plugin_manager: PluginManager
     auth_service_url: str
+    permission_cache: PermissionCache
     env_lock: threading.Lock
     plugins_dir: str
     workflows_dir: str
+    workers: Union[int, str, None]
+    engine: Optional[str]
+    scoped_env: Optional[bool]
+    cache: Optional[bool]
+    result_cache: Optional[ResultCache]
+    journal: Optional[RunJournal]
+    tracer: NullTracer
+    workflow_path: Optional[str]
+    workflow_options: Dict[str, Any]
+    stats: Optional[RunStats]
 
-    def __init__(self, plugins_dir: str = '/plugins', workflows_dir: str = '/workflows') -> None:
+    def __init__(
+        self,
+        plugins_dir: str = '/plugins',
+        workflows_dir: str = '/workflows',
+        workers: Union[int, str, None] = None,
+        engine: Optional[str] = None,
+        auth_cache_ttl: float = 300.0,
+        auth_cache_size: int = 128,
+        scoped_env: Optional[bool] = None,
+        cache: Optional[bool] = None,
+    ) -> None:
+        """
+        Args:
+            plugins_dir: Directory to load user plugins from.
+            workflows_dir: Directory to load workflow YAMLs from.
+            workers: Worker pool size, or "auto" for adaptive sizing. Overrides the workflow's
+                `workers` setting; defaults to 8 when neither is given.
+            engine: "thread" (default) or "async". Overrides the workflow's `engine` setting.
+            auth_cache_ttl: Seconds a permission lookup for a token is reused.
+            auth_cache_size: Maximum number of tokens kept in the permission cache.
+            scoped_env: Give every task only its declared inputs plus SYSTEM_ENV_KEYS instead of the
+                whole env. Overrides the workflow's `scoped_env` setting; a task's own `scoped_env`
+                still wins. Defaults to False.
+            cache: Reuse the outputs of tasks whose plugin, params and input values are unchanged
+                since an earlier run (see ResultCache). Overrides the workflow's `cache` setting;
+                a task's own `cache` still wins. Defaults to False.
+        """
         self.tasks = []
-        self.env = {}
+        self.env = Environment()
+        self.consumers = {}
         self.plugin_manager = PluginManager()
         self.auth_service_url = "https://attica.tech/permissions"
         self.env_lock = threading.Lock()
         self.plugins_dir = plugins_dir
         self.workflows_dir = workflows_dir
+        self.workers = parse_workers(workers)
+        if engine is not None and engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine!r} (expected one of {ENGINES})")
+        self.engine = engine
+        self.scoped_env = scoped_env
+        self.cache = cache
+        self.result_cache = None
+        self.journal = None
+        self.tracer = NULL_TRACER
+        self._env_bytes = 0
+        self._log_run_id: Optional[str] = None
+        self.workflow_path = None
+        self.workflow_options = {}
+        self.stats = None
+        self.permission_cache = PermissionCache(self._fetch_permissions, ttl=auth_cache_ttl, max_size=auth_cache_size)
+        self._auth_session: Optional['requests.Session'] = None
+        self._auth_session_lock = threading.Lock()
     def get_permissions(self, auth_token: Optional[str]) -> Dict[str, bool]:
         """
         Fetch permissions from the Attica Auth service.
+        Lookups are cached per token (see `permission_cache`) and concurrent lookups of the
+        same token share one request.
         Args:
             auth_token: The authentication token.
         Returns:
@@ -185,96 +858,492 @@ class TaskOrchestrator:
         if not auth_token:
             return {}
         try:
-            response = requests.post(
-                self.auth_service_url,
-                json={"auth_token": auth_token},
-                timeout=3,
-            )
-            response.raise_for_status()
-            return response.json().get('permissions', {})
+            return self.permission_cache.get(auth_token)
         except Exception as e:
-            logger.error(f"Auth service error: {e}")
+            logger.error("Auth service error: %s", e)
             return {}
-    def load_workflow(self, yaml_file: str) -> None:
+    def _fetch_permissions(self, auth_token: str) -> Dict[str, bool]:
+        with self._auth_session_lock:
+            if self._auth_session is None:
+                import requests
+                self._auth_session = requests.Session()
+            session = self._auth_session
+        response = session.post(
+            self.auth_service_url,
+            json={"auth_token": auth_token},
+            timeout=3,
+        )
+        response.raise_for_status()
+        return response.json().get('permissions', {})
+    def _close_auth_session(self) -> None:
+        with self._auth_session_lock:
+            session, self._auth_session = self._auth_session, None
+        if session is not None:
+            session.close()
+    def load_workflow(self, yaml_file: str, validate: bool = True, plan_cache: bool = True) -> None:
         """
         Load workflow definition from a YAML file and initialize tasks.
         Args:
             yaml_file: Path to the workflow YAML file.
+            validate: Reject cycles, unproduced inputs and unreachable tasks before running anything.
+            plan_cache: Reuse the workflow's compiled plan from an earlier load instead of parsing the
+                YAML again (see chestra.plan).
+        Raises:
+            WorkflowValidationError: If validation is enabled and the task graph cannot complete.
         """
-        with open(yaml_file, 'r') as f:
-            workflow: Dict[str, Any] = yaml.safe_load(f)
-        # Always load built-in plugins first
-        self.plugin_manager.load_builtin_plugins()
-        # Then load user plugins if the directory exists
-        self.plugin_manager.load_user_plugins(self.plugins_dir)
-        seen_names = set()
-        for task_def in workflow['workflow']['tasks']:
-            name = task_def['name']
-            if name in seen_names:
-                raise ValueError(f"Duplicate task name: {name}")
-            seen_names.add(name)
-            # Inject task_name into params for plugin use
-            params = task_def.get('params', {}).copy()
-            params['task_name'] = name
+        plan = load_plan(yaml_file, cache=plan_cache)
+        self.workflow_path = yaml_file
+        self.workflow_options.update(plan.options)
+        # Index built-in plugins first, then installed entry points and user plugins; modules are
+        # only imported when a task first uses its plugin
+        self.plugin_manager.index_builtin_plugins()
+        self.plugin_manager.index_entry_point_plugins()
+        self.plugin_manager.index_user_plugins(self.plugins_dir)
+        for plugin_name in plan.plugins:
+            if not self.plugin_manager.has_plugin(plugin_name):
+                logger.error("Plugin %s not found", plugin_name)
+                raise KeyError(f"Plugin {plugin_name} not found")
+        scoped_env = self.scoped_env
+        if scoped_env is None:
+            scoped_env = bool(self.workflow_options.get('scoped_env', False))
+        cache = self.cache
+        if cache is None:
+            cache = bool(self.workflow_options.get('cache', False))
+        first = len(self.tasks)
+        for spec in plan.tasks:
             task = Task(
-                name=name,
-                plugin_name=task_def['plugin'],
-                inputs=task_def.get('inputs', []),
-                outputs=task_def.get('outputs', []),
-                params=params,
-                requires_auth=task_def.get('requires_auth', False),
-                permissions=task_def.get('permissions', {}).get('required', [])
-                if 'permissions' in task_def
-                else [],
+                name=spec.name,
+                plugin_name=plan.plugins[spec.plugin],
+                inputs=spec.inputs,
+                outputs=spec.outputs,
+                # `$task.VAR` templates are parsed here, once, and kept in the task's params
+                params=compile_value(spec.params),
+                requires_auth=spec.requires_auth,
+                permissions=spec.permissions,
+                scoped_env=bool(scoped_env if spec.scoped_env is None else spec.scoped_env),
+                executor=spec.executor,
             )
-            task.plugin = self.plugin_manager.get_plugin(task.plugin_name)
+            task.plugin_manager = self.plugin_manager
+            task.tracer = self.tracer
+            if cache if spec.cache is None else spec.cache:
+                task.result_cache = self._result_cache()
+                task.cache_ttl = spec.cache_ttl
+                if task.cache_ttl is None:
+                    task.cache_ttl = self.workflow_options.get('cache_ttl')
             self.tasks.append(task)
+        if first == 0:
+            self.consumers = {key: [self.tasks[i] for i in indices] for key, indices in plan.consumers.items()}
+        else:
+            self._index_dependencies()
+        if validate:
+            validate_workflow(self.tasks, self.consumers, available=self.env.keys())
+    def start_journal(self, run_id: Optional[str] = None, directory: Optional[str] = None) -> RunJournal:
+        """
+        Journal this run, so it can be resumed if the process dies (see resume()).
+        Call after load_workflow().
+        Args:
+            run_id: Id for the run (default: a new timestamped id).
+            directory: Where journals are kept (default: the `runs` directory in `cache_dir()`).
+        Returns:
+            The journal; its `run_id` identifies the run.
+        """
+        self.journal = RunJournal.create(self.workflow_path, run_id, directory)
+        return self.journal
+    def start_trace(self) -> Tracer:
+        """
+        Trace this run: record when each task was queued, checked permissions, executed and had its
+        outputs merged. Dump the result with `tracer.dump()` once the run is over.
+        """
+        self.tracer = Tracer()
+        for task in self.tasks:
+            task.tracer = self.tracer
+        return self.tracer
+    def resume(self, run_id: str, directory: Optional[str] = None) -> List[str]:
+        """
+        Pick up an interrupted run: replay its journal into the env and mark the tasks it records
+        as completed, so run() only schedules the remainder. The run keeps appending to the
+        same journal. Call after load_workflow().
+        Args:
+            run_id: Id of the run to resume.
+            directory: Where journals are kept (default: the `runs` directory in `cache_dir()`).
+        Returns:
+            Names of the tasks restored from the journal.
+        Raises:
+            FileNotFoundError: If there is no journal for run_id.
+        """
+        path = journal_path(run_id, directory)
+        header, completed = read_journal(path)
+        if header.get("digest") not in (None, file_digest(self.workflow_path)):
+            logger.warning("Workflow %s changed since run %s started", self.workflow_path, run_id)
+        restored: List[str] = []
+        for task in self.tasks:
+            outputs = completed.get(task.name)
+            if outputs is None or task.completed:
+                continue
+            self.env.add_layer(outputs)
+            task.completed = True
+            restored.append(task.name)
+        logger.info("Resuming run %s: %s of %s tasks already completed", run_id, len(restored), len(self.tasks))
+        self.journal = RunJournal(run_id, path)
+        return restored
+    def _result_cache(self) -> ResultCache:
+        """The shared result cache, opened on first use; sized by the workflow's `cache_max_mb`."""
+        if self.result_cache is None:
+            max_mb = self.workflow_options.get('cache_max_mb')
+            if max_mb is None:
+                self.result_cache = ResultCache()
+            else:
+                self.result_cache = ResultCache(max_bytes=int(float(max_mb) * 1024 * 1024))
+        return self.result_cache
+    def _close_result_cache(self) -> None:
+        """Close the result cache's connection, checkpointing its WAL; its stats() stay readable."""
+        if self.result_cache is not None:
+            self.result_cache.close()
+    def _index_dependencies(self) -> None:
+        """
+        Build the index from each namespaced input key (TASK.VAR) to the tasks consuming it.
+        The scheduler uses it to release only the direct consumers of a finished task.
+        """
+        self.consumers = {}
+        for task in self.tasks:
+            for key in set(task.inputs):
+                self.consumers.setdefault(key, []).append(task)
+    def _ready_tasks(self) -> Deque[Task]:
+        """
+        Reset every task's missing-input counter against the current env.
+        Returns:
+            Queue of incomplete tasks whose inputs are already satisfied.
+        """
+        ready: Deque[Task] = deque()
+        for task in self.tasks:
+            task.pending_inputs = sum(1 for key in set(task.inputs) if key not in self.env)
+            if task.pending_inputs == 0 and not task.completed:
+                ready.append(task)
+        return ready
+    def _complete_task(self, task: Task, result: Dict[str, str]) -> List[Task]:
+        """
+        Merge a finished task's outputs into the env under its namespace and mark it completed.
+        Args:
+            task: The task that finished.
+            result: Its (un-namespaced) output variables.
+        Returns:
+            Consumers whose last missing input was just provided.
+        """
+        released: List[Task] = []
+        started = self.tracer.now()
+        namespaced = {f"{task.name}.{k}": v for k, v in result.items()}
+        with self.env_lock:
+            for key, value in namespaced.items():
+                if key not in self.env:
+                    self._env_bytes += _entry_size(key, value)
+                    for consumer in self.consumers.get(key, ()):
+                        consumer.pending_inputs -= 1
+                        if consumer.pending_inputs == 0 and not consumer.completed:
+                            released.append(consumer)
+            # The task's outputs become one new layer; running tasks keep their own snapshot
+            self.env.add_layer(namespaced)
+        task.completed = True
+        ENV_BYTES.set(self._env_bytes)
+        if not task.produced_all(result):
+            TASKS_FAILED.labels(task.plugin_name).inc()
+        else:
+            TASKS_SUCCEEDED.labels(task.plugin_name).inc()
+            if self.journal is not None:
+                self.journal.record(task.name, namespaced)
+        self.tracer.add(task.name, MERGE, started, outputs=len(result), released=len(released))
+        return released
+    def _report_stuck(self) -> None:
+        logger.error("Workflow stuck - some tasks cannot run")
+        incomplete: List[str] = [t.name for t in self.tasks if not t.completed]
+        logger.error("Incomplete tasks: %s", incomplete)
+        logger.error("Current environment: %s", clip(self.env))
+    def _pool_sizer(self) -> WorkerPoolSizer:
+        """Resolve the pool size: constructor/CLI setting, then the workflow's `workers`, then the default."""
+        workers = self.workers
+        if workers is None:
+            workers = parse_workers(self.workflow_options.get('workers'))
+        if workers == AUTO_WORKERS:
+            return WorkerPoolSizer(DEFAULT_WORKERS, adaptive=True)
+        return WorkerPoolSizer(workers or DEFAULT_WORKERS)
+    def _process_pool(self) -> Optional[ProcessTaskPool]:
+        """
+        Start (and warm) the worker processes for the tasks that run in a process, if there are any.
+        Size: the workflow's `process_workers` setting, else the CPU count.
+        """
+        tasks = [task for task in self.tasks if not task.completed and task.runs_in_process]
+        if not tasks:
+            return None
+        specs: Dict[str, PluginSpec] = {}
+        for task in tasks:
+            if issubclass(task.plugin_class, SensorPlugin):
+                raise ValueError(f"Task {task.name}: sensor plugins cannot run in a process")
+            if task.plugin_name not in self.plugin_manager.specs:
+                raise ValueError(f"Task {task.name}: plugin {task.plugin_name} cannot be imported by a worker process")
+            specs[task.plugin_name] = self.plugin_manager.specs[task.plugin_name]
+        workers = parse_workers(self.workflow_options.get('process_workers'))
+        pool = ProcessTaskPool(
+            specs,
+            {task.name: (task.plugin_name, task.params, task.outputs) for task in tasks},
+            workers=workers if isinstance(workers, int) else None,
+        )
+        pool.warm()
+        return pool
+    def _run_engine(self) -> str:
+        engine = self.engine or self.workflow_options.get('engine', THREAD_ENGINE)
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine!r} (expected one of {ENGINES})")
+        return engine
+    def _finish_run(self, remaining: int, aborted: bool = False) -> None:
+        self._close_auth_session()
+        self.stats.finish()
+        with log_context(run_id=self._run_id()):
+            logger.info("Run stats: %s", self.stats.summary())
+            if self.permission_cache.hits or self.permission_cache.misses:
+                logger.info("Permission cache: %s", self.permission_cache.stats())
+            if self.result_cache is not None:
+                logger.info("Result cache: %s", self.result_cache.stats())
+            if self.journal is not None:
+                self.journal.end(completed=remaining == 0 and not aborted)
+            if aborted:
+                logger.error("Run aborted with %s of %s tasks incomplete", remaining, len(self.tasks))
+            elif remaining == 0:
+                logger.info("Workflow completed successfully!")
+            else:
+                # Nothing running and nothing eligible to start
+                self._report_stuck()
     def run(self) -> None:
         """
         Main execution loop. Runs eligible tasks in parallel when their dependencies are met.
-        Keeps all running tasks alive and updates environment as soon as any task completes.
-        """
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            futures: Dict[Future, Task] = {}
-            running_tasks: set = set()
-            while True:
-                # Start all eligible tasks that haven't started yet
-                for task in self.tasks:
-                    if task.can_run(self.env) and task not in running_tasks:
-                        future = executor.submit(self._run_task_threadsafe, task)
+        Blocks until at least one running task completes, merges its outputs into the environment
+        and immediately dispatches the consumers it released, so each dependency edge is visited
+        once over the whole run instead of rescanning every task per tick.
+        At most `sizer.target` tasks run at once; timing stats are kept in `self.stats`.
+        With the "async" engine the run is delegated to run_async() on a new event loop.
+        """
+        if self._run_engine() == ASYNC_ENGINE:
+            import asyncio
+            asyncio.run(self.run_async())
+            return
+        ready = self._ready_tasks()
+        remaining = sum(1 for task in self.tasks if not task.completed)
+        sizer = self._pool_sizer()
+        self.stats = RunStats()
+        self._env_bytes = self._env_size()
+        # When each task became ready, so queue wait includes time spent waiting for a free worker
+        ready_at: Dict[str, float] = {task.name: self.stats.started_at for task in ready}
+        process_pool: Optional[ProcessTaskPool] = None
+        finished = False
+        try:
+            process_pool = self._process_pool()
+            with ThreadPoolExecutor(max_workers=sizer.maximum) as executor:
+                futures: Dict[Future, Task] = {}
+                # Sensor tasks waiting on the reactor and tasks running in a worker process; neither
+                # holds a worker thread
+                sensing: Dict[Future, Task] = {}
+                while True:
+                    # Start every task whose inputs have all been provided, up to the pool limit
+                    while ready and len(futures) < sizer.target:
+                        task = ready.popleft()
+                        future = executor.submit(
+                            self._run_task_threadsafe, task, sizer, ready_at.pop(task.name), process_pool
+                        )
                         futures[future] = task
-                        running_tasks.add(task)
-                # Check for completed tasks and update env
-                done_futures = [f for f in futures if f.done()]
-                for f in done_futures:
-                    task = futures[f]
-                    result = f.result()
-                    with self.env_lock:
-                        namespaced = {f"{task.name}.{k}": v for k, v in result.items()}
-                        self.env.update(namespaced)
-                    task.completed = True
-                    del futures[f]
-                # If all tasks are completed, break
-                if all(task.completed for task in self.tasks):
-                    logger.info("Workflow completed successfully!")
-                    break
-                # If no tasks are running or can run, and not all are completed, stuck
-                no_running = not any(
-                    not t.completed for t in self.tasks if t in running_tasks
-                )
-                no_eligible = not any(
-                    t.can_run(self.env) for t in self.tasks if not t.completed
+                    self._observe_pool(len(futures), sizer.target)
+                    if not futures and not sensing:
+                        break
+                    # Sleep until at least one task finishes, then update env
+                    done_futures, _ = wait([*futures, *sensing], return_when=FIRST_COMPLETED)
+                    for f in done_futures:
+                        task = futures.pop(f, None) or sensing.pop(f)
+                        result = f.result()
+                        if isinstance(result, Future):
+                            # The sensor armed its trigger (or the task went to a worker process); wait
+                            # for it without holding the worker
+                            sensing[result] = task
+                            continue
+                        remaining -= 1
+                        ready.extend(self._release(task, result, ready_at))
+                    sizer.adjust(backlog=len(ready))
+            finished = True
+        finally:
+            # Also when a task or the scheduler raises: stop the worker processes, close pooled
+            # clients and the result cache, and end the journal
+            if process_pool is not None:
+                process_pool.shutdown()
+            self.plugin_manager.close()
+            self._close_result_cache()
+            self._finish_run(remaining, aborted=not finished)
+
+    async def run_async(self) -> None:
+        """
+        Asyncio execution loop with the same event-driven, indegree-based scheduling as run().
+        Tasks whose plugin implements execute_async() run as coroutines on the current event loop
+        and hold no thread while they wait; legacy synchronous plugins are pushed to a worker pool
+        sized like the threaded engine.
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        ready = self._ready_tasks()
+        remaining = sum(1 for task in self.tasks if not task.completed)
+        sizer = self._pool_sizer()
+        self.stats = RunStats()
+        self._env_bytes = self._env_size()
+        ready_at: Dict[str, float] = {task.name: self.stats.started_at for task in ready}
+        # Synchronous tasks waiting for a free worker thread
+        blocked: Deque[Task] = deque()
+        threaded = 0
+        running: Dict[asyncio.Future, Task] = {}
+        process_pool: Optional[ProcessTaskPool] = None
+        finished = False
+        try:
+            process_pool = self._process_pool()
+            with ThreadPoolExecutor(max_workers=sizer.maximum) as executor:
+                while True:
+                    # Native coroutines and process tasks start immediately, sync plugins queue for a
+                    # worker thread
+                    while ready:
+                        task = ready.popleft()
+                        if task.runs_in_process:
+                            job = self._run_task_in_process(task, process_pool, ready_at.pop(task.name))
+                            running[asyncio.ensure_future(job)] = task
+                            continue
+                        if not has_native_async(task.plugin_class):
+                            blocked.append(task)
+                            continue
+                        job = self._run_task_async(task, ready_at.pop(task.name))
+                        running[asyncio.ensure_future(job)] = task
+                    while blocked and threaded < sizer.target:
+                        task = blocked.popleft()
+                        job = loop.run_in_executor(
+                            executor, self._run_task_threadsafe, task, sizer, ready_at.pop(task.name)
+                        )
+                        running[job] = task
+                        threaded += 1
+                    self._observe_pool(len(running), sizer.target)
+                    if not running:
+                        break
+                    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for job in done:
+                        task = running.pop(job)
+                        if not isinstance(job, asyncio.Task):
+                            threaded -= 1
+                        remaining -= 1
+                        ready.extend(self._release(task, job.result(), ready_at))
+                    sizer.adjust(backlog=len(blocked))
+            finished = True
+        finally:
+            # Also when a task or the scheduler raises (see run())
+            for job in running:
+                job.cancel()
+            if process_pool is not None:
+                await loop.run_in_executor(None, process_pool.shutdown)
+            await self.plugin_manager.aclose()
+            self._close_result_cache()
+            self._finish_run(remaining, aborted=not finished)
+
+    def _release(self, task: Task, result: Dict[str, str], ready_at: Dict[str, float]) -> List[Task]:
+        released = self._complete_task(task, result)
+        now = time.perf_counter()
+        for consumer in released:
+            ready_at[consumer.name] = now
+        return released
+
+    def _task_env(self) -> ChainMap:
+        """
+        The env handed to a task: an O(1) snapshot of self.env under a private writable layer,
+        so writes such as `_permissions` stay local to the task without copying the environment.
+        """
+        return ChainMap({}, self.env.snapshot())
+
+    async def _run_task_async(self, task: Task, ready_at: float) -> Dict[str, str]:
+        started = time.perf_counter()
+        self._start_task(task, ready_at, started)
+        try:
+            with log_context(task.name, self._run_id()):
+                return await task.execute_async(self._task_env(), get_permissions=self.get_permissions)
+        finally:
+            self._end_task(task, started - ready_at, time.perf_counter() - started)
+
+    async def _run_task_in_process(self, task: Task, pool: ProcessTaskPool, ready_at: float) -> Dict[str, str]:
+        import asyncio
+        started = time.perf_counter()
+        self._start_task(task, ready_at, started)
+        try:
+            # The permission lookup may block, so the hand-off runs on the default executor
+            with log_context(task.name, self._run_id()):
+                outputs = await asyncio.get_running_loop().run_in_executor(
+                    None, task.submit, pool, self._task_env(), self.get_permissions
                 )
-                if no_running and no_eligible:
-                    logger.error("Workflow stuck - some tasks cannot run")
-                    incomplete: List[str] = [t.name for t in self.tasks if not t.completed]
-                    logger.error(f"Incomplete tasks: {incomplete}")
-                    logger.error(f"Current environment: {self.env}")
-                    break
-                time.sleep(0.1)
-
-    def _run_task_threadsafe(self, task: Task) -> Dict[str, str]:
-        # Copy env for thread safety
-        with self.env_lock:
-            env_copy = self.env.copy()
-        return task.execute(env_copy, get_permissions=self.get_permissions)
+                return await asyncio.wrap_future(outputs)
+        finally:
+            self._end_task(task, started - ready_at, time.perf_counter() - started)
+
+    def _start_task(self, task: Task, ready_at: float, started: float) -> None:
+        """Record the time a task spent ready but waiting for a worker (perf_counter readings)."""
+        self.tracer.add(task.name, QUEUED, self.tracer.at(ready_at), self.tracer.at(started), asynchronous=True)
+        TASKS_STARTED.labels(task.plugin_name).inc()
+        QUEUE_WAIT.labels(task.plugin_name).observe(started - ready_at)
+
+    def _end_task(self, task: Task, queue_wait: float, exec_time: float) -> None:
+        self.stats.record(queue_wait, exec_time)
+        TASK_DURATION.labels(task.plugin_name).observe(exec_time)
+
+    def _observe_pool(self, running: int, workers: int) -> None:
+        self.stats.observe_running(running, workers)
+        POOL_BUSY.set(running)
+        POOL_WORKERS.set(workers)
+
+    def _run_id(self) -> str:
+        # Unjournaled runs still get an id to tag their log records with
+        if self.journal is not None:
+            return self.journal.run_id
+        if self._log_run_id is None:
+            self._log_run_id = new_run_id()
+        return self._log_run_id
+
+    def _env_size(self) -> int:
+        return sum(_entry_size(key, value) for key, value in self.env.items())
+
+    def _run_task_threadsafe(
+        self, task: Task, sizer: WorkerPoolSizer, ready_at: float, process_pool: Optional[ProcessTaskPool] = None
+    ) -> Union[Dict[str, str], Future]:
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        self._start_task(task, ready_at, started)
+        deferred: Optional[Future] = None
+        try:
+            with log_context(task.name, self._run_id()):
+                if process_pool is not None and task.runs_in_process:
+                    deferred = task.submit(process_pool, self._task_env(), get_permissions=self.get_permissions)
+                elif issubclass(task.plugin_class, SensorPlugin):
+                    deferred = task.defer(self._task_env(), get_permissions=self.get_permissions)
+                else:
+                    return task.execute(self._task_env(), get_permissions=self.get_permissions)
+        finally:
+            if deferred is None:
+                exec_time = time.perf_counter() - started
+                self._end_task(task, started - ready_at, exec_time)
+                sizer.record(exec_time, time.thread_time() - cpu_started)
+        return self._end_when_done(task, deferred, started - ready_at, started)
+
+    def _end_when_done(self, task: Task, deferred: Future, queue_wait: float, started: float) -> Future:
+        """
+        Time a sensor or process task until its outputs arrive rather than until it was handed off.
+        It holds no worker thread meanwhile, so it is left out of the pool sizer's samples.
+        Returns:
+            A Future resolved with the task's outputs once its duration has been recorded, so run()
+            never merges (or finishes the run) ahead of the record.
+        """
+        outputs: Future = Future()
+        outputs.set_running_or_notify_cancel()
+
+        def done(future: Future) -> None:
+            self._end_task(task, queue_wait, time.perf_counter() - started)
+            error = future.exception()
+            if error is not None:
+                outputs.set_exception(error)
+            else:
+                outputs.set_result(future.result())
+
+        deferred.add_done_callback(done)
+        return outputs
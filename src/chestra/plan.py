@@ -0,0 +1,200 @@
+import gc
+import hashlib
+import os
+import pickle
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator, List, NamedTuple, Optional, Union
+
+import yaml
+
+from chestra import __version__
+from chestra.cache import cache_dir
+from chestra.log import get_logger
+
+logger = get_logger(__name__)
+
+PLAN_VERSION = 1
+# Compiled plans kept on disk; the least recently used are removed beyond this
+MAX_CACHED_PLANS = 64
+
+# libyaml's parser when PyYAML was built with it, several times faster on large files
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml(source: Union[str, bytes, IO[Any]]) -> Any:
+    """yaml.safe_load(), using the C loader when available."""
+    return yaml.load(source, Loader=YamlLoader)
+
+
+class TaskSpec(NamedTuple):
+    """One task of a compiled workflow; unset options are None and fall back to the workflow's."""
+    name: str
+    # Index into WorkflowPlan.plugins
+    plugin: int
+    inputs: List[str]
+    outputs: List[str]
+    # Includes the injected task_name and task_outputs
+    params: Dict[str, Any]
+    requires_auth: bool
+    permissions: List[str]
+    scoped_env: Optional[bool]
+    executor: Optional[str]
+    cache: Optional[bool]
+    cache_ttl: Optional[float]
+
+
+class WorkflowPlan(NamedTuple):
+    """A parsed workflow in the form load_workflow() builds its tasks from."""
+    # Workflow-level settings (name, scoped_env, cache, ...), everything but the tasks
+    options: Dict[str, Any]
+    # Distinct plugin names, in order of first use
+    plugins: List[str]
+    tasks: List[TaskSpec]
+    # Namespaced input key (TASK.VAR) -> indices of the tasks consuming it
+    consumers: Dict[str, List[int]]
+
+
+def compile_workflow(workflow: Dict[str, Any]) -> WorkflowPlan:
+    """
+    Compile a parsed workflow document into a plan.
+    Args:
+        workflow: The document, with its settings and tasks under the `workflow` key.
+    Returns:
+        The plan.
+    Raises:
+        ValueError: If two tasks share a name.
+        KeyError: If a task has no name or plugin.
+    """
+    definition = workflow['workflow']
+    plugins: Dict[str, int] = {}
+    tasks: List[TaskSpec] = []
+    consumers: Dict[str, List[int]] = {}
+    seen_names = set()
+    for index, task_def in enumerate(definition['tasks']):
+        name = task_def['name']
+        if name in seen_names:
+            raise ValueError(f"Duplicate task name: {name}")
+        seen_names.add(name)
+        inputs = task_def.get('inputs', [])
+        outputs = task_def.get('outputs', [])
+        params = task_def.get('params', {}).copy()
+        params['task_name'] = name
+        params['task_outputs'] = list(outputs)
+        tasks.append(TaskSpec(
+            name=name,
+            plugin=plugins.setdefault(task_def['plugin'], len(plugins)),
+            inputs=inputs,
+            outputs=outputs,
+            params=params,
+            requires_auth=task_def.get('requires_auth', False),
+            permissions=task_def.get('permissions', {}).get('required', []) if 'permissions' in task_def else [],
+            scoped_env=task_def.get('scoped_env'),
+            executor=task_def.get('executor'),
+            cache=task_def.get('cache'),
+            cache_ttl=task_def.get('cache_ttl'),
+        ))
+        for key in set(inputs):
+            consumers.setdefault(key, []).append(index)
+    options = {k: v for k, v in definition.items() if k != 'tasks'}
+    return WorkflowPlan(options, list(plugins), tasks, consumers)
+
+
+def plan_key(source: bytes) -> str:
+    """Cache key of a workflow file's plan: its content, the Chestra version and the plan format."""
+    digest = hashlib.sha256(f"{__version__}\0{PLAN_VERSION}\0".encode())
+    digest.update(source)
+    return digest.hexdigest()
+
+
+def load_plan(path: str, cache: bool = True, directory: Optional[str] = None) -> WorkflowPlan:
+    """
+    The compiled plan of a workflow file. Plans are cached on disk by plan_key(), so loading an
+    unchanged workflow again skips YAML parsing entirely.
+    Args:
+        path: The workflow YAML file.
+        cache: Read and write the plan cache.
+        directory: Where plans are kept (default: the `plans` directory in `cache_dir()`).
+    Returns:
+        The plan.
+    """
+    with open(path, 'rb') as f:
+        source = f.read()
+    if cache and directory is None:
+        base = cache_dir()
+        directory = os.path.join(base, "plans") if base else None
+    cache_path = os.path.join(directory, plan_key(source) + ".pickle") if cache and directory else None
+    if cache_path is not None:
+        plan = _read_plan(cache_path)
+        if plan is not None:
+            return plan
+    with _paused_gc():
+        plan = compile_workflow(load_yaml(source))
+    if cache_path is not None:
+        _write_plan(cache_path, plan)
+    return plan
+
+
+@contextmanager
+def _paused_gc() -> Iterator[None]:
+    # Building a plan allocates objects that all stay alive; collections triggered along the way
+    # only rescan them (most of the time spent unpickling a large plan)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _read_plan(cache_path: str) -> Optional[WorkflowPlan]:
+    try:
+        with open(cache_path, 'rb') as f, _paused_gc():
+            plan = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # A truncated or foreign file is recompiled and overwritten
+        logger.info("Ignoring unreadable workflow plan %s: %s", cache_path, e)
+        return None
+    if not isinstance(plan, WorkflowPlan):
+        return None
+    try:
+        # Touched on every use, so pruning removes the plans unused for longest
+        os.utime(cache_path)
+    except OSError:
+        pass
+    return plan
+
+
+def _write_plan(cache_path: str, plan: WorkflowPlan) -> None:
+    directory = os.path.dirname(cache_path)
+    tmp = None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(plan, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)
+    except (OSError, pickle.PicklingError) as e:
+        logger.info("Could not cache workflow plan %s: %s", cache_path, e)
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+        return
+    _prune(directory)
+
+
+def _prune(directory: str) -> None:
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".pickle")]
+        if len(entries) <= MAX_CACHED_PLANS:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - MAX_CACHED_PLANS]:
+            os.remove(entry.path)
+    except OSError as e:
+        logger.info("Could not prune workflow plans in %s: %s", directory, e)
@@ -0,0 +1,217 @@
+import ast
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from chestra.cache import cache_dir
+from chestra.log import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_VERSION = 2
+ENTRY_POINT_GROUP = "chestra.plugins"
+MANIFEST_VERSION = 1
+# Manifest of the built-in plugins shipped with the package; regenerate it with
+# `chestra manifest --builtin-only -o src/chestra/plugins/manifest.json`
+BUILTIN_MANIFEST = os.path.join(os.path.dirname(__file__), "plugins", "manifest.json")
+
+
+class PluginSpec(NamedTuple):
+    """Where a plugin lives, found without importing it."""
+    name: str
+    class_name: str
+    # Source file, for plugins loaded from a user plugins directory (None for installed modules)
+    path: Optional[str]
+    # Importable module name for built-in and entry point plugins; None for user plugin files
+    module: Optional[str]
+
+
+def plugin_class_name(modname: str) -> str:
+    """Convention: the plugin class of module my_plugin is <CamelCase>Plugin, i.e. MyPluginPlugin."""
+    return ''.join([part.capitalize() for part in modname.split('_')]) + 'Plugin'
+
+
+def is_plugin_file(fname: str) -> bool:
+    """Plugin modules are .py files that are neither private (_x.py) nor tests (test_x.py, x_test.py)."""
+    return (
+        fname.endswith('.py')
+        and not fname.startswith('_')
+        and not fname.startswith('test_')
+        and not fname.endswith('_test.py')
+    )
+
+
+class PluginIndex:
+    """
+    Name -> PluginSpec index of the plugin modules in a set of directories.
+
+    Whether a module defines its <CamelCase>Plugin class is read from its source with `ast`, so
+    building the index imports nothing. Results are cached on disk (in `cache_dir()`) per file and
+    reused while the file's mtime and size are unchanged. Installed `chestra.plugins` entry points
+    are cached the same way, keyed by the mtimes of the sys.path directories.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None) -> None:
+        if cache_path is None:
+            directory = cache_dir()
+            cache_path = os.path.join(directory, "plugin-index.json") if directory else None
+        self.cache_path = cache_path
+        self._cache: Dict[str, Any] = self._read_cache()
+        self._dirty = False
+
+    def scan(self, directory: str, package: Optional[str] = None) -> List[PluginSpec]:
+        """
+        Index the plugin modules in a directory.
+        Args:
+            directory: Directory to scan (not recursive).
+            package: Package the directory belongs to, for built-in plugins.
+        Returns:
+            One spec per module that defines its plugin class.
+        """
+        specs: List[PluginSpec] = []
+        try:
+            fnames = sorted(os.listdir(directory))
+        except OSError:
+            return specs
+        for fname in fnames:
+            if not is_plugin_file(fname):
+                continue
+            path = os.path.join(os.path.abspath(directory), fname)
+            name = fname[:-3]
+            class_name = plugin_class_name(name)
+            if self._defines(path, class_name):
+                specs.append(PluginSpec(name, class_name, path, f"{package}.{name}" if package else None))
+            else:
+                logger.warning("No plugin class %s found in %s", class_name, path)
+        return specs
+
+    def entry_points(self) -> List[PluginSpec]:
+        """Plugins installed by other distributions under the `chestra.plugins` entry point group."""
+        key = _sys_path_key()
+        cached = self._cache.get("entry_points")
+        if cached and cached["key"] == key:
+            return [PluginSpec(name, class_name, None, module) for name, module, class_name in cached["plugins"]]
+        plugins = []
+        for entry_point in _entry_points(ENTRY_POINT_GROUP):
+            module, _, attr = entry_point.value.partition(":")
+            plugins.append([entry_point.name, module.strip(), attr.strip() or plugin_class_name(entry_point.name)])
+        self._cache["entry_points"] = {"key": key, "plugins": plugins}
+        self._dirty = True
+        return [PluginSpec(name, class_name, None, module) for name, module, class_name in plugins]
+
+    def save(self) -> None:
+        """Write the cache back if anything changed (atomically, so concurrent runs never see half a file)."""
+        if not self._dirty or self.cache_path is None:
+            return
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.cache_path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": INDEX_VERSION, **self._cache}, f)
+            os.replace(tmp, self.cache_path)
+            self._dirty = False
+        except OSError as e:
+            logger.info("Could not write plugin index cache %s: %s", self.cache_path, e)
+
+    def _defines(self, path: str, class_name: str) -> bool:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        files: Dict[str, Dict[str, Any]] = self._cache.setdefault("files", {})
+        entry = files.get(path)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return class_name in entry["classes"]
+        classes = _top_level_classes(path)
+        files[path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "classes": classes}
+        self._dirty = True
+        return class_name in classes
+
+    def _read_cache(self) -> Dict[str, Any]:
+        if self.cache_path is None:
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.pop("version", None) != INDEX_VERSION:
+            return {}
+        return data
+
+
+def load_manifest(path: str) -> Optional[List[PluginSpec]]:
+    """
+    Read plugin locations from a manifest (JSON, or YAML for other extensions) without importing them.
+    Returns:
+        The specs, or None if the manifest is missing or unreadable.
+    """
+    try:
+        with open(path) as f:
+            if path.endswith(".json"):
+                data = json.load(f)
+            else:
+                import yaml
+                data = yaml.safe_load(f)
+    except Exception as e:
+        logger.info("Plugin manifest %s unavailable: %s", path, e)
+        return None
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return None
+    return [
+        PluginSpec(entry["name"], entry["class"], entry.get("path"), entry.get("module"))
+        for entry in data.get("plugins", [])
+    ]
+
+
+def _sys_path_key() -> List[List[Any]]:
+    # Installing or removing a distribution changes the mtime of its site directory
+    key: List[List[Any]] = []
+    for entry in sys.path:
+        try:
+            key.append([entry, os.stat(entry or ".").st_mtime_ns])
+        except OSError:
+            continue
+    return key
+
+
+def _entry_points(group: str) -> List[Any]:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        return []
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=group))
+    return list(eps.get(group, []))
+
+
+def _top_level_classes(path: str) -> List[str]:
+    """Names bound at module level that could be the plugin class (class statements, imports, assignments)."""
+    try:
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.warning("Cannot index plugin %s: %s", path, e)
+        return []
+    names: List[str] = []
+    _collect_names(tree.body, names)
+    return names
+
+
+def _collect_names(body: List[ast.stmt], names: List[str]) -> None:
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            names.append(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.extend((alias.asname or alias.name).split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.Assign):
+            names.extend(target.id for target in node.targets if isinstance(target, ast.Name))
+        elif isinstance(node, (ast.If, ast.Try, ast.With)):
+            # Conditionally defined classes (optional dependencies, platform checks)
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, ast.ExceptHandler):
+                    _collect_names(child.body, names)
+            for field in ("body", "orelse", "finalbody"):
+                _collect_names(getattr(node, field, []), names)
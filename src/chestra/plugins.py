@@ -1,9 +1,8 @@
-import os
 import subprocess
-import time
 from typing import Any, Dict
 
 from .orchestrator import TaskPlugin
+from .watch import get_watcher
 
 
 class StartPlugin(TaskPlugin):
@@ -38,17 +37,8 @@ class TouchedPlugin(TaskPlugin):
     def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
         file_path: str = params.get("file", "semaphore.txt")
         timeout: int = int(params.get("timeout", env.get("TIMEOUT", "100")))
-        initial_mtime: float = (
-            os.path.getmtime(file_path) if os.path.exists(file_path) else 0
-        )
-        end_time: float = time.time() + timeout
-        while time.time() < end_time:
-            current_mtime: float = (
-                os.path.getmtime(file_path) if os.path.exists(file_path) else 0
-            )
-            if current_mtime != initial_mtime:
-                return {"TRUE": "1"}
-            time.sleep(1)
+        if get_watcher().wait_for_change(file_path, timeout) is not None:
+            return {"TRUE": "1"}
         return {}
 
 class CmdPlugin(TaskPlugin):
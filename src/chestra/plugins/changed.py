@@ -1,41 +1,49 @@
-import logging
-import os
-import time
-from typing import Any, Dict
-
-from chestra.orchestrator import TaskPlugin
-
-logger = logging.getLogger("chestra.plugins.changed")
-handler = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s')
-handler.setFormatter(formatter)
-if not logger.hasHandlers():
-    logger.addHandler(handler)
-logger.setLevel(logging.INFO)
-
-class ChangedPlugin(TaskPlugin):
-    """Plugin that emits CHANGED=1 if a file is created or its contents/mtime change within timeout."""
+from typing import Any, Dict, Mapping
+
+from chestra.log import get_logger
+from chestra.orchestrator import SensorPlugin
+from chestra.sensors import FileTrigger, Trigger
+from chestra.template import render
+
+logger = get_logger(__name__)
+
+class ChangedPlugin(SensorPlugin):
+    """
+    Plugin that emits CHANGED=1 if a file is created or its contents/mtime change within timeout.
+
+    Parameters:
+        file: File to watch; may also be a directory or a file-name glob (e.g. incoming/*.csv),
+            in which case any matching file counts (default: semaphore.txt)
+        timeout: Seconds to wait (default: env TIMEOUT or 100)
+
+    Outputs:
+        CHANGED: "1" when a matching file changed
+        CHANGED_FILE: Path of the file that changed
+
+    This is a sensor: while it waits it holds no worker thread. Changes are picked up by the shared
+    file watcher (inotify on Linux, see chestra.watch) as soon as they happen.
+    """
     REQUIRES_AUTH: bool = False
-    def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
-        file_path: str = params.get("file", "semaphore.txt")
+    TEMPLATE_PARAMS: list[str] = ["file"]
+    LABEL = "Changed"
+    COLOR = "#14B8A6"
+    DESCRIPTION = "Monitor file changes"
+    OUTPUTS = ["CHANGED", "CHANGED_FILE"]
+    PARAMS = [
+        {"name": "file", "type": "string", "required": True},
+        {"name": "timeout", "type": "int", "default": 100},
+    ]
+
+    def trigger(self, env: Mapping[str, str], params: Dict[str, Any]) -> Trigger:
+        file_path: str = render(params.get("file", "semaphore.txt"), env)
         timeout: int = int(params.get("timeout", env.get("TIMEOUT", "100")))
-        exists = os.path.exists(file_path)
-        initial_mtime = os.path.getmtime(file_path) if exists else None
-        initial_size = os.path.getsize(file_path) if exists else None
-        end_time: float = time.time() + timeout
-        logger.info(f"Watching file {file_path} for creation or changes with timeout {timeout} seconds")
-        while time.time() < end_time:
-            now_exists = os.path.exists(file_path)
-            if not exists and now_exists:
-                logger.info(f"File {file_path} was created!")
-                return {"CHANGED": "1"}
-            if now_exists:
-                current_mtime = os.path.getmtime(file_path)
-                current_size = os.path.getsize(file_path)
-                if (initial_mtime is not None and current_mtime != initial_mtime) or \
-                   (initial_size is not None and current_size != initial_size):
-                    logger.info(f"File {file_path} was changed!")
-                    return {"CHANGED": "1"}
-            time.sleep(1)
-        logger.warning(f"Timeout reached without file {file_path} being created or changed")
-        return {}
+        logger.info("Watching file %s for creation or changes with timeout %s seconds", file_path, timeout)
+        return FileTrigger(file_path, timeout=timeout)
+
+    def on_event(self, env: Mapping[str, str], params: Dict[str, Any], event: Any) -> Dict[str, str]:
+        if event is None:
+            file_path: str = render(params.get("file", "semaphore.txt"), env)
+            logger.warning("Timeout reached without file %s being created or changed", file_path)
+            return {}
+        logger.info("File %s was created or changed!", event)
+        return {"CHANGED": "1", "CHANGED_FILE": event}
@@ -1,8 +1,18 @@
 import subprocess
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from chestra.log import get_logger
+from chestra.log import clip, get_logger
 from chestra.orchestrator import TaskPlugin
+from chestra.process import (
+    OutputSink,
+    RotatingLog,
+    echo_stdout,
+    run_buffered,
+    run_buffered_async,
+    run_streaming,
+    run_streaming_async,
+)
+from chestra.template import render
 
 logger = get_logger(__name__)
 
@@ -14,9 +24,72 @@ class CmdPlugin(TaskPlugin):
     - If the command outputs lines in the form VAR=value, these are parsed and returned as output variables.
     - These returned variables are then injected into Chestra's environment for use by subsequent tasks.
     - If no such lines are output, an empty dict is returned.
+    Variables are substituted into the command as `$task.VAR`, `${task.VAR}` or `${task.VAR:-default}`
+    (see chestra.template); unknown references such as shell variables are left as they are.
+
+    Parameters:
+        command: Shell command to run
+        timeout: Seconds before the command and every process it started are terminated
+        stream: Read output incrementally instead of buffering it (default: False). stdout is echoed
+            as it is produced, VAR=value lines are parsed on the fly and only the last tail_lines
+            lines are kept in memory, so commands may print any amount of output.
+        tail_lines: Lines of output kept (and logged when the command fails) in stream mode (default: 100)
+        log_file: Also write the full output to this file in stream mode, rotated by size
+        log_max_bytes: Size at which log_file is rotated (default: 10 MB)
+        log_backups: Rotated log files kept (default: 3)
     """
     REQUIRED_PERMISSIONS: list[str] = ["can_execute_commands"]
+    TEMPLATE_PARAMS: list[str] = ["command", "log_file"]
+    LABEL = "CMD"
+    COLOR = "#F59E0B"
+    DESCRIPTION = "Execute shell commands"
+    PARAMS = [
+        {"name": "command", "type": "string", "required": True},
+        {"name": "timeout", "type": "int"},
+        {"name": "stream", "type": "bool", "default": False},
+        {"name": "tail_lines", "type": "int", "default": 100},
+        {"name": "log_file", "type": "string"},
+        {"name": "log_max_bytes", "type": "int", "default": 10 * 1024 * 1024},
+        {"name": "log_backups", "type": "int", "default": 3},
+    ]
+
     def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        formatted_cmd = self._format_command(env, params)
+        if not formatted_cmd:
+            return {}
+        logger.info("About to run: %s", clip(formatted_cmd))
+        timeout = _timeout(params)
+        if params.get("stream", False):
+            sink = self._sink(env, params)
+            try:
+                returncode = run_streaming(formatted_cmd, sink, timeout=timeout)
+            finally:
+                self._close_sink(sink)
+            return self._collect_streamed(returncode, sink)
+        if timeout is not None:
+            return self._collect(*run_buffered(formatted_cmd, timeout=timeout))
+        result: subprocess.CompletedProcess[str] = subprocess.run(
+            formatted_cmd, shell=True, capture_output=True, text=True
+        )
+        return self._collect(result.returncode, result.stdout, result.stderr)
+
+    async def execute_async(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        """Run the command as an asyncio subprocess, so waiting on it holds no thread."""
+        formatted_cmd = self._format_command(env, params)
+        if not formatted_cmd:
+            return {}
+        logger.info("About to run: %s", clip(formatted_cmd))
+        timeout = _timeout(params)
+        if params.get("stream", False):
+            sink = self._sink(env, params)
+            try:
+                returncode = await run_streaming_async(formatted_cmd, sink, timeout=timeout)
+            finally:
+                self._close_sink(sink)
+            return self._collect_streamed(returncode, sink)
+        return self._collect(*await run_buffered_async(formatted_cmd, timeout=timeout))
+
+    def _format_command(self, env: Dict[str, str], params: Dict[str, Any]) -> str:
         perms: Dict[str, Any] = env.get("_permissions", {})
         if perms and not perms.get("can_execute_commands", False):
             logger.error("Command execution not allowed by permissions")
@@ -24,29 +97,53 @@ class CmdPlugin(TaskPlugin):
         command: str = params.get("command", "")
         if not command:
             logger.warning("No command provided to CmdPlugin")
-            return {}
-        formatted_cmd: str = command
-        for var, value in env.items():
-            formatted_cmd = formatted_cmd.replace(f"${var}", value)
-        logger.info(f"About to run: {formatted_cmd}")
-        result: subprocess.CompletedProcess[str] = subprocess.run(
-            formatted_cmd, shell=True, capture_output=True, text=True
-        )
-        logger.info(f"Command returncode: {result.returncode}")
-        logger.info(f"Command stdout: {result.stdout!r}")
-        logger.info(f"Command stderr: {result.stderr!r}")
-        print(result.stdout, end="")  # Print command output to stdout
+            return ""
+        return render(command, env)
+
+    def _sink(self, env: Dict[str, str], params: Dict[str, Any]) -> OutputSink:
+        log: Optional[RotatingLog] = None
+        if params.get("log_file"):
+            log = RotatingLog(
+                render(params["log_file"], env),
+                max_bytes=int(params.get("log_max_bytes", 10 * 1024 * 1024)),
+                backups=int(params.get("log_backups", 3)),
+            )
+        return OutputSink(tail_lines=int(params.get("tail_lines", 100)), log=log, echo=echo_stdout)
+
+    def _close_sink(self, sink: OutputSink) -> None:
+        if sink.log is not None:
+            sink.log.close()
+
+    def _collect_streamed(self, returncode: int, sink: OutputSink) -> Dict[str, str]:
+        logger.info("Command returncode: %s (%s bytes of output)", returncode, sink.bytes_seen)
+        if returncode != 0 and sink.tail:
+            tail = "\n".join(sink.tail)
+            logger.warning("Command output (last %s lines):\n%s", len(sink.tail), clip(tail))
+        if sink.variables:
+            logger.info("CmdPlugin output vars: %s", clip(sink.variables))
+        return dict(sink.variables)
+
+    def _collect(self, returncode: int, stdout: str, stderr: str) -> Dict[str, str]:
+        logger.info("Command returncode: %s", returncode)
+        logger.info("Command stdout: %r", clip(stdout))
+        logger.info("Command stderr: %r", clip(stderr))
+        print(stdout, end="")  # Print command output to stdout
         output_vars: Dict[str, str] = {}
         # Parse VAR=value from stdout
-        for line in result.stdout.splitlines():
+        for line in stdout.splitlines():
             if "=" in line:
                 var, value = line.split("=", 1)
                 output_vars[var.strip()] = value.strip()
         # Also parse VAR=value from stderr (for hidden output variables)
-        for line in result.stderr.splitlines():
+        for line in stderr.splitlines():
             if "=" in line:
                 var, value = line.split("=", 1)
                 output_vars[var.strip()] = value.strip()
         if output_vars:
-            logger.info(f"CmdPlugin output vars: {output_vars}")
+            logger.info("CmdPlugin output vars: %s", clip(output_vars))
         return output_vars
+
+
+def _timeout(params: Dict[str, Any]) -> Optional[float]:
+    timeout = params.get("timeout")
+    return None if timeout is None else float(timeout)
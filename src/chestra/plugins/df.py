@@ -7,6 +7,13 @@ from chestra.orchestrator import TaskPlugin
 class DfPlugin(TaskPlugin):
     """Plugin that emits main disk volume and free space. Requires permission if present in env."""
     REQUIRED_PERMISSIONS: list[str] = ["can_view_system"]
+    # Free space changes between runs
+    CACHEABLE = False
+    LABEL = "DF"
+    COLOR = "#8B5CF6"
+    DESCRIPTION = "Get disk space info"
+    OUTPUTS = ["MAIN_VOLUME", "FREE_SPACE"]
+
     def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
         perms: Dict[str, Any] = env.get("_permissions", {})
         if perms and not perms.get("can_view_system", False):
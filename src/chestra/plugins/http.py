@@ -1,10 +1,38 @@
-from typing import Any, Dict
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from chestra import metrics
 from chestra.log import get_logger
 from chestra.orchestrator import TaskPlugin
+from chestra.template import render_value
+
+try:
+    import httpx
+except ImportError:  # Optional: only needed for native async requests
+    httpx = None
 
 logger = get_logger(__name__)
 
+CHUNK_SIZE: int = 64 * 1024
+
+REQUEST_LATENCY = metrics.histogram(
+    "chestra_http_request_duration_seconds",
+    "Time until the response headers arrived, by method and status code ('error' if there was no response)",
+    ["method", "status"],
+)
+
 
 class HttpPlugin(TaskPlugin):
     """
@@ -21,6 +49,22 @@ class HttpPlugin(TaskPlugin):
         timeout: Request timeout in seconds (default: 30)
         verify: Whether to verify SSL certificates (default: True)
         allow_redirects: Whether to follow redirects (default: True)
+        pool_size: Max pooled connections kept per host (default: 10)
+        keep_alive: Reuse connections between requests (default: True)
+        retries: Number of retries for connection errors and retry_statuses (default: 0)
+        backoff_factor: Exponential backoff factor between retries, in seconds (default: 0)
+        retry_statuses: Status codes that trigger a retry (default: [502, 503, 504])
+        stream: Write the body to a spool file instead of memory (default: False)
+        stream_to: Path to stream the body to (implies stream)
+        spool_dir: Directory for spool files when stream is set (default: system temp dir)
+        max_bytes: Fail if an in-memory body is larger than this many bytes
+
+    url, headers, data and json may reference env variables as `$task.VAR`, `${task.VAR}` or
+    `${task.VAR:-default}` (see chestra.template).
+
+    Requests to the same host share a pooled requests.Session for the lifetime of the
+    orchestrator run, so repeated calls skip the TCP/TLS handshake. Sessions are closed
+    by close() when the run finishes.
 
     Outputs:
         status_code: HTTP status code of the response
@@ -28,6 +72,11 @@ class HttpPlugin(TaskPlugin):
         headers: Response headers as a dictionary
         json_data: Parsed JSON response (if response is JSON)
         url: Final URL after any redirects
+        body_path: File holding the body (stream mode, replaces data)
+        body_size: Size of the streamed body in bytes (stream mode)
+
+    Inside a workflow only the declared outputs are built, so the body is only parsed as JSON
+    when json_data is declared.
     """
 
     # Set to True if this plugin requires authentication
@@ -36,6 +85,79 @@ class HttpPlugin(TaskPlugin):
     # List of required permissions (if REQUIRES_AUTH is True)
     REQUIRED_PERMISSIONS: list[str] = []
 
+    TEMPLATE_PARAMS: list[str] = ["url", "headers", "data", "json"]
+
+    LABEL = "HTTP"
+    COLOR = "#3B82F6"
+    DESCRIPTION = "Make HTTP requests"
+    OUTPUTS = ["status_code", "data", "headers", "json_data", "url", "body_path", "body_size"]
+    PARAMS = [
+        {"name": "url", "type": "string", "required": True},
+        {"name": "method", "type": "string", "default": "GET"},
+        {"name": "headers", "type": "map"},
+        {"name": "data", "type": "string"},
+        {"name": "json", "type": "map"},
+        {"name": "timeout", "type": "int", "default": 30},
+        {"name": "verify", "type": "bool", "default": True},
+        {"name": "allow_redirects", "type": "bool", "default": True},
+        {"name": "pool_size", "type": "int", "default": 10},
+        {"name": "keep_alive", "type": "bool", "default": True},
+        {"name": "retries", "type": "int", "default": 0},
+        {"name": "backoff_factor", "type": "float", "default": 0},
+        {"name": "retry_statuses", "type": "list", "default": [502, 503, 504]},
+        {"name": "stream", "type": "bool", "default": False},
+        {"name": "stream_to", "type": "string"},
+        {"name": "spool_dir", "type": "string"},
+        {"name": "max_bytes", "type": "int"},
+    ]
+
+    def __init__(self) -> None:
+        self._sessions: Dict[Tuple[Any, ...], requests.Session] = {}
+        self._sessions_lock = threading.Lock()
+        self._async_clients: Dict[Tuple[Any, ...], Any] = {}
+
+    def close(self) -> None:
+        """Close every pooled session (and its keep-alive connections)."""
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    async def aclose(self) -> None:
+        """Close pooled httpx clients, then the requests sessions."""
+        clients = list(self._async_clients.values())
+        self._async_clients.clear()
+        for client in clients:
+            await client.aclose()
+        self.close()
+
+    def _session(self, url: str, params: Dict[str, Any]) -> requests.Session:
+        """Return the shared session for the URL's host and pool settings, creating it on first use."""
+        parts = urlsplit(url)
+        pool_size = int(params.get("pool_size", 10))
+        retries = int(params.get("retries", 0))
+        backoff_factor = float(params.get("backoff_factor", 0))
+        retry_statuses = tuple(params.get("retry_statuses", (502, 503, 504)))
+        key = (parts.scheme, parts.netloc, pool_size, retries, backoff_factor, retry_statuses)
+        with self._sessions_lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=pool_size,
+                    max_retries=Retry(
+                        total=retries,
+                        backoff_factor=backoff_factor,
+                        status_forcelist=retry_statuses,
+                        raise_on_status=False,
+                    ),
+                )
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[key] = session
+        return session
+
     def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
         """
         Execute the plugin logic.
@@ -48,16 +170,193 @@ class HttpPlugin(TaskPlugin):
             Dictionary of output variables that will be available to subsequent tasks
         """
         logger.info("Executing HTTP plugin")
+        method, url, request_kwargs = self._prepare(env, params)
+        max_bytes = params.get("max_bytes")
+        with self._spool(params) as stream_to:
+            try:
+                logger.info("Making %s request to %s", method, url)
+                if not params.get("keep_alive", True):
+                    request_kwargs["headers"] = {**request_kwargs.get("headers", {}), "Connection": "close"}
+                streaming = stream_to is not None or max_bytes is not None
+                started = time.perf_counter()
+                try:
+                    response = self._session(url, params).request(method, url, stream=streaming, **request_kwargs)
+                except requests.exceptions.RequestException:
+                    REQUEST_LATENCY.labels(method, "error").observe(time.perf_counter() - started)
+                    raise
+                REQUEST_LATENCY.labels(method, response.status_code).observe(time.perf_counter() - started)
+                try:
+                    response.raise_for_status()
+                    if stream_to is not None:
+                        size = self._write_body(response.iter_content(CHUNK_SIZE), stream_to)
+                        return self._outputs(response.status_code, response.url, response.headers, params,
+                                             body_path=stream_to, body_size=size)
+                    if max_bytes is not None:
+                        _check_length(response.headers, int(max_bytes))
+                        body = _read_capped(response.iter_content(CHUNK_SIZE), int(max_bytes))
+                        text = body.decode(response.encoding or "utf-8", errors="replace")
+                        return self._outputs(response.status_code, response.url, response.headers, params,
+                                             text=text, parse_json=lambda: json.loads(text))
+                    return self._outputs(response.status_code, response.url, response.headers, params,
+                                         text=response.text, parse_json=response.json)
+                finally:
+                    if streaming:
+                        response.close()
+
+            except requests.exceptions.RequestException as e:
+                logger.error("HTTP request failed: %s", e)
+                raise RuntimeError(f"HTTP request failed: {e}")
+
+    async def execute_async(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Make the request on the event loop with httpx when it is installed (`pip install chestra[async]`).
+        Without httpx the blocking requests implementation runs on the loop's executor instead.
+        """
+        if httpx is None:
+            return await super().execute_async(env, params)
+        logger.info("Executing HTTP plugin (async)")
+        method, url, request_kwargs = self._prepare(env, params)
+        max_bytes = params.get("max_bytes")
+        verify = request_kwargs.pop("verify")
+        request_kwargs["follow_redirects"] = request_kwargs.pop("allow_redirects")
+        if "data" in request_kwargs and isinstance(request_kwargs["data"], (str, bytes)):
+            request_kwargs["content"] = request_kwargs.pop("data")
+        if not params.get("keep_alive", True):
+            request_kwargs["headers"] = {**request_kwargs.get("headers", {}), "Connection": "close"}
+
+        with self._spool(params) as stream_to:
+            try:
+                logger.info("Making %s request to %s", method, url)
+                client = self._async_client(verify, params)
+                response = await self._send_async(client, method, url, request_kwargs, params)
+                try:
+                    response.raise_for_status()
+                    final_url = str(response.url)
+                    if stream_to is not None:
+                        size = 0
+                        with open(stream_to, "wb") as f:
+                            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                                f.write(chunk)
+                                size += len(chunk)
+                        return self._outputs(response.status_code, final_url, response.headers, params,
+                                             body_path=stream_to, body_size=size)
+                    if max_bytes is not None:
+                        _check_length(response.headers, int(max_bytes))
+                        body = bytearray()
+                        async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                            body += chunk
+                            if len(body) > int(max_bytes):
+                                raise RuntimeError(f"Response body exceeds max_bytes ({max_bytes}); use stream: true")
+                    else:
+                        body = await response.aread()
+                    text = body.decode(response.encoding or "utf-8", errors="replace")
+                    return self._outputs(response.status_code, final_url, response.headers, params,
+                                         text=text, parse_json=lambda: json.loads(text))
+                finally:
+                    await response.aclose()
+
+            except httpx.HTTPError as e:
+                logger.error("HTTP request failed: %s", e)
+                raise RuntimeError(f"HTTP request failed: {e}")
+
+    async def _send_async(
+        self,
+        client: "httpx.AsyncClient",
+        method: str,
+        url: str,
+        request_kwargs: Dict[str, Any],
+        params: Dict[str, Any],
+    ) -> "httpx.Response":
+        """
+        Send the request and return the response with its body still unread. A response with one of
+        the retry_statuses is retried up to `retries` times with the backoff the requests adapter's
+        Retry uses (none before the first retry, then backoff_factor * 2 ** n); connection errors are
+        retried by the transport.
+        """
+        retries = int(params.get("retries", 0))
+        backoff_factor = float(params.get("backoff_factor", 0))
+        retry_statuses = tuple(params.get("retry_statuses", (502, 503, 504)))
+        follow_redirects = request_kwargs.pop("follow_redirects")
+        request = client.build_request(method, url, **request_kwargs)
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await client.send(request, stream=True, follow_redirects=follow_redirects)
+            except httpx.HTTPError:
+                # No response arrived
+                REQUEST_LATENCY.labels(method, "error").observe(time.perf_counter() - started)
+                raise
+            REQUEST_LATENCY.labels(method, response.status_code).observe(time.perf_counter() - started)
+            if attempt == retries or response.status_code not in retry_statuses:
+                return response
+            await response.aclose()
+            delay = min(Retry.DEFAULT_BACKOFF_MAX, backoff_factor * 2 ** attempt) if attempt else 0
+            logger.info("Retrying %s %s in %ss after status %s", method, url, delay, response.status_code)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _stream_target(self, params: Dict[str, Any]) -> Optional[str]:
+        """Path the body should be streamed to, or None to read it into memory."""
+        if params.get("stream_to"):
+            return params["stream_to"]
+        if not params.get("stream", False):
+            return None
+        prefix = f"chestra-{params.get('task_name', 'http')}-"
+        fd, path = tempfile.mkstemp(prefix=prefix, suffix=".body", dir=params.get("spool_dir"))
+        os.close(fd)
+        return path
+
+    @contextmanager
+    def _spool(self, params: Dict[str, Any]) -> Iterator[Optional[str]]:
+        """
+        The _stream_target() for one request. A spool file created for it is removed again if
+        the request fails, so only bodies that were returned are left on disk.
+        """
+        path = self._stream_target(params)
+        try:
+            yield path
+        except BaseException:
+            if path is not None and not params.get("stream_to"):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            raise
+
+    def _write_body(self, chunks: Iterable[bytes], path: str) -> int:
+        size = 0
+        with open(path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        return size
 
+    def _async_client(self, verify: Any, params: Dict[str, Any]) -> "httpx.AsyncClient":
+        """Return the pooled httpx client for this event loop and settings, creating it on first use."""
+        pool_size = int(params.get("pool_size", 10))
+        retries = int(params.get("retries", 0))
+        key = (id(asyncio.get_running_loop()), verify, pool_size, retries)
+        client = self._async_clients.get(key)
+        if client is None:
+            limits = httpx.Limits(max_keepalive_connections=pool_size)
+            client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(verify=verify, retries=retries, limits=limits),
+            )
+            self._async_clients[key] = client
+        return client
+
+    def _prepare(self, env: Mapping[str, Any], params: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any]]:
         # Extract parameters
         url = params.get("url")
         if not url:
             raise ValueError("URL parameter is required")
+        url = render_value(url, env)
 
         method = params.get("method", "GET").upper()
-        headers = params.get("headers", {})
-        data = params.get("data")
-        json_data = params.get("json")
+        headers = render_value(params.get("headers", {}), env)
+        data = render_value(params.get("data"), env)
+        json_data = render_value(params.get("json"), env)
         timeout = params.get("timeout", 30)
         verify = params.get("verify", True)
         allow_redirects = params.get("allow_redirects", True)
@@ -78,33 +377,70 @@ class HttpPlugin(TaskPlugin):
         if json_data is not None:
             request_kwargs["json"] = json_data
 
-        try:
-            logger.info(f"Making {method} request to {url}")
-            response = requests.request(method, url, **request_kwargs)
-            response.raise_for_status()
-
-            # Prepare outputs
-            outputs = {
-                "status_code": str(response.status_code),
-                "data": response.text,
-                "url": response.url,
-            }
-
-            # Add headers as a formatted string
-            headers_str = "\n".join([f"{k}: {v}" for k, v in response.headers.items()])
-            outputs["headers"] = headers_str
-
-            # Try to parse JSON response
+        return method, url, request_kwargs
+
+    def _outputs(
+        self,
+        status_code: int,
+        url: str,
+        headers: Mapping[str, str],
+        params: Dict[str, Any],
+        text: Optional[str] = None,
+        parse_json: Optional[Callable[[], Any]] = None,
+        body_path: Optional[str] = None,
+        body_size: int = 0,
+    ) -> Dict[str, str]:
+        # Only build the outputs the task declares; all of them when called outside a workflow
+        wanted: Optional[List[str]] = params.get("task_outputs")
+
+        def want(name: str) -> bool:
+            return wanted is None or name in wanted
+
+        # Prepare outputs
+        outputs = {
+            "status_code": str(status_code),
+            "url": str(url),
+        }
+
+        # Add headers as a formatted string
+        if want("headers"):
+            outputs["headers"] = "\n".join([f"{k}: {v}" for k, v in headers.items()])
+
+        if body_path is not None:
+            outputs["body_path"] = body_path
+            outputs["body_size"] = str(body_size)
+            parse_json = partial(_load_json_file, body_path)
+        elif want("data"):
+            outputs["data"] = text
+
+        # Try to parse JSON response
+        if want("json_data"):
             try:
-                json_response = response.json()
-                import json
-                outputs["json_data"] = json.dumps(json_response)
+                outputs["json_data"] = json.dumps(parse_json())
             except (ValueError, TypeError):
                 outputs["json_data"] = ""
 
-            logger.info(f"HTTP request successful: {response.status_code}")
-            return outputs
+        logger.info("HTTP request successful: %s", status_code)
+        return outputs
+
+
+def _load_json_file(path: str) -> Any:
+    with open(path, "rb") as f:
+        return json.load(f)
+
+
+def _check_length(headers: Mapping[str, str], max_bytes: int) -> None:
+    """Fail fast when the server announces a body larger than max_bytes."""
+    length = headers.get("Content-Length")
+    if length is not None and length.isdigit() and int(length) > max_bytes:
+        raise RuntimeError(f"Response body of {length} bytes exceeds max_bytes ({max_bytes}); use stream: true")
+
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"HTTP request failed: {e}")
-            raise RuntimeError(f"HTTP request failed: {e}") 
\ No newline at end of file
+def _read_capped(chunks: Iterable[bytes], max_bytes: int) -> bytes:
+    """Join chunks into one body, failing as soon as it grows past max_bytes."""
+    body = bytearray()
+    for chunk in chunks:
+        body += chunk
+        if len(body) > max_bytes:
+            raise RuntimeError(f"Response body exceeds max_bytes ({max_bytes}); use stream: true")
+    return bytes(body)
@@ -5,5 +5,10 @@ from chestra.orchestrator import TaskPlugin
 
 class StartPlugin(TaskPlugin):
     """Plugin that emits TRUE to start the workflow."""
+    LABEL = "Start"
+    COLOR = "#10B981"
+    DESCRIPTION = "Workflow initialization"
+    OUTPUTS = ["TRUE"]
+
     def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
         return {"TRUE": "1"}
@@ -0,0 +1,260 @@
+import asyncio
+import os
+import signal
+import subprocess
+import threading
+from collections import deque
+from typing import IO, Callable, Deque, Dict, Optional, Set, Tuple
+
+CHUNK_SIZE: int = 64 * 1024
+# Longest line kept whole; longer lines are split and never parsed as VAR=value
+MAX_LINE: int = 64 * 1024
+# Seconds between SIGTERM and SIGKILL when a timed-out command's process group is stopped
+KILL_GRACE: float = 2.0
+
+
+class RotatingLog:
+    """
+    Append-only log file rotated by size: `path` -> `path.1` -> ... -> `path.<backups>`.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 3) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file: IO[bytes] = open(path, "ab")
+        self._size = self._file.tell()
+
+    def write(self, data: bytes) -> None:
+        if self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._size += len(data)
+
+    def _rotate(self) -> None:
+        self._file.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+            self._file = open(self.path, "ab")
+        else:
+            self._file = open(self.path, "wb")
+        self._size = 0
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class OutputSink:
+    """
+    Consumes a command's stdout/stderr chunk by chunk as they arrive.
+
+    Complete `VAR=value` lines are collected as output variables (a later assignment wins), every
+    line is kept in a bounded ring buffer (`tail`) and optionally teed to a RotatingLog, and stdout
+    is echoed to `echo` as it is produced. Memory use is bounded by `tail_lines` and MAX_LINE,
+    whatever the command prints.
+    """
+    variables: Dict[str, str]
+    tail: Deque[str]
+    bytes_seen: int
+    log: Optional[RotatingLog]
+
+    def __init__(
+        self,
+        tail_lines: int = 100,
+        log: Optional[RotatingLog] = None,
+        echo: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.variables = {}
+        self.tail = deque(maxlen=tail_lines)
+        self.bytes_seen = 0
+        self.log = log
+        self._echo = echo
+        self._pending: Dict[str, bytearray] = {}
+        # Streams whose current line was already split because it exceeded MAX_LINE
+        self._split: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def feed(self, stream: str, chunk: bytes) -> None:
+        """Add a chunk read from `stream` ("stdout" or "stderr")."""
+        with self._lock:
+            self.bytes_seen += len(chunk)
+            if self.log is not None:
+                self.log.write(chunk)
+            buffer = self._pending.setdefault(stream, bytearray())
+            buffer += chunk
+            start = 0
+            while True:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    break
+                self._line(stream, bytes(buffer[start:end]), whole=stream not in self._split)
+                self._split.discard(stream)
+                start = end + 1
+            del buffer[:start]
+            if len(buffer) > MAX_LINE:
+                self._line(stream, bytes(buffer), whole=False)
+                self._split.add(stream)
+                buffer.clear()
+
+    def close(self) -> None:
+        """Flush unterminated final lines."""
+        with self._lock:
+            for stream, buffer in self._pending.items():
+                if buffer:
+                    self._line(stream, bytes(buffer), whole=stream not in self._split)
+                    buffer.clear()
+
+    def _line(self, stream: str, raw: bytes, whole: bool) -> None:
+        line = raw.decode("utf-8", errors="replace").rstrip("\r")
+        self.tail.append(line)
+        if self._echo is not None and stream == "stdout":
+            self._echo(line)
+        if whole and "=" in line:
+            var, value = line.split("=", 1)
+            self.variables[var.strip()] = value.strip()
+
+
+def _popen_group_kwargs() -> Dict[str, bool]:
+    # A new session makes the shell the leader of its own process group, so a timeout can stop the
+    # whole pipeline and not only the shell
+    return {"start_new_session": True} if hasattr(os, "killpg") else {}
+
+
+def _signal_group(pid: int, sig: int) -> None:
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(pid, sig)
+        else:
+            os.kill(pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_streaming(command: str, sink: OutputSink, timeout: Optional[float] = None) -> int:
+    """
+    Run a shell command, feeding its output to `sink` while it runs.
+    Args:
+        command: Shell command line.
+        sink: Receives stdout and stderr chunks.
+        timeout: Seconds before the command's process group is terminated.
+    Returns:
+        The command's exit code.
+    Raises:
+        TimeoutError: If the command did not finish within `timeout`.
+    """
+    process = subprocess.Popen(
+        command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **_popen_group_kwargs()
+    )
+    readers = [
+        threading.Thread(target=_pump, args=(process.stdout, "stdout", sink), daemon=True),
+        threading.Thread(target=_pump, args=(process.stderr, "stderr", sink), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        terminate_group(process)
+        raise TimeoutError(f"Command timed out after {timeout}s")
+    finally:
+        for reader in readers:
+            reader.join()
+        sink.close()
+    return process.returncode
+
+
+def _pump(pipe: IO[bytes], stream: str, sink: OutputSink) -> None:
+    with pipe:
+        read = getattr(pipe, "read1", pipe.read)
+        while True:
+            chunk = read(CHUNK_SIZE)
+            if not chunk:
+                return
+            sink.feed(stream, chunk)
+
+
+def terminate_group(process: subprocess.Popen) -> None:
+    """SIGTERM the process group, then SIGKILL it if it is still running after KILL_GRACE seconds."""
+    _signal_group(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        _signal_group(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+def run_buffered(command: str, timeout: Optional[float] = None) -> Tuple[int, str, str]:
+    """
+    Run a shell command and capture its whole output in memory.
+    Returns:
+        (exit code, stdout, stderr).
+    Raises:
+        TimeoutError: If the command did not finish within `timeout`.
+    """
+    process = subprocess.Popen(
+        command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **_popen_group_kwargs()
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        terminate_group(process)
+        process.communicate()
+        raise TimeoutError(f"Command timed out after {timeout}s")
+    return process.returncode, stdout, stderr
+
+
+async def run_streaming_async(command: str, sink: OutputSink, timeout: Optional[float] = None) -> int:
+    """run_streaming() on the event loop: output is read by coroutines instead of threads."""
+    process = await asyncio.create_subprocess_shell(
+        command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **_popen_group_kwargs()
+    )
+
+    async def pump(reader: asyncio.StreamReader, stream: str) -> None:
+        while True:
+            chunk = await reader.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            sink.feed(stream, chunk)
+
+    pumps = asyncio.gather(pump(process.stdout, "stdout"), pump(process.stderr, "stderr"), process.wait())
+    try:
+        await asyncio.wait_for(asyncio.shield(pumps), timeout)
+    except asyncio.TimeoutError:
+        await _terminate_group_async(process)
+        await pumps
+        raise TimeoutError(f"Command timed out after {timeout}s")
+    finally:
+        sink.close()
+    return process.returncode
+
+
+async def run_buffered_async(command: str, timeout: Optional[float] = None) -> Tuple[int, str, str]:
+    """run_buffered() as an asyncio subprocess."""
+    process = await asyncio.create_subprocess_shell(
+        command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        **(_popen_group_kwargs() if timeout is not None else {})
+    )
+    communicate = asyncio.ensure_future(process.communicate())
+    try:
+        stdout, stderr = await asyncio.wait_for(asyncio.shield(communicate), timeout)
+    except asyncio.TimeoutError:
+        await _terminate_group_async(process)
+        await communicate
+        raise TimeoutError(f"Command timed out after {timeout}s")
+    return process.returncode, stdout.decode(), stderr.decode()
+
+
+async def _terminate_group_async(process: asyncio.subprocess.Process) -> None:
+    _signal_group(process.pid, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(process.wait(), KILL_GRACE)
+    except asyncio.TimeoutError:
+        _signal_group(process.pid, signal.SIGKILL)
+        await process.wait()
+
+
+def echo_stdout(line: str) -> None:
+    print(line, flush=True)
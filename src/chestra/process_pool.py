@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from chestra import log
+from chestra.log import get_logger
+from chestra.plugin_index import PluginSpec
+
+if TYPE_CHECKING:
+    from chestra.orchestrator import PluginManager
+
+logger = get_logger(__name__)
+
+THREAD_EXECUTOR = "thread"
+PROCESS_EXECUTOR = "process"
+EXECUTORS = (THREAD_EXECUTOR, PROCESS_EXECUTOR)
+
+# The static part of a process task: plugin name, params and declared outputs
+TaskEntry = Tuple[str, Dict[str, Any], List[str]]
+# What a worker sends back: the declared outputs, then its pid, thread id and wall-clock start and
+# end (ns) of the plugin call, for tracing
+TaskResult = Tuple[Dict[str, str], int, int, int, int]
+
+# Worker process state, set up once per worker by _init_worker()
+_manager: Optional["PluginManager"] = None
+_tasks: Dict[str, TaskEntry] = {}
+
+
+class ProcessTaskPool:
+    """
+    Runs TaskPlugin.execute for `executor: process` tasks in worker processes, so CPU-bound
+    Python plugins run in parallel instead of taking turns on the GIL.
+
+    Workers are forked from a forkserver that already has Chestra imported, and each worker imports
+    the plugins of the process tasks as it starts; warm() starts them all ahead of the first task.
+    Each task's plugin, params and outputs are handed to a worker once, when it starts, so a call
+    only ships the task name and a plain dict of the env the task may see, and only the declared
+    outputs are sent back.
+    """
+
+    def __init__(
+        self, specs: Dict[str, PluginSpec], tasks: Dict[str, TaskEntry], workers: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            specs: Where each plugin the tasks use lives (see PluginManager.specs).
+            tasks: Task name -> (plugin name, params, declared outputs) for every process task.
+            workers: Number of worker processes (default: the CPU count).
+        """
+        # Imported here, like multiprocessing below: most workflows never start a pool
+        from concurrent.futures import ProcessPoolExecutor
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=_context(),
+            initializer=_init_worker,
+            initargs=(specs, tasks, log.settings()),
+        )
+
+    def warm(self) -> None:
+        """Start the worker processes now rather than when the first tasks arrive."""
+        for _ in range(self.workers):
+            self._executor.submit(_ping)
+
+    def submit(self, task_name: str, env: Dict[str, str]) -> Future:
+        """
+        Execute a task's plugin in a worker.
+        Returns:
+            A Future resolved with a TaskResult.
+        """
+        return self._executor.submit(_execute, task_name, env)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+def _context() -> Any:
+    import multiprocessing
+    # Forking the (multi-threaded) orchestrator itself is unsafe; a forkserver is a clean,
+    # single-threaded parent that has paid for the imports once
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(["chestra.orchestrator"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _init_worker(
+    specs: Dict[str, PluginSpec], tasks: Dict[str, TaskEntry], log_settings: Optional[Dict[str, Any]] = None
+) -> None:
+    global _manager, _tasks
+    import multiprocessing.util
+
+    if log_settings is not None:
+        log.configure(**log_settings)
+
+    from chestra.orchestrator import PluginManager
+    _manager = PluginManager()
+    _manager.specs.update(specs)
+    _tasks = tasks
+    for plugin_name in sorted({plugin_name for plugin_name, _, _ in tasks.values()}):
+        _manager.get_plugin_class(plugin_name)
+    multiprocessing.util.Finalize(None, _manager.close, exitpriority=10)
+    # Workers end without running atexit handlers; write out their queued log records
+    multiprocessing.util.Finalize(None, log.shutdown, exitpriority=0)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _execute(task_name: str, env: Dict[str, str]) -> TaskResult:
+    plugin_name, params, outputs = _tasks[task_name]
+    plugin = _manager.acquire(plugin_name, task_name)
+    started = time.time_ns()
+    try:
+        result: Dict[str, str] = plugin.execute(env, params)
+    finally:
+        ended = time.time_ns()
+        _manager.release(plugin_name, plugin)
+    declared = {k: v for k, v in result.items() if k in outputs}
+    return declared, os.getpid(), threading.get_native_id(), started, ended
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Type
+
+from chestra.cache import cache_dir
+from chestra.log import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_BYTES: int = 256 * 1024 * 1024
+# Eviction trims the store to this fraction of max_bytes, so it does not run on every insert
+EVICT_TO: float = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    outputs TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+_versions: Dict[Type[Any], str] = {}
+_versions_lock = threading.Lock()
+
+
+def plugin_version(plugin_class: Type[Any]) -> str:
+    """
+    The plugin's declared VERSION, or else a hash of its module's source, so editing a plugin
+    invalidates the results it cached.
+    """
+    version = getattr(plugin_class, "VERSION", None)
+    if version is not None:
+        return str(version)
+    with _versions_lock:
+        if plugin_class not in _versions:
+            import inspect
+            try:
+                with open(inspect.getfile(plugin_class), "rb") as f:
+                    _versions[plugin_class] = hashlib.sha256(f.read()).hexdigest()[:16]
+            except (OSError, TypeError):
+                _versions[plugin_class] = f"{plugin_class.__module__}.{plugin_class.__qualname__}"
+        return _versions[plugin_class]
+
+
+def task_key(plugin_name: str, version: str, params: Dict[str, Any], inputs: Dict[str, str]) -> str:
+    """
+    Content address of a task run.
+    Args:
+        plugin_name: Name the task's plugin is registered under.
+        version: See plugin_version().
+        params: The task's params, with templated params already rendered.
+        inputs: Values of the task's declared inputs.
+    Returns:
+        A hex SHA-256 digest.
+    """
+    payload = json.dumps([plugin_name, version, params, inputs], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Task outputs stored in SQLite by task_key(), so re-running a workflow skips the tasks whose
+    plugin, params and input values are unchanged.
+
+    Entries may carry a TTL on lookup; once the stored outputs exceed `max_bytes` the least
+    recently used entries are evicted. The store is shared by concurrent runs (SQLite WAL mode).
+    """
+    hits: int
+    misses: int
+    stores: int
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Args:
+            path: SQLite file (default: results.sqlite in `cache_dir()`; in memory if that is unavailable).
+            max_bytes: Size budget for stored outputs.
+        """
+        # sqlite3 is only imported by runs that use the cache
+        import sqlite3
+        if path is None:
+            directory = cache_dir()
+            path = os.path.join(directory, "results.sqlite") if directory else ":memory:"
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Dict[str, str]]:
+        """
+        Look up a task's outputs.
+        Args:
+            key: See task_key().
+            ttl: Ignore entries stored more than this many seconds ago.
+        Returns:
+            The stored outputs, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT outputs, created FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None or (ttl is not None and row[1] + ttl < now):
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, outputs: Dict[str, str]) -> None:
+        """Store a task's outputs, evicting the least recently used entries if over budget."""
+        data = json.dumps(outputs)
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, outputs, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, data, size, now, now),
+            )
+            self._size += size - (old[0] if old else 0)
+            self.stores += 1
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+            self._size = 0
+
+    def close(self) -> None:
+        """Close the connection; the last one to close checkpoints the WAL into the database file."""
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "bytes": self._size,
+        }
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * EVICT_TO)
+        evicted = 0
+        # Other runs may have written to the same store
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        rows = self._db.execute("SELECT key, size FROM results ORDER BY accessed").fetchall()
+        for key, size in rows:
+            if self._size <= target:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._size -= size
+            evicted += 1
+        logger.info("Result cache evicted %s entries (%s bytes kept)", evicted, self._size)
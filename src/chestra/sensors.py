@@ -0,0 +1,240 @@
+import heapq
+import itertools
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
+
+from chestra.log import get_logger
+from chestra.watch import Watch, get_watcher
+
+if TYPE_CHECKING:
+    import requests
+
+logger = get_logger(__name__)
+
+Fire = Callable[[Any], None]
+
+
+class TimerHandle:
+    """A callback scheduled with Reactor.call_later(); cancel() stops it from running."""
+
+    def __init__(self, when: float, callback: Callable[[], None]) -> None:
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class Reactor:
+    """
+    Central waiting room for sensor tasks.
+
+    A single thread runs timers and trigger callbacks, so any number of tasks can wait for files,
+    timers or HTTP endpoints without each holding a worker thread. Blocking checks (HTTP polls) run
+    on a small separate pool so they never stall the timer thread.
+    """
+
+    def __init__(self, poke_workers: int = 4) -> None:
+        self._timers: List[Tuple[float, int, TimerHandle]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._poke_workers = poke_workers
+        self._poke_executor: Optional[ThreadPoolExecutor] = None
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> TimerHandle:
+        """Run `callback` on the reactor thread after `delay` seconds."""
+        handle = TimerHandle(time.monotonic() + max(0.0, delay), callback)
+        with self._condition:
+            heapq.heappush(self._timers, (handle.when, next(self._counter), handle))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="chestra-reactor", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return handle
+
+    def poke(self, check: Callable[[], None]) -> None:
+        """Run a blocking check on the reactor's poke pool."""
+        with self._condition:
+            if self._poke_executor is None:
+                self._poke_executor = ThreadPoolExecutor(self._poke_workers, thread_name_prefix="chestra-poke")
+            executor = self._poke_executor
+        executor.submit(check)
+
+    def defer(self, trigger: "Trigger") -> Future:
+        """
+        Arm a trigger.
+        Returns:
+            A Future resolved with the trigger's event, or with None if its timeout elapses first.
+        """
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        lock = threading.Lock()
+        timeout_handle: Optional[TimerHandle] = None
+
+        def fire(event: Any) -> None:
+            with lock:
+                if future.done():
+                    return
+                future.set_result(event)
+            if timeout_handle is not None:
+                timeout_handle.cancel()
+            try:
+                trigger.disarm()
+            except Exception as e:
+                logger.error("Failed to disarm %r: %s", trigger, e)
+
+        if trigger.timeout is not None:
+            timeout_handle = self.call_later(trigger.timeout, lambda: fire(None))
+        try:
+            trigger.arm(self, fire)
+        except BaseException:
+            if timeout_handle is not None:
+                timeout_handle.cancel()
+            raise
+        return future
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._timers or self._timers[0][0] > time.monotonic():
+                    wait = self._timers[0][0] - time.monotonic() if self._timers else None
+                    self._condition.wait(wait)
+                _, _, handle = heapq.heappop(self._timers)
+            if handle.cancelled:
+                continue
+            try:
+                handle.callback()
+            except Exception as e:
+                logger.error("Reactor callback failed: %s", e)
+
+
+class Trigger(ABC):
+    """A condition a sensor task waits for. `timeout` (seconds) fires the trigger with None."""
+    timeout: Optional[float]
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        self.timeout = timeout
+
+    @abstractmethod
+    def arm(self, reactor: Reactor, fire: Fire) -> None:
+        """Start watching for the condition and call `fire(event)` once it holds."""
+
+    def disarm(self) -> None:
+        """Release whatever arm() set up; called once the trigger fired or timed out."""
+
+    def wait(self) -> Any:
+        """Block the calling thread until the trigger fires (for use outside the scheduler)."""
+        return get_reactor().defer(self).result()
+
+
+class FileTrigger(Trigger):
+    """Fires with the path of the first matching file created or changed (see chestra.watch)."""
+
+    def __init__(self, path: str, timeout: Optional[float] = None) -> None:
+        super().__init__(timeout)
+        self.path = path
+        self._watch: Optional[Watch] = None
+
+    def arm(self, reactor: Reactor, fire: Fire) -> None:
+        self._watch = get_watcher().watch(self.path)
+        self._watch.add_callback(fire)
+
+    def disarm(self) -> None:
+        if self._watch is not None:
+            self._watch.cancel()
+
+    def __repr__(self) -> str:
+        return f"FileTrigger({self.path!r})"
+
+
+class TimerTrigger(Trigger):
+    """Fires with True after `delay` seconds."""
+
+    def __init__(self, delay: float, timeout: Optional[float] = None) -> None:
+        super().__init__(timeout)
+        self.delay = delay
+        self._handle: Optional[TimerHandle] = None
+
+    def arm(self, reactor: Reactor, fire: Fire) -> None:
+        self._handle = reactor.call_later(self.delay, lambda: fire(True))
+
+    def disarm(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+
+    def __repr__(self) -> str:
+        return f"TimerTrigger({self.delay!r})"
+
+
+class HttpPollTrigger(Trigger):
+    """
+    Polls a URL every `interval` seconds and fires with the requests.Response once its status
+    code is one of `statuses`. Connection errors count as "not yet".
+    """
+
+    def __init__(
+        self,
+        url: str,
+        interval: float = 5.0,
+        timeout: Optional[float] = None,
+        statuses: Tuple[int, ...] = (200,),
+        method: str = "GET",
+        request_timeout: float = 10.0,
+    ) -> None:
+        super().__init__(timeout)
+        self.url = url
+        self.interval = interval
+        self.statuses = statuses
+        self.method = method
+        self.request_timeout = request_timeout
+        self._handle: Optional[TimerHandle] = None
+        self._stopped = False
+        self._session: Optional['requests.Session'] = None
+
+    def arm(self, reactor: Reactor, fire: Fire) -> None:
+        import requests
+        self._session = requests.Session()
+
+        def check() -> None:
+            if self._stopped:
+                return
+            try:
+                response = self._session.request(self.method, self.url, timeout=self.request_timeout)
+            except Exception as e:
+                logger.info("Poll of %s failed: %s", self.url, e)
+            else:
+                if response.status_code in self.statuses:
+                    fire(response)
+                    return
+            if not self._stopped:
+                self._handle = reactor.call_later(self.interval, lambda: reactor.poke(check))
+
+        reactor.poke(check)
+
+    def disarm(self) -> None:
+        self._stopped = True
+        if self._handle is not None:
+            self._handle.cancel()
+        if self._session is not None:
+            self._session.close()
+
+    def __repr__(self) -> str:
+        return f"HttpPollTrigger({self.url!r})"
+
+
+_default_reactor: Optional[Reactor] = None
+_default_lock = threading.Lock()
+
+
+def get_reactor() -> Reactor:
+    """The process-wide Reactor shared by all sensor tasks."""
+    global _default_reactor
+    with _default_lock:
+        if _default_reactor is None:
+            _default_reactor = Reactor()
+        return _default_reactor
@@ -0,0 +1,161 @@
+import re
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Mapping, Optional, Tuple, Union
+
+# $$ before a reference escapes it; ${NAME:-default}; ${NAME}; $NAME where NAME may be dotted (task.VAR).
+# Names are made of word characters and inner hyphens, and may start with a digit, like task names.
+_NAME = r"\w+(?:-\w+)*"
+_TOKEN = re.compile(
+    r"\$(?:"
+    r"(?P<escaped>\$(?=[\w{]))"
+    r"|\{(?P<braced>[\w.-]+)(?::-(?P<default>[^}]*))?\}"
+    rf"|(?P<bare>{_NAME}(?:\.{_NAME})*)"
+    r")"
+)
+# Where a bare name may be cut short: before a dot or hyphen
+_BOUNDARY = re.compile(r"[.-]")
+
+# A literal chunk, or (reference name, default or None, source text)
+_Part = Union[str, Tuple[str, Optional[str], str]]
+
+
+class Template(str):
+    """
+    A string with `$NAME`, `${NAME}` and `${NAME:-default}` references, parsed once.
+
+    A Template is the string itself (a str subclass), so load_workflow() can put compiled templates
+    into a task's params and plugins reading them as plain strings see no difference.
+    Rendering is a single pass over the pre-split parts, so it costs O(length of the result) and
+    only looks up the names the template references, however large the environment is.
+    - `$task.VAR` takes the longest name present in the env that ends at a dot or hyphen, so `$A.B`
+      renders A.B when it exists and otherwise A followed by ".B". Task names may contain hyphens
+      and start with a digit (`$build-2.OUT`).
+    - References missing from the env are kept verbatim (e.g. shell variables like `$HOME`),
+      unless the braced form gives a default.
+    - `$$NAME` and `$${NAME}` render as the literal `$NAME` / `${NAME}`; any other `$$` is untouched.
+    """
+    names: FrozenSet[str]
+
+    def __init__(self, source: str) -> None:
+        parts: List[_Part] = []
+        names = set()
+        pos = 0
+        for match in _TOKEN.finditer(source):
+            if match.start() > pos:
+                parts.append(source[pos:match.start()])
+            if match.group("escaped"):
+                parts.append("$")
+            else:
+                name = match.group("braced") or match.group("bare")
+                # The bare form may fall back to a dotted prefix, so it references every prefix
+                candidates = [name] if match.group("braced") else _prefixes(name)
+                names.update(candidates)
+                parts.append((name, match.group("default"), match.group(0)))
+            pos = match.end()
+        if pos < len(source):
+            parts.append(source[pos:])
+        # Merge adjacent literals so rendering touches as few parts as possible
+        merged: List[_Part] = []
+        for part in parts:
+            if isinstance(part, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += part
+            else:
+                merged.append(part)
+        self._parts = tuple(merged)
+        self.names = frozenset(names)
+
+    @property
+    def source(self) -> str:
+        return str.__str__(self)
+
+    @property
+    def is_static(self) -> bool:
+        """True if rendering never depends on the env."""
+        return not self.names
+
+    def render(self, env: Mapping[str, Any]) -> str:
+        if len(self._parts) == 1 and isinstance(self._parts[0], str):
+            return self._parts[0]
+        out: List[str] = []
+        for part in self._parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            name, default, text = part
+            if name in env:
+                out.append(str(env[name]))
+            elif default is not None:
+                out.append(default)
+            elif text[1] == "{":
+                out.append(text)
+            else:
+                out.append(_render_prefix(name, env))
+        return "".join(out)
+
+    def __repr__(self) -> str:
+        return f"Template({str.__repr__(self)})"
+
+
+def _prefixes(name: str) -> List[str]:
+    """The name and every prefix of it ending before a dot or hyphen, longest first."""
+    return [name] + [name[:match.start()] for match in reversed(list(_BOUNDARY.finditer(name)))]
+
+
+def _render_prefix(name: str, env: Mapping[str, Any]) -> str:
+    """Render a bare `$a.b-c` whose full name is unset via its longest prefix in env."""
+    for prefix in _prefixes(name)[1:]:
+        if prefix in env:
+            return str(env[prefix]) + name[len(prefix):]
+    return "$" + name
+
+
+@lru_cache(maxsize=4096)
+def compile_template(source: str) -> Template:
+    """Parse a template string, memoised so each distinct string is only parsed once."""
+    return Template(source)
+
+
+def render(source: str, env: Mapping[str, Any]) -> str:
+    """
+    Substitute env variables into a template string. A Template (e.g. a param compiled by
+    compile_value()) is rendered as it is; other strings are parsed via compile_template().
+    """
+    if isinstance(source, Template):
+        return source.render(env)
+    if "$" not in source:
+        return source
+    return compile_template(source).render(env)
+
+
+def render_value(value: Any, env: Mapping[str, Any]) -> Any:
+    """
+    Substitute env variables into every string inside a param value.
+    Args:
+        value: A string, or a dict/list (e.g. headers or a JSON body) possibly containing strings.
+        env: Current environment variables.
+    Returns:
+        The value with its strings rendered; dict keys are rendered too. Other types are returned as is.
+    """
+    if isinstance(value, str):
+        return render(value, env)
+    if isinstance(value, dict):
+        return {render_value(k, env): render_value(v, env) for k, v in value.items()}
+    if isinstance(value, list):
+        return [render_value(v, env) for v in value]
+    return value
+
+
+def compile_value(value: Any) -> Any:
+    """
+    Parse every string inside a param value ahead of time (used when a workflow is loaded).
+    Returns:
+        The value with its strings that contain references replaced by Templates; dicts and lists
+        are copied, everything else is returned as is.
+    """
+    if isinstance(value, str):
+        return Template(value) if "$" in value and not isinstance(value, Template) else value
+    if isinstance(value, dict):
+        return {compile_value(k): compile_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [compile_value(v) for v in value]
+    return value
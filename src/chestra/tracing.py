@@ -0,0 +1,227 @@
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional
+
+TRACE_FORMATS = ("chrome", "otlp")
+
+# Task phases, in the order they happen
+QUEUED = "queued"
+PERMISSIONS = "permissions"
+EXECUTE = "execute"
+MERGE = "merge"
+
+
+class Span(NamedTuple):
+    """One phase of one task; times are wall-clock nanoseconds."""
+    task: str
+    phase: str
+    start: int
+    end: int
+    pid: int
+    tid: int
+    attributes: Dict[str, Any]
+    # Not running on a thread (waiting in the ready queue, or for a sensor or a coroutine): it would
+    # not nest with the other spans of its thread, so viewers get it on a track of its own
+    asynchronous: bool
+
+
+def output_sizes(outputs: Optional[Mapping[str, Any]]) -> Dict[str, int]:
+    """Span attributes describing a task's outputs: how many and their total size in characters."""
+    outputs = outputs or {}
+    return {"outputs": len(outputs), "output_bytes": sum(len(str(value)) for value in outputs.values())}
+
+
+class NullTracer:
+    """The tracer of a run that is not traced: every call is a no-op."""
+    enabled = False
+
+    def now(self) -> int:
+        return 0
+
+    def at(self, perf_seconds: float) -> int:
+        return 0
+
+    def add(self, task: str, phase: str, start: int, end: Optional[int] = None, **kwargs: Any) -> None:
+        pass
+
+    @contextmanager
+    def span(self, task: str, phase: str, **attributes: Any) -> Iterator[None]:
+        yield
+
+
+class Tracer(NullTracer):
+    """
+    Collects the spans of a run's tasks (queued, permissions, execute, merge) for
+    `chestra run --trace`, to be dumped as Chrome trace events (Perfetto, chrome://tracing) or as
+    OTLP JSON.
+    """
+    enabled = True
+    spans: List[Span]
+
+    def __init__(self) -> None:
+        self.spans = []
+        self.trace_id = secrets.token_hex(16)
+        self._lock = threading.Lock()
+        # Spans are timed with perf_counter and stamped with wall-clock time
+        self._offset = time.time_ns() - time.perf_counter_ns()
+
+    def now(self) -> int:
+        return time.perf_counter_ns() + self._offset
+
+    def at(self, perf_seconds: float) -> int:
+        """The wall-clock time of a time.perf_counter() reading."""
+        return int(perf_seconds * 1e9) + self._offset
+
+    def add(
+        self,
+        task: str,
+        phase: str,
+        start: int,
+        end: Optional[int] = None,
+        pid: Optional[int] = None,
+        tid: Optional[int] = None,
+        asynchronous: bool = False,
+        **attributes: Any,
+    ) -> None:
+        """
+        Record a span.
+        Args:
+            task: Name of the task.
+            phase: QUEUED, PERMISSIONS, EXECUTE or MERGE.
+            start: Start time, from now() or at().
+            end: End time (default: now).
+            pid: Process the phase ran in (default: this one).
+            tid: Native id of the thread it ran on (default: the calling thread).
+            asynchronous: See Span.
+            attributes: Extra attributes, e.g. the plugin and output_sizes().
+        """
+        span = Span(
+            task,
+            phase,
+            start,
+            self.now() if end is None else end,
+            os.getpid() if pid is None else pid,
+            threading.get_native_id() if tid is None else tid,
+            attributes,
+            asynchronous,
+        )
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, task: str, phase: str, **attributes: Any) -> Iterator[None]:
+        """Record the enclosed block as a span of `task`."""
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.add(task, phase, start, **attributes)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The spans as a Chrome trace event document (microsecond timestamps)."""
+        events: List[Dict[str, Any]] = []
+        pids = set()
+        for number, span in enumerate(sorted(self.spans, key=lambda s: s.start)):
+            pids.add(span.pid)
+            event = {
+                "name": f"{span.phase} {span.task}",
+                "cat": span.phase,
+                "pid": span.pid,
+                "tid": span.tid,
+                "ts": span.start / 1000,
+                "args": {"task": span.task, **span.attributes},
+            }
+            if span.asynchronous:
+                events.append({**event, "ph": "b", "id": number})
+                events.append({**event, "ph": "e", "id": number, "ts": span.end / 1000, "args": {}})
+            else:
+                events.append({**event, "ph": "X", "dur": (span.end - span.start) / 1000})
+        for pid in sorted(pids):
+            name = "chestra" if pid == os.getpid() else "chestra worker"
+            events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": name}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def otlp_trace(self) -> Dict[str, Any]:
+        """
+        The spans as an OTLP/JSON ExportTraceServiceRequest: one trace for the run, one root span
+        per task covering all its phases, the phases as its children.
+        """
+        by_task: Dict[str, List[Span]] = {}
+        for span in self.spans:
+            by_task.setdefault(span.task, []).append(span)
+        otlp_spans: List[Dict[str, Any]] = []
+        for task, spans in by_task.items():
+            root_id = secrets.token_hex(8)
+            root_attributes = {"chestra.task": task}
+            for span in spans:
+                root_attributes.update(span.attributes)
+            otlp_spans.append(self._otlp_span(
+                root_id, None, task, min(s.start for s in spans), max(s.end for s in spans), root_attributes
+            ))
+            for span in spans:
+                attributes = {
+                    "chestra.task": task,
+                    "process.pid": span.pid,
+                    "thread.id": span.tid,
+                    **span.attributes,
+                }
+                otlp_spans.append(
+                    self._otlp_span(secrets.token_hex(8), root_id, span.phase, span.start, span.end, attributes)
+                )
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": "chestra"})},
+                "scopeSpans": [{"scope": {"name": "chestra"}, "spans": otlp_spans}],
+            }]
+        }
+
+    def dump(self, path: str, format: str = "chrome") -> None:
+        """
+        Write the trace to `path`.
+        Args:
+            path: Output file.
+            format: "chrome" (trace events, for Perfetto) or "otlp" (OTLP JSON).
+        """
+        if format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format: {format!r} (expected one of {TRACE_FORMATS})")
+        document = self.chrome_trace() if format == "chrome" else self.otlp_trace()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f)
+
+    def _otlp_span(
+        self, span_id: str, parent_id: Optional[str], name: str, start: int, end: int, attributes: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": span_id,
+            "name": name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(start),
+            "endTimeUnixNano": str(end),
+            "attributes": _otlp_attributes(attributes),
+        }
+        if parent_id is not None:
+            span["parentSpanId"] = parent_id
+        return span
+
+
+def _otlp_attributes(attributes: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    converted = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        converted.append({"key": key, "value": typed})
+    return converted
+
+
+NULL_TRACER = NullTracer()
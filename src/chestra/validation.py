@@ -0,0 +1,118 @@
+import difflib
+from collections import deque
+from typing import TYPE_CHECKING, Collection, Deque, Dict, List, Mapping, Set
+
+if TYPE_CHECKING:
+    from .orchestrator import Task
+
+
+class WorkflowValidationError(ValueError):
+    """Raised when a workflow's task graph can never run to completion."""
+    problems: List[str]
+
+    def __init__(self, problems: List[str]) -> None:
+        self.problems = problems
+        super().__init__("Invalid workflow:\n" + "\n".join(f"  - {p}" for p in problems))
+
+
+def _missing_input_hint(key: str, outputs_by_task: Dict[str, List[str]]) -> str:
+    if '.' not in key:
+        return " (inputs are namespaced as TASK.VAR)"
+    task_name, var = key.split('.', 1)
+    if task_name in outputs_by_task:
+        close = difflib.get_close_matches(var, outputs_by_task[task_name], n=1)
+        if close:
+            return f" (did you mean '{task_name}.{close[0]}'?)"
+        return f" (task '{task_name}' outputs {outputs_by_task[task_name]})"
+    close = difflib.get_close_matches(task_name, list(outputs_by_task), n=1)
+    if close:
+        return f" (no task named '{task_name}', did you mean '{close[0]}'?)"
+    return f" (no task named '{task_name}')"
+
+
+def _find_cycles(blocked: List["Task"], consumers: Mapping[str, List["Task"]]) -> List[List[str]]:
+    """Iterative DFS over the never-eligible subgraph, returning one cycle per back edge found."""
+    in_subgraph: Set[str] = {t.name for t in blocked}
+    state: Dict[str, int] = {}  # 1 = on the DFS stack, 2 = finished
+    cycles: List[List[str]] = []
+    for root in blocked:
+        if root.name in state:
+            continue
+        state[root.name] = 1
+        path: List["Task"] = [root]
+        stack = [iter(_successors(root, consumers))]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                state[path.pop().name] = 2
+                stack.pop()
+                continue
+            if child.name not in in_subgraph:
+                continue
+            if state.get(child.name) == 1:
+                start = next(i for i, t in enumerate(path) if t.name == child.name)
+                cycles.append([t.name for t in path[start:]] + [child.name])
+            elif child.name not in state:
+                state[child.name] = 1
+                path.append(child)
+                stack.append(iter(_successors(child, consumers)))
+    return cycles
+
+
+def _successors(task: "Task", consumers: Mapping[str, List["Task"]]):
+    for var in task.outputs:
+        yield from consumers.get(f"{task.name}.{var}", ())
+
+
+def validate_workflow(
+    tasks: List["Task"],
+    consumers: Mapping[str, List["Task"]],
+    available: Collection[str] = (),
+) -> None:
+    """
+    Statically check that every task in the graph can eventually run, without executing anything.
+    Rejects inputs no task produces, dependency cycles, and tasks that can never become eligible
+    because something upstream of them is broken. Runs in O(tasks + edges).
+    Args:
+        tasks: Tasks of the loaded workflow.
+        consumers: Index from namespaced input key (TASK.VAR) to the tasks consuming it.
+        available: Keys already present in the environment before the run starts.
+    Raises:
+        WorkflowValidationError: Listing every problem found.
+    """
+    problems: List[str] = []
+    outputs_by_task: Dict[str, List[str]] = {t.name: [str(var) for var in t.outputs] for t in tasks}
+    produced: Set[str] = {f"{t.name}.{var}" for t in tasks for var in t.outputs}
+    pending: Dict[str, int] = {}
+    ready: Deque["Task"] = deque()
+    for task in tasks:
+        inputs = set(task.inputs)
+        missing = sorted(key for key in inputs if key not in produced and key not in available)
+        for key in missing:
+            problems.append(
+                f"Task '{task.name}' input '{key}' is not produced by any task"
+                + _missing_input_hint(key, outputs_by_task)
+            )
+        # Tasks with unsatisfiable inputs are never released, so they keep an extra pending count
+        pending[task.name] = sum(1 for key in inputs if key in produced) + len(missing)
+        if pending[task.name] == 0:
+            ready.append(task)
+    # Kahn's algorithm: release consumers as if every task succeeded
+    while ready:
+        task = ready.popleft()
+        for consumer in _successors(task, consumers):
+            pending[consumer.name] -= 1
+            if pending[consumer.name] == 0:
+                ready.append(consumer)
+    blocked = [t for t in tasks if pending[t.name] > 0]
+    if not blocked:
+        return
+    cycles = _find_cycles(blocked, consumers)
+    for cycle in cycles:
+        problems.append("Dependency cycle: " + " -> ".join(cycle))
+    explained: Set[str] = {name for cycle in cycles for name in cycle}
+    explained.update(t.name for t in tasks if any(k not in produced and k not in available for k in t.inputs))
+    unreachable = [t.name for t in blocked if t.name not in explained]
+    if unreachable:
+        problems.append(f"Tasks that can never become eligible: {unreachable}")
+    raise WorkflowValidationError(problems)
@@ -0,0 +1,304 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import glob
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from chestra.log import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds between stat passes for watches inotify cannot serve (other platforms, missing directories)
+POLL_INTERVAL: float = 0.25
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF
+_EVENT = struct.Struct("iIII")
+
+Signature = Tuple[int, int]
+
+
+class Watch:
+    """
+    A registered interest in a file, a directory or a glob such as `incoming/*.csv`.
+
+    Fires when a matching file is created, written, touched or moved into place after the watch
+    was registered. Globs may only use wildcards in the last path component.
+    """
+    directory: str
+    path: str
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.abspath(path)
+        if os.path.isdir(self.path):
+            self.directory, self._pattern = self.path, None
+        else:
+            self.directory, self._pattern = os.path.split(self.path)
+        if glob.has_magic(self.directory):
+            raise ValueError(f"Wildcards are only supported in the file name: {path}")
+        self.changed: Optional[str] = None
+        self._event = threading.Event()
+        self._callbacks: List[Callable[[str], None]] = []
+        self._callbacks_lock = threading.Lock()
+        self._signatures: Dict[str, Signature] = {}
+        self._watcher: Optional["FileWatcher"] = None
+
+    def matches(self, name: str) -> bool:
+        return self._pattern is None or fnmatch.fnmatchcase(name, self._pattern)
+
+    def add_callback(self, callback: Callable[[str], None]) -> None:
+        """Call `callback(path)` (on the watcher thread) when the watch fires."""
+        with self._callbacks_lock:
+            fired = self.changed
+            if fired is None:
+                self._callbacks.append(callback)
+        if fired is not None:
+            callback(fired)
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Block until the watch fires.
+        Returns:
+            The path that changed, or None on timeout.
+        """
+        self._event.wait(timeout)
+        return self.changed
+
+    def cancel(self) -> None:
+        if self._watcher is not None:
+            self._watcher.unwatch(self)
+
+    def _fire(self, path: str) -> None:
+        with self._callbacks_lock:
+            if self.changed is not None:
+                return
+            self.changed = path
+            callbacks = list(self._callbacks)
+        self._event.set()
+        for callback in callbacks:
+            try:
+                callback(path)
+            except Exception as e:
+                logger.error("File watch callback failed: %s", e)
+
+    def _scan(self) -> Dict[str, Signature]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return {}
+        signatures = {}
+        for name in names:
+            if self.matches(name):
+                full = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                signatures[full] = (st.st_mtime_ns, st.st_size)
+        return signatures
+
+    def __enter__(self) -> "Watch":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.cancel()
+
+
+class _Inotify:
+    """Thin ctypes binding to the Linux inotify API."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, directory: str) -> int:
+        wd = self._add(self.fd, os.fsencode(directory), WATCH_MASK | IN_ONLYDIR)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm(self.fd, wd)
+
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+
+class FileWatcher:
+    """
+    Multiplexes any number of Watches on a single background thread.
+
+    On Linux, directories are watched with inotify, so waiting tasks wake as soon as a file
+    changes and no thread polls. Elsewhere, or when a watched directory does not exist yet, the
+    thread falls back to comparing mtime and size every POLL_INTERVAL seconds.
+    """
+
+    def __init__(self, use_inotify: Optional[bool] = None) -> None:
+        self._lock = threading.Lock()
+        self._polled: Set[Watch] = set()
+        # inotify watch descriptor <-> directory, and the Watches interested in each directory
+        self._wds: Dict[int, str] = {}
+        self._dir_wds: Dict[str, int] = {}
+        self._by_dir: Dict[str, Set[Watch]] = {}
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify is None:
+            use_inotify = sys.platform.startswith("linux")
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                logger.info("inotify unavailable, polling files instead: %s", e)
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_w, False)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._inotify is not None else "poll"
+
+    def watch(self, path: str) -> Watch:
+        """Start watching `path` (a file, a directory or a file-name glob)."""
+        watch = Watch(path)
+        watch._watcher = self
+        with self._lock:
+            if not self._add_inotify(watch):
+                watch._signatures = watch._scan()
+                self._polled.add(watch)
+            self._ensure_thread()
+        self._wake()
+        return watch
+
+    def unwatch(self, watch: Watch) -> None:
+        with self._lock:
+            self._polled.discard(watch)
+            watchers = self._by_dir.get(watch.directory)
+            if watchers is not None and watch in watchers:
+                watchers.discard(watch)
+                if not watchers:
+                    del self._by_dir[watch.directory]
+                    wd = self._dir_wds.pop(watch.directory, None)
+                    if wd is not None:
+                        self._wds.pop(wd, None)
+                        self._inotify.rm_watch(wd)
+
+    def wait_for_change(self, path: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Watch `path` until a matching file changes or `timeout` elapses; returns the path or None."""
+        with self.watch(path) as watch:
+            return watch.wait(timeout)
+
+    def _add_inotify(self, watch: Watch) -> bool:
+        if self._inotify is None:
+            return False
+        if watch.directory not in self._dir_wds:
+            try:
+                wd = self._inotify.add_watch(watch.directory)
+            except OSError:
+                return False
+            self._dir_wds[watch.directory] = wd
+            self._wds[wd] = watch.directory
+        self._by_dir.setdefault(watch.directory, set()).add(watch)
+        return True
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="chestra-file-watcher", daemon=True)
+            self._thread.start()
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wakeup_w, b"\0")
+        except BlockingIOError:
+            pass
+
+    def _run(self) -> None:
+        fds = [self._wakeup_r] + ([self._inotify.fd] if self._inotify is not None else [])
+        while True:
+            with self._lock:
+                timeout = POLL_INTERVAL if self._polled else None
+            readable, _, _ = select.select(fds, [], [], timeout)
+            if self._wakeup_r in readable:
+                os.read(self._wakeup_r, 4096)
+            if self._inotify is not None and self._inotify.fd in readable:
+                self._dispatch(self._inotify.read_events())
+            self._poll()
+
+    def _dispatch(self, events: List[Tuple[int, int, str]]) -> None:
+        fired: List[Tuple[Watch, str]] = []
+        moved: List[Watch] = []
+        with self._lock:
+            for wd, mask, name in events:
+                directory = self._wds.get(wd)
+                if directory is None:
+                    continue
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    # The directory itself went away: keep its watches alive by polling
+                    moved.extend(self._by_dir.pop(directory, ()))
+                    self._wds.pop(wd, None)
+                    self._dir_wds.pop(directory, None)
+                    continue
+                for watch in self._by_dir.get(directory, ()):
+                    if name and watch.matches(name):
+                        fired.append((watch, os.path.join(directory, name)))
+                    elif not name and watch._pattern is None:
+                        fired.append((watch, directory))
+            for watch in moved:
+                watch._signatures = watch._scan()
+                self._polled.add(watch)
+        for watch, path in fired:
+            watch._fire(path)
+
+    def _poll(self) -> None:
+        with self._lock:
+            polled = list(self._polled)
+        for watch in polled:
+            signatures = watch._scan()
+            for path, signature in signatures.items():
+                if watch._signatures.get(path) != signature:
+                    watch._fire(path)
+                    break
+            watch._signatures = signatures
+
+
+_default_watcher: Optional[FileWatcher] = None
+_default_lock = threading.Lock()
+
+
+def get_watcher() -> FileWatcher:
+    """The process-wide FileWatcher shared by all plugins."""
+    global _default_watcher
+    with _default_lock:
+        if _default_watcher is None:
+            _default_watcher = FileWatcher()
+        return _default_watcher
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+DEFAULT_WORKERS: int = 8
+AUTO_WORKERS: str = "auto"
+
+
+def parse_workers(value: Union[int, str, None]) -> Union[int, str, None]:
+    """
+    Normalise a worker pool setting from the API, the CLI or the workflow YAML.
+    Args:
+        value: A positive integer, "auto" for adaptive sizing, or None for "not set".
+    Returns:
+        The positive int, AUTO_WORKERS or None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        if value.strip().lower() == AUTO_WORKERS:
+            return AUTO_WORKERS
+        if not value.strip().isdigit():
+            raise ValueError(f"Invalid workers value: {value!r} (expected a positive integer or 'auto')")
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"Invalid workers value: {value!r} (expected a positive integer or 'auto')")
+    return value
+
+
+class WorkerPoolSizer:
+    """
+    Decides how many tasks may run at once.
+
+    A fixed sizer always allows `initial` tasks. An adaptive sizer starts at `initial` and, every few
+    completions, compares the CPU time tasks spent on their worker thread with their wall time:
+    mostly-blocked (I/O bound) tasks grow the limit while work is queued, and CPU-bound tasks or a
+    system load above the CPU count shrink it back towards the CPU count.
+    """
+    target: int
+    adaptive: bool
+
+    GROW_BELOW_CPU_RATIO: float = 0.25
+    SHRINK_ABOVE_CPU_RATIO: float = 0.75
+
+    def __init__(self, initial: int, adaptive: bool = False, maximum: Optional[int] = None) -> None:
+        cpus = os.cpu_count() or 1
+        self.target = initial
+        self.adaptive = adaptive
+        self.minimum = max(1, min(cpus, initial))
+        self.maximum = maximum or (max(initial, min(256, 32 * cpus)) if adaptive else initial)
+        self._cpus = cpus
+        self._cpu_ratio: Optional[float] = None
+        self._since_adjust = 0
+        self._lock = threading.Lock()
+
+    def record(self, exec_time: float, cpu_time: float) -> None:
+        """Feed one finished task's wall and on-thread CPU time into the moving average."""
+        if not self.adaptive or exec_time <= 0:
+            return
+        ratio = min(1.0, cpu_time / exec_time)
+        with self._lock:
+            self._cpu_ratio = ratio if self._cpu_ratio is None else 0.8 * self._cpu_ratio + 0.2 * ratio
+            self._since_adjust += 1
+
+    def adjust(self, backlog: int) -> int:
+        """
+        Re-evaluate the limit after completions.
+        Args:
+            backlog: Number of ready tasks waiting for a worker.
+        Returns:
+            The (possibly updated) number of tasks allowed to run at once.
+        """
+        if not self.adaptive or self._cpu_ratio is None or self._since_adjust < max(2, self.target // 4):
+            return self.target
+        self._since_adjust = 0
+        if self._cpu_ratio > self.SHRINK_ABOVE_CPU_RATIO or self._load_per_cpu() > 1.0:
+            self.target = max(self.minimum, self.target * 3 // 4)
+        elif self._cpu_ratio < self.GROW_BELOW_CPU_RATIO and backlog > 0:
+            self.target = min(self.maximum, self.target * 2)
+        return self.target
+
+    def _load_per_cpu(self) -> float:
+        try:
+            return os.getloadavg()[0] / self._cpus
+        except (AttributeError, OSError):
+            return 0.0
+
+
+class RunStats:
+    """Per-run timing aggregates: how long tasks waited for a worker vs. how long they executed."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.tasks = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.exec_total = 0.0
+        self.exec_max = 0.0
+        self.peak_running = 0
+        self.peak_workers = 0
+        self.started_at = time.perf_counter()
+        self.makespan = 0.0
+
+    def record(self, queue_wait: float, exec_time: float) -> None:
+        with self._lock:
+            self.tasks += 1
+            self.queue_wait_total += queue_wait
+            self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+            self.exec_total += exec_time
+            self.exec_max = max(self.exec_max, exec_time)
+
+    def observe_running(self, running: int, workers: int) -> None:
+        self.peak_running = max(self.peak_running, running)
+        self.peak_workers = max(self.peak_workers, workers)
+
+    def finish(self) -> None:
+        self.makespan = time.perf_counter() - self.started_at
+
+    def as_dict(self) -> Dict[str, Any]:
+        count = self.tasks or 1
+        return {
+            "tasks": self.tasks,
+            "makespan": self.makespan,
+            "queue_wait_total": self.queue_wait_total,
+            "queue_wait_mean": self.queue_wait_total / count,
+            "queue_wait_max": self.queue_wait_max,
+            "exec_total": self.exec_total,
+            "exec_mean": self.exec_total / count,
+            "exec_max": self.exec_max,
+            "peak_running": self.peak_running,
+            "peak_workers": self.peak_workers,
+        }
+
+    def summary(self) -> str:
+        s = self.as_dict()
+        return (
+            f"{s['tasks']} tasks in {s['makespan']:.3f}s; "
+            f"queue wait mean {s['queue_wait_mean']:.4f}s max {s['queue_wait_max']:.4f}s; "
+            f"execution mean {s['exec_mean']:.4f}s max {s['exec_max']:.4f}s; "
+            f"peak {s['peak_running']} running / {s['peak_workers']} workers"
+        )
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep on-disk caches (plugin index, ...) out of the user's home directory."""
+    monkeypatch.setenv("CHESTRA_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
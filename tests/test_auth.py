@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from chestra.auth import PermissionCache
+from chestra.orchestrator import TaskOrchestrator
+
+
+class _AuthHandler(BaseHTTPRequestHandler):
+    """Mock auth service: grants can_view_system to any token after a short delay."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    requests = 0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_POST(self):
+        type(self).requests += 1
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(0.05)
+        body = json.dumps({"permissions": {"can_view_system": payload["auth_token"] == "good"}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def auth_url():
+    _AuthHandler.requests = 0
+    _AuthHandler.connections = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _AuthHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/permissions"
+    server.shutdown()
+    server.server_close()
+
+
+def test_permissions_are_cached_per_token(auth_url):
+    orchestrator = TaskOrchestrator()
+    orchestrator.auth_service_url = auth_url
+    for _ in range(20):
+        assert orchestrator.get_permissions("good") == {"can_view_system": True}
+    assert orchestrator.get_permissions("bad") == {"can_view_system": False}
+    assert _AuthHandler.requests == 2
+    assert _AuthHandler.connections == 1
+    assert orchestrator.permission_cache.stats()["hits"] == 19
+    assert orchestrator.permission_cache.stats()["misses"] == 2
+
+
+def test_concurrent_lookups_share_one_request(auth_url):
+    orchestrator = TaskOrchestrator()
+    orchestrator.auth_service_url = auth_url
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(orchestrator.get_permissions, ["good"] * 64))
+    assert all(r == {"can_view_system": True} for r in results)
+    assert _AuthHandler.requests == 1
+
+
+def test_auth_errors_are_not_cached(auth_url):
+    orchestrator = TaskOrchestrator()
+    orchestrator.auth_service_url = "http://127.0.0.1:1/permissions"
+    assert orchestrator.get_permissions("good") == {}
+    orchestrator.auth_service_url = auth_url
+    assert orchestrator.get_permissions("good") == {"can_view_system": True}
+
+
+def test_cache_entries_expire_after_ttl():
+    calls = []
+    cache = PermissionCache(lambda token: calls.append(token) or {"ok": True}, ttl=0.05)
+    cache.get("a")
+    cache.get("a")
+    time.sleep(0.06)
+    cache.get("a")
+    assert calls == ["a", "a"]
+
+
+def test_least_recently_used_token_is_evicted():
+    calls = []
+    cache = PermissionCache(lambda token: calls.append(token) or {}, max_size=2)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    cache.get("c")  # evicts b
+    cache.get("a")
+    cache.get("b")
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_callers_cannot_change_cached_permissions():
+    cache = PermissionCache(lambda token: {"can_view_system": False})
+    cache.get("a")["can_view_system"] = True
+    cache.get("a")["can_view_system"] = True
+    assert cache.get("a") == {"can_view_system": False}
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCHMARKS)
+
+from dags import SHAPES, critical_path, workflow  # noqa: E402
+
+
+@pytest.mark.parametrize("shape", sorted(SHAPES))
+def test_shapes_are_topologically_ordered(shape):
+    parents = SHAPES[shape](200)
+    assert len(parents) == 200
+    assert parents[0] == []
+    assert all(p < i for i, inputs in enumerate(parents) for p in inputs)
+    assert all(inputs for inputs in parents[1:])
+
+
+def test_critical_path():
+    assert critical_path(SHAPES["chain"](10), 0.5) == 5.0
+    assert critical_path(SHAPES["fan_out"](10), 0.5) == 1.0
+    # head, 8 parallel tasks, join, then 1 more task
+    assert critical_path(SHAPES["diamond"](11), 1.0) == 4.0
+
+
+def test_workflow_document():
+    doc = workflow([[], [0], [0, 1]], plugin="sleep", seconds=0.1)
+    tasks = doc["workflow"]["tasks"]
+    assert [t["name"] for t in tasks] == ["t0", "t1", "t2"]
+    assert tasks[2]["inputs"] == ["t0.OUT", "t1.OUT"]
+    assert tasks[2]["params"] == {"seconds": 0.1}
+
+
+def test_run_writes_results(tmp_path):
+    output = tmp_path / "results.json"
+    subprocess.run(
+        [sys.executable, os.path.join(BENCHMARKS, "run.py"), "--shapes", "chain,random", "--sizes", "5,20",
+         "-o", str(output)],
+        check=True, capture_output=True, text=True,
+    )
+    results = json.loads(output.read_text())
+    assert results["environment"]["python"]
+    assert [(r["shape"], r["size"]) for r in results["results"]] == [
+        ("chain", 5), ("chain", 20), ("random", 5), ("random", 20)
+    ]
+    for r in results["results"]:
+        assert r["stats"]["tasks"] == r["size"]
+        assert r["load_s"] > 0 and r["run_s"] > 0 and r["peak_rss_mb"] > 0
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from chestra.plugins.cmd import CmdPlugin
+from chestra.process import MAX_LINE, OutputSink, RotatingLog
+
+NOISY = f"{sys.executable} -c \"import sys; [print('x' * 100) for _ in range(50000)]; print('DONE=yes')\""
+
+
+def test_stream_mode_parses_variables_and_keeps_a_bounded_tail(capsys):
+    result = CmdPlugin().execute({}, {"command": NOISY + "; echo ERR=1 >&2", "stream": True, "tail_lines": 10})
+    assert result == {"DONE": "yes", "ERR": "1"}
+    assert capsys.readouterr().out.count("\n") == 50001
+
+
+def test_stream_mode_tees_to_rotating_log(tmp_path, capsys):
+    log_file = tmp_path / "cmd.log"
+    CmdPlugin().execute({}, {"command": NOISY, "stream": True, "log_file": str(log_file),
+                             "log_max_bytes": 1024 * 1024, "log_backups": 2})
+    sizes = [os.path.getsize(p) for p in (log_file, f"{log_file}.1", f"{log_file}.2")]
+    assert all(size <= 1024 * 1024 for size in sizes)
+    assert not os.path.exists(f"{log_file}.3")
+    assert log_file.read_text().endswith("DONE=yes\n")
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_timeout_kills_the_whole_process_group(tmp_path, stream):
+    marker = tmp_path / "survived"
+    command = f"(sleep 1 && touch {marker}) & sleep 5"
+    started = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        CmdPlugin().execute({}, {"command": command, "timeout": 0.2, "stream": stream})
+    assert time.perf_counter() - started < 2
+    time.sleep(1.2)
+    assert not marker.exists()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_async_timeout(stream):
+    with pytest.raises(TimeoutError):
+        asyncio.run(CmdPlugin().execute_async({}, {"command": "sleep 5", "timeout": 0.2, "stream": stream}))
+    result = asyncio.run(CmdPlugin().execute_async({}, {"command": "echo A=1", "timeout": 5, "stream": stream}))
+    assert result == {"A": "1"}
+
+
+def test_sink_splits_lines_across_chunks_and_caps_long_lines():
+    sink = OutputSink(tail_lines=3)
+    for chunk in (b"A=", b"1\nB", b"=2\n", b"y" * (MAX_LINE + 1), b"=3\nC=4"):
+        sink.feed("stdout", chunk)
+    sink.close()
+    assert sink.variables == {"A": "1", "B": "2", "C": "4"}
+    assert list(sink.tail) == ["y" * (MAX_LINE + 1), "=3", "C=4"]
+
+
+def test_rotating_log_without_backups_truncates(tmp_path):
+    log = RotatingLog(str(tmp_path / "out.log"), max_bytes=10, backups=0)
+    log.write(b"123456789\n")
+    log.write(b"abc\n")
+    log.close()
+    assert (tmp_path / "out.log").read_bytes() == b"abc\n"
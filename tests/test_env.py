@@ -0,0 +1,67 @@
+import threading
+
+from chestra.env import Environment
+
+
+def test_snapshot_does_not_see_later_writes():
+    env = Environment({"AUTH_TOKEN": "abc"})
+    snapshot = env.snapshot()
+    env.add_layer({"a.X": "1", "a.Y": "2"})
+    assert dict(snapshot) == {"AUTH_TOKEN": "abc"}
+    assert "a.X" not in snapshot
+    assert env.snapshot().copy() == {"AUTH_TOKEN": "abc", "a.X": "1", "a.Y": "2"}
+
+
+def test_overwritten_and_deleted_values_stay_visible_to_old_snapshots():
+    env = Environment()
+    env["a.X"] = "old"
+    before = env.snapshot()
+    env["a.X"] = "new"
+    middle = env.snapshot()
+    del env["a.X"]
+    assert before["a.X"] == "old"
+    assert middle["a.X"] == "new"
+    assert "a.X" not in env
+    assert list(before) == ["a.X"]
+    assert len(env.snapshot()) == 0
+
+
+def test_snapshots_are_consistent_under_concurrent_writes():
+    env = Environment()
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            env.add_layer({"t.A": i, "t.B": i})
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(2000):
+            snapshot = env.snapshot()
+            assert snapshot.get("t.A") == snapshot.get("t.B")
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_history_is_dropped_once_no_snapshot_can_see_it():
+    env = Environment()
+    env["a.X"] = 0
+    oldest = env.snapshot()
+    for i in range(1, 100):
+        newer = env.snapshot()
+        env["a.X"] = i
+    assert oldest["a.X"] == 0
+    assert newer["a.X"] == 98
+    del oldest
+    env["b.Y"] = "y"
+    # Only what the remaining snapshot can still see is kept
+    assert len(env._history["a.X"]) == 1
+    assert newer["a.X"] == 98
+    del newer
+    env["b.Y"] = "z"
+    assert env._history == {}
+    assert env.snapshot().copy() == {"a.X": 99, "b.Y": "z"}
@@ -1,14 +1,19 @@
-import pytest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import Mock, patch
-from chestra.plugins.http import HttpPlugin
+
+import pytest
 import requests
 
+from chestra.metrics import REGISTRY
+from chestra.plugins.http import HttpPlugin
+
 
 def test_http_plugin_executes():
     """Test that the HTTP plugin executes successfully."""
     plugin = HttpPlugin()
     
-    with patch('requests.request') as mock_request:
+    with patch('requests.Session.request') as mock_request:
         # Mock successful response
         mock_response = Mock()
         mock_response.status_code = 200
@@ -35,7 +40,7 @@ def test_http_plugin_with_params():
     """Test that the HTTP plugin handles parameters correctly."""
     plugin = HttpPlugin()
     
-    with patch('requests.request') as mock_request:
+    with patch('requests.Session.request') as mock_request:
         mock_response = Mock()
         mock_response.status_code = 201
         mock_response.text = "Created"
@@ -71,7 +76,7 @@ def test_http_plugin_request_failure():
     """Test that the HTTP plugin handles request failures."""
     plugin = HttpPlugin()
     
-    with patch('requests.request') as mock_request:
+    with patch('requests.Session.request') as mock_request:
         mock_request.side_effect = requests.exceptions.RequestException("Connection failed")
         
         with pytest.raises(RuntimeError, match="HTTP request failed"):
@@ -82,7 +87,7 @@ def test_http_plugin_with_custom_options():
     """Test that the HTTP plugin handles custom options."""
     plugin = HttpPlugin()
     
-    with patch('requests.request') as mock_request:
+    with patch('requests.Session.request') as mock_request:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.text = "OK"
@@ -119,7 +124,7 @@ def test_http_plugin_with_permissions():
     assert plugin.REQUIRED_PERMISSIONS == []
     
     # Should work without permissions
-    with patch('requests.request') as mock_request:
+    with patch('requests.Session.request') as mock_request:
         mock_response = Mock()
         mock_response.status_code = 200
         mock_response.text = "OK"
@@ -131,4 +136,193 @@ def test_http_plugin_with_permissions():
         mock_request.return_value = mock_response
         
         result = plugin.execute({}, {"url": "https://example.com"})
-        assert result is not None 
\ No newline at end of file
+        assert result is not None 
+
+def test_http_plugin_execute_async_without_httpx():
+    """Test that the async path falls back to requests on an executor when httpx is missing."""
+    import asyncio
+
+    plugin = HttpPlugin()
+
+    with patch('chestra.plugins.http.httpx', None), patch('requests.Session.request') as mock_request:
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.text = "OK"
+        mock_response.url = "https://example.com"
+        mock_response.headers = {}
+        mock_response.json.return_value = {"ok": True}
+        mock_response.raise_for_status.return_value = None
+
+        mock_request.return_value = mock_response
+
+        result = asyncio.run(plugin.execute_async({}, {"url": "https://example.com"}))
+        assert result["status_code"] == "200"
+        assert result["json_data"] == '{"ok": true}'
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler that counts the TCP connections the server accepted."""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    _CountingHandler.connections = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_plugin_reuses_pooled_connections(local_server):
+    """Test that repeated requests to one host share a keep-alive connection."""
+    plugin = HttpPlugin()
+    for _ in range(20):
+        result = plugin.execute({}, {"url": local_server})
+        assert result["json_data"] == '{"ok": true}'
+    plugin.close()
+    assert _CountingHandler.connections == 1
+
+
+def test_http_plugin_shares_one_session_and_pool_across_concurrent_tasks(local_server):
+    """Test that many concurrent requests to one host go through a single session, pool and a few connections."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    plugin = HttpPlugin()
+    with patch('chestra.plugins.http.requests.Session', wraps=requests.Session) as session_class:
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda _: plugin.execute({}, {"url": local_server}), range(200)))
+    assert all(result["status_code"] == "200" for result in results)
+    assert session_class.call_count == 1
+    [session] = plugin._sessions.values()
+    pools = session.get_adapter(local_server).poolmanager.pools
+    assert len(pools) == 1
+    plugin.close()
+    # One connection per concurrent task at most, each reused for the remaining requests
+    assert _CountingHandler.connections <= 4
+
+
+def test_http_plugin_keep_alive_disabled(local_server):
+    """Test that keep_alive: false opens a new connection per request."""
+    plugin = HttpPlugin()
+    for _ in range(5):
+        plugin.execute({}, {"url": local_server, "keep_alive": False})
+    plugin.close()
+    assert _CountingHandler.connections == 5
+
+
+
+def test_http_plugin_parses_json_only_when_declared():
+    """Test that json_data is only built when the task declares it as an output."""
+    plugin = HttpPlugin()
+
+    with patch('requests.Session.request') as mock_request:
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.text = '{"id": 1}'
+        mock_response.url = "https://example.com"
+        mock_response.headers = {}
+        mock_response.raise_for_status.return_value = None
+
+        mock_request.return_value = mock_response
+
+        result = plugin.execute({}, {"url": "https://example.com", "task_outputs": ["status_code", "data"]})
+        assert result == {"status_code": "200", "url": "https://example.com", "data": '{"id": 1}'}
+        mock_response.json.assert_not_called()
+
+
+def test_http_plugin_streams_body_to_file(local_server, tmp_path):
+    """Test that stream mode writes the body to disk and returns its path instead of the text."""
+    plugin = HttpPlugin()
+    target = tmp_path / "body.json"
+    result = plugin.execute({}, {
+        "url": local_server,
+        "stream_to": str(target),
+        "task_outputs": ["body_path", "body_size", "json_data"],
+    })
+    plugin.close()
+    assert "data" not in result
+    assert result["body_path"] == str(target)
+    assert result["body_size"] == str(len(b'{"ok": true}'))
+    assert target.read_bytes() == b'{"ok": true}'
+    assert result["json_data"] == '{"ok": true}'
+
+
+def test_http_plugin_max_bytes(local_server):
+    """Test that in-memory bodies larger than max_bytes are rejected."""
+    plugin = HttpPlugin()
+    assert plugin.execute({}, {"url": local_server, "max_bytes": 100})["data"] == '{"ok": true}'
+    with pytest.raises(RuntimeError, match="exceeds max_bytes"):
+        plugin.execute({}, {"url": local_server, "max_bytes": 4})
+    plugin.close()
+
+
+def test_http_plugin_records_latency_by_status(local_server):
+    def requests_with(status):
+        name = "chestra_http_request_duration_seconds_count"
+        return REGISTRY.get_sample_value(name, {"method": "GET", "status": status}) or 0
+
+    ok, failed = requests_with("200"), requests_with("error")
+    plugin = HttpPlugin()
+    plugin.execute({}, {"url": local_server})
+    with pytest.raises(RuntimeError, match="HTTP request failed"):
+        plugin.execute({}, {"url": "http://127.0.0.1:1/", "timeout": 1})
+    plugin.close()
+    assert requests_with("200") == ok + 1
+    assert requests_with("error") == failed + 1
+
+
+def test_http_plugin_removes_spool_file_when_request_fails(local_server, tmp_path):
+    """Test that a failed streamed request leaves no spool file behind, and a successful one keeps its body."""
+    plugin = HttpPlugin()
+    with pytest.raises(RuntimeError, match="HTTP request failed"):
+        plugin.execute({}, {"url": "http://127.0.0.1:1/", "timeout": 1, "stream": True, "spool_dir": str(tmp_path)})
+    assert list(tmp_path.iterdir()) == []
+    result = plugin.execute({}, {"url": local_server, "stream": True, "spool_dir": str(tmp_path),
+                                 "task_outputs": ["body_path"]})
+    plugin.close()
+    assert [str(p) for p in tmp_path.iterdir()] == [result["body_path"]]
+
+
+def test_http_plugin_async_retries_statuses_with_backoff():
+    """Test that the httpx path retries retry_statuses with the same backoff as the requests adapter."""
+    import asyncio
+    from unittest.mock import AsyncMock
+
+    responses = [Mock(status_code=503, aclose=AsyncMock()) for _ in range(3)] + [Mock(status_code=200)]
+    client = Mock(send=AsyncMock(side_effect=responses))
+    sleep = AsyncMock()
+    params = {"retries": 3, "backoff_factor": 0.5, "retry_statuses": [503]}
+    httpx_stub = Mock(HTTPError=type("HTTPError", (Exception,), {}))
+    with patch('chestra.plugins.http.httpx', httpx_stub), patch('chestra.plugins.http.asyncio.sleep', sleep):
+        response = asyncio.run(HttpPlugin()._send_async(
+            client, "GET", "https://example.com", {"follow_redirects": True, "timeout": 5}, params))
+        assert response is responses[-1]
+        assert [c.args[0] for c in sleep.await_args_list] == [0, 1.0, 2.0]
+        assert all(r.aclose.await_count == 1 for r in responses[:3])
+
+        # Out of retries: the last response is returned for raise_for_status() to report
+        client.send = AsyncMock(side_effect=[Mock(status_code=503, aclose=AsyncMock()) for _ in range(2)])
+        response = asyncio.run(HttpPlugin()._send_async(
+            client, "GET", "https://example.com", {"follow_redirects": True}, {"retries": 1}))
+        assert response.status_code == 503
+        assert client.send.await_count == 2
@@ -0,0 +1,131 @@
+import json
+import os
+import subprocess
+import sys
+
+import yaml
+
+from chestra.journal import RunJournal, prune_runs, read_journal
+from chestra.orchestrator import TaskOrchestrator
+
+STEP_PLUGIN = '''import os
+
+from chestra.orchestrator import TaskPlugin
+
+
+class StepPlugin(TaskPlugin):
+    def execute(self, env, params):
+        with open(params["log"], "a") as f:
+            f.write(params["task_name"] + "\\n")
+        if params.get("crash_unless") and not os.path.exists(params["crash_unless"]):
+            os._exit(3)
+        return {"DONE": params["task_name"]}
+'''
+
+
+def write_steps(tmp_path):
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir()
+    (plugins_dir / "step.py").write_text(STEP_PLUGIN)
+    log = str(tmp_path / "steps.log")
+    tasks = [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        {"name": "slow", "plugin": "step", "inputs": ["start.TRUE"], "outputs": ["DONE"], "params": {"log": log}},
+        {"name": "flaky", "plugin": "step", "inputs": ["slow.DONE"], "outputs": ["DONE"],
+         "params": {"log": log, "crash_unless": str(tmp_path / "fixed")}},
+        {"name": "last", "plugin": "step", "inputs": ["flaky.DONE"], "outputs": ["DONE"], "params": {"log": log}},
+    ]
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(yaml.safe_dump({"workflow": {"name": "Steps", "tasks": tasks}}))
+    return str(plugins_dir), str(workflow)
+
+
+def chestra_run(tmp_path, *args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run(
+        [sys.executable, "-m", "chestra", "run", "workflow.yaml", "--workflows", str(tmp_path),
+         "--plugins", str(tmp_path / "plugins"), *args],
+        capture_output=True, text=True, env=env, timeout=60,
+    )
+
+
+def test_interrupted_run_resumes_after_completed_tasks(tmp_path):
+    write_steps(tmp_path)
+    crashed = chestra_run(tmp_path, "--journal")
+    assert crashed.returncode == 3
+    run_id = crashed.stderr.split("--resume ")[1].split(")")[0]
+    (tmp_path / "fixed").touch()
+    resumed = chestra_run(tmp_path, "--resume", run_id)
+    assert resumed.returncode == 0, resumed.stderr
+    assert "2 tasks already completed" in resumed.stderr
+    # slow ran once; flaky ran in both processes
+    assert (tmp_path / "steps.log").read_text().split() == ["slow", "flaky", "flaky", "last"]
+    header, completed = read_journal(os.path.join(os.environ["CHESTRA_CACHE_DIR"], "runs", f"{run_id}.jsonl"))
+    assert header["run_id"] == run_id
+    assert list(completed) == ["start", "slow", "flaky", "last"]
+    assert completed["last"] == {"last.DONE": "last"}
+
+
+def test_runs_are_only_journaled_when_asked(tmp_path):
+    write_steps(tmp_path)
+    (tmp_path / "fixed").touch()
+    runs = os.path.join(os.environ["CHESTRA_CACHE_DIR"], "runs")
+    before = set(os.listdir(runs)) if os.path.isdir(runs) else set()
+    result = chestra_run(tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert "--resume" not in result.stderr
+    assert (set(os.listdir(runs)) if os.path.isdir(runs) else set()) == before
+
+
+def test_journal_records_completed_tasks_and_ignores_torn_lines(tmp_path):
+    plugins_dir, workflow = write_steps(tmp_path)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow)
+    journal = orchestrator.start_journal(directory=str(tmp_path))
+    (tmp_path / "fixed").touch()
+    orchestrator.run()
+    records = [json.loads(line) for line in open(journal.path)]
+    assert [r["type"] for r in records] == ["run", "task", "task", "task", "task", "end"]
+    assert records[-1]["completed"] is True
+
+    journal = RunJournal("torn", str(tmp_path / "torn.jsonl"))
+    journal.record("a", {"a.X": "1"})
+    journal.record("b", {"b.X": "2"})
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"type": "task", "task": "c", "outp')
+    assert list(read_journal(journal.path)[1]) == ["a", "b"]
+
+
+def test_prune_keeps_the_most_recently_written_journals(tmp_path):
+    # A resumed run keeps its (older) id but was written to last
+    for age, run_id in enumerate(["20240101-000000-aaaaaa", "20240103-000000-cccccc", "20240102-000000-bbbbbb"]):
+        path = tmp_path / f"{run_id}.jsonl"
+        path.write_text("{}\n")
+        os.utime(path, (1_000_000 - age, 1_000_000 - age))
+    prune_runs(str(tmp_path), keep=2)
+    kept = sorted(p.name for p in tmp_path.iterdir())
+    assert kept == ["20240101-000000-aaaaaa.jsonl", "20240103-000000-cccccc.jsonl"]
+
+
+def test_resume_after_a_torn_last_line_keeps_later_records(tmp_path):
+    plugins_dir, workflow = write_steps(tmp_path)
+    document = yaml.safe_load(open(workflow))
+    document["workflow"]["tasks"][3]["params"]["crash_unless"] = str(tmp_path / "fixed_last")
+    with open(workflow, "w") as f:
+        yaml.safe_dump(document, f)
+    crashed = chestra_run(tmp_path, "--journal")
+    assert crashed.returncode == 3
+    run_id = crashed.stderr.split("--resume ")[1].split(")")[0]
+    path = os.path.join(os.environ["CHESTRA_CACHE_DIR"], "runs", f"{run_id}.jsonl")
+    with open(path, "a") as f:
+        f.write('{"type":"task","task":"fla')
+    (tmp_path / "fixed").touch()
+    crashed_again = chestra_run(tmp_path, "--resume", run_id)
+    assert crashed_again.returncode == 3
+    assert list(read_journal(path)[1]) == ["start", "slow", "flaky"]
+    (tmp_path / "fixed_last").touch()
+    resumed = chestra_run(tmp_path, "--resume", run_id)
+    assert resumed.returncode == 0, resumed.stderr
+    assert "3 tasks already completed" in resumed.stderr
+    assert (tmp_path / "steps.log").read_text().split() == ["slow", "flaky", "flaky", "last", "last"]
@@ -0,0 +1,139 @@
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+import yaml
+
+from chestra import log
+from chestra.orchestrator import TaskOrchestrator
+
+
+@pytest.fixture
+def stream():
+    output = io.StringIO()
+    log.configure(logging.DEBUG, format="json", stream=output)
+    yield output
+    log.shutdown()
+
+
+def records(output):
+    log.shutdown()
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_clip_truncates_only_when_formatted():
+    assert str(log.clip("x" * 10, limit=4)) == "xxxx... [6 more characters]"
+    assert str(log.clip("short", limit=10)) == "short"
+    assert repr(log.clip({"a": "b" * 10}, limit=5)) == "{'a':... [14 more characters]"
+
+
+def test_json_lines_carry_task_and_run_id(stream):
+    logger = log.get_logger("chestra.test")
+    logger.info("outside")
+    with log.log_context(run_id="run-1"), log.log_context(task="fetch"):
+        logger.warning("fetched %d rows", 3)
+    [outside, inside] = records(stream)
+    assert outside["message"] == "outside" and "task" not in outside
+    assert inside == {**inside, "level": "WARNING", "logger": "chestra.test", "message": "fetched 3 rows",
+                      "task": "fetch", "run_id": "run-1"}
+
+
+def test_records_from_threads_are_all_written_on_shutdown(stream):
+    logger = log.get_logger("chestra.test")
+
+    def work(n):
+        with log.log_context(task=f"t{n}"):
+            for i in range(200):
+                logger.debug("line %d", i)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    written = records(stream)
+    assert len(written) == 800
+    assert {r["task"] for r in written} == {"t0", "t1", "t2", "t3"}
+
+
+def test_messages_below_the_level_are_never_formatted():
+    output = io.StringIO()
+    log.configure(logging.INFO, stream=output)
+
+    class Loud:
+        def __str__(self):
+            raise AssertionError("formatted")
+
+    log.get_logger("chestra.test").debug("value %s", Loud())
+    log.shutdown()
+    assert output.getvalue() == ""
+
+
+def test_configure_appends_text_to_a_file(tmp_path):
+    path = tmp_path / "chestra.log"
+    path.write_text("earlier\n")
+    log.configure(path=str(path))
+    log.get_logger("chestra.test").info("ran %s", "a")
+    log.shutdown()
+    lines = path.read_text().splitlines()
+    assert lines[0] == "earlier"
+    assert lines[1].endswith(" INFO chestra.test ran a")
+    with pytest.raises(ValueError, match="log format"):
+        log.configure(format="xml")
+
+
+def test_user_plugin_loggers_share_the_pipeline(stream):
+    logger = log.get_logger("my_plugins.etl")
+    logger.info("from a plugin")
+    assert [r["logger"] for r in records(stream)] == ["my_plugins.etl"]
+
+
+def test_task_logs_are_tagged_with_the_task(tmp_path, stream):
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(yaml.safe_dump({"workflow": {"name": "Test", "tasks": [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        {"name": "greet", "plugin": "cmd", "inputs": ["start.TRUE"], "outputs": ["OUT"],
+         "params": {"command": "echo OUT=hi"}},
+    ]}}))
+    orchestrator = TaskOrchestrator(plugins_dir=str(tmp_path))
+    orchestrator.load_workflow(str(workflow))
+    orchestrator.run()
+    executing = [r for r in records(stream) if r["message"].startswith("Executing task: greet")]
+    assert executing and executing[0]["task"] == "greet"
+    assert executing[0]["run_id"] == orchestrator._run_id()
+
+
+def test_importing_chestra_leaves_the_host_logging_alone(tmp_path):
+    script = (
+        "import logging, sys\n"
+        "logging.basicConfig(stream=sys.stdout, level=logging.INFO, format='%(process)d:%(lineno)d %(message)s')\n"
+        "import chestra.orchestrator\n"
+        "from chestra.log import get_logger\n"
+        "chestra.orchestrator.logger.info('from chestra')\n"
+        "get_logger('my_plugins.etl').info('from a plugin')\n"
+    )
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            env={**os.environ, "PYTHONPATH": src})
+    pid = result.stdout.split(":", 1)[0]
+    assert result.stdout.splitlines() == [f"{pid}:5 from chestra", f"{pid}:6 from a plugin"]
+
+
+def test_shutdown_restores_the_logging_state():
+    root = logging.getLogger("chestra")
+    plugin = log.get_logger("my_plugins.restore")
+    before = (logging._srcfile, logging.logProcesses, root.propagate, root.level, plugin.propagate, plugin.level)
+    log.configure(logging.DEBUG, stream=io.StringIO())
+    assert (logging._srcfile, root.propagate, plugin.propagate, plugin.level) == (None, False, False, logging.DEBUG)
+    assert log.settings() is None
+    log.configure(logging.DEBUG, path=os.devnull)
+    assert log.settings() == {"level": logging.DEBUG, "format": "text", "path": os.devnull}
+    log.shutdown()
+    assert (logging._srcfile, logging.logProcesses, root.propagate, root.level, plugin.propagate, plugin.level) \
+        == before
+    assert log.settings() is None
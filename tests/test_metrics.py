@@ -0,0 +1,174 @@
+import threading
+import urllib.request
+
+import pytest
+import yaml
+
+from chestra.auth import PermissionCache
+from chestra.metrics import REGISTRY, Metric, Registry, TextfileWriter, _Sharded, serve
+from chestra.orchestrator import TaskOrchestrator
+
+
+def test_exposition_format():
+    registry = Registry()
+    registry.counter("jobs_total", "Jobs run", ["queue"]).labels("fast").inc(3)
+    registry.gauge("depth", "Queue depth").set(2.5)
+    registry.counter("escaped_total", 'Help with a \\ and\nnewline', ["path"]).labels(path='a"b\\c').inc()
+    assert registry.exposition() == (
+        "# HELP depth Queue depth\n"
+        "# TYPE depth gauge\n"
+        "depth 2.5\n"
+        "# HELP escaped_total Help with a \\\\ and\\nnewline\n"
+        "# TYPE escaped_total counter\n"
+        'escaped_total{path="a\\"b\\\\c"} 1\n'
+        "# HELP jobs_total Jobs run\n"
+        "# TYPE jobs_total counter\n"
+        'jobs_total{queue="fast"} 3\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=[0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 5.0):
+        latency.observe(value)
+    lines = registry.exposition().splitlines()[2:]
+    assert lines == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 5.65",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_threads_aggregate_into_one_total():
+    registry = Registry()
+    counter = registry.counter("work_total", "Work done", ["kind"])
+    histogram = registry.histogram("work_seconds", "Work time")
+    barrier = threading.Barrier(8)
+
+    def work():
+        barrier.wait()
+        for _ in range(1000):
+            counter.labels("a").inc()
+            histogram.observe(0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Shards of the exited threads are folded once, then kept
+    for _ in range(2):
+        assert registry.get_sample_value("work_total", {"kind": "a"}) == 8000
+        assert registry.get_sample_value("work_seconds_count") == 8000
+    assert counter._shards == []
+
+
+def test_registry_rejects_conflicts_and_bad_labels():
+    registry = Registry()
+    counter = registry.counter("things_total", "Things", ["kind"])
+    assert registry.counter("things_total", "Things", ["kind"]) is counter
+    with pytest.raises(ValueError, match="already registered"):
+        registry.gauge("things_total", "Things", ["kind"])
+    with pytest.raises(ValueError, match="use labels"):
+        counter.inc()
+    with pytest.raises(ValueError, match="expected labels"):
+        counter.labels("a", "b")
+    with pytest.raises(ValueError, match="missing label"):
+        counter.labels(other="a")
+    with pytest.raises(ValueError, match="only increase"):
+        counter.labels("a").inc(-1)
+    with pytest.raises(ValueError, match="Invalid metric name"):
+        registry.counter("bad-name", "Bad")
+    assert counter.labels(kind="a") is counter.labels("a")
+
+
+def test_textfile_writer(tmp_path):
+    registry = Registry()
+    counter = registry.counter("ticks_total", "Ticks")
+    path = tmp_path / "chestra.prom"
+    writer = TextfileWriter(str(path), interval=60, registry=registry)
+    writer.start()
+    assert "ticks_total 0\n" in path.read_text()
+    counter.inc()
+    writer.close()
+    assert "ticks_total 1\n" in path.read_text()
+    assert [p.name for p in tmp_path.iterdir()] == ["chestra.prom"]
+
+
+def test_serve_over_http():
+    registry = Registry()
+    registry.gauge("up", "Up").set(1)
+    server = serve(0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "up 1\n" in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_orchestrator_records_task_metrics(tmp_path):
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(yaml.safe_dump({"workflow": {"name": "Test", "tasks": [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        {"name": "ok", "plugin": "cmd", "inputs": ["start.TRUE"], "outputs": ["OUT"],
+         "params": {"command": "printf 'OUT=h\\303\\251llo\\n'"}},
+        {"name": "bad", "plugin": "cmd", "inputs": ["start.TRUE"], "outputs": ["OUT"],
+         "params": {"command": "echo nothing"}},
+    ]}}))
+
+    def value(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    started = value("chestra_tasks_started_total", plugin="cmd")
+    succeeded = value("chestra_tasks_succeeded_total", plugin="cmd")
+    failed = value("chestra_tasks_failed_total", plugin="cmd")
+    durations = value("chestra_task_duration_seconds_count", plugin="cmd")
+    orchestrator = TaskOrchestrator(plugins_dir=str(tmp_path))
+    orchestrator.load_workflow(str(workflow))
+    orchestrator.run()
+    assert value("chestra_tasks_started_total", plugin="cmd") == started + 2
+    assert value("chestra_tasks_succeeded_total", plugin="cmd") == succeeded + 1
+    assert value("chestra_tasks_failed_total", plugin="cmd") == failed + 1
+    assert value("chestra_task_duration_seconds_count", plugin="cmd") == durations + 2
+    assert value("chestra_env_bytes") == len("start.TRUE") + len("ok.OUT") + len("héllo".encode()) + 1
+    assert value("chestra_worker_pool_size") == 8
+
+
+def test_permission_cache_counts_lookups():
+    def lookups(result):
+        return REGISTRY.get_sample_value("chestra_auth_lookups_total", {"result": result}) or 0
+
+    misses, hits, errors = lookups("miss"), lookups("hit"), lookups("error")
+    cache = PermissionCache(lambda token: {"read": token == "good"})
+    cache.get("good")
+    cache.get("good")
+    failing = PermissionCache(lambda token: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        failing.get("bad")
+    assert lookups("miss") == misses + 2
+    assert lookups("hit") == hits + 1
+    assert lookups("error") == errors + 1
+
+
+def test_metric_types_must_implement_the_abstract_methods():
+    class Incomplete(Metric):
+        def _child(self, key):
+            return None
+
+    class IncompleteSharded(_Sharded):
+        def samples(self):
+            return []
+
+        def _child(self, key):
+            return None
+
+    with pytest.raises(TypeError, match="samples"):
+        Incomplete("incomplete", "Missing samples()")
+    with pytest.raises(TypeError, match="_add"):
+        IncompleteSharded("incomplete_sharded", "Missing _add()")
@@ -0,0 +1,381 @@
+import json
+import os
+import time
+
+import pytest
+import yaml
+
+from chestra.orchestrator import TaskOrchestrator
+
+PASS_PLUGIN = '''from typing import Any, Dict
+
+from chestra.orchestrator import TaskPlugin
+
+
+class PassPlugin(TaskPlugin):
+    """Plugin that emits TRUE immediately."""
+    def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        return {"TRUE": "1"}
+'''
+
+
+SLEEP_PLUGIN = '''import time
+from typing import Any, Dict
+
+from chestra.orchestrator import TaskPlugin
+
+
+class SleepPlugin(TaskPlugin):
+    """Plugin that blocks for params['seconds'] and emits TRUE."""
+    def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        time.sleep(float(params.get("seconds", 0.05)))
+        return {"TRUE": "1"}
+'''
+
+
+def write_workflow(tmp_path, tasks, **options):
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir(exist_ok=True)
+    (plugins_dir / "pass.py").write_text(PASS_PLUGIN)
+    (plugins_dir / "sleep.py").write_text(SLEEP_PLUGIN)
+    workflow_path = tmp_path / "workflow.yaml"
+    workflow_path.write_text(yaml.safe_dump({"workflow": {"name": "Test", **options, "tasks": tasks}}))
+    return str(plugins_dir), str(workflow_path)
+
+
+def chain(length):
+    tasks = [{"name": "t0", "plugin": "start", "outputs": ["TRUE"]}]
+    for i in range(1, length):
+        tasks.append({"name": f"t{i}", "plugin": "pass", "inputs": [f"t{i - 1}.TRUE"], "outputs": ["TRUE"]})
+    return tasks
+
+
+def test_chain_runs_without_polling_delay(tmp_path):
+    plugins_dir, workflow_path = write_workflow(tmp_path, chain(30))
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow_path)
+    started = time.perf_counter()
+    orchestrator.run()
+    elapsed = time.perf_counter() - started
+    assert all(task.completed for task in orchestrator.tasks)
+    assert orchestrator.env["t29.TRUE"] == "1"
+    # The old 100 ms polling loop needed at least 3 s for a 30 task chain
+    assert elapsed < 1.5
+
+
+def test_stuck_workflow_is_detected(tmp_path):
+    tasks = chain(2) + [{"name": "orphan", "plugin": "pass", "inputs": ["t1.MISSING"], "outputs": ["TRUE"]}]
+    plugins_dir, workflow_path = write_workflow(tmp_path, tasks)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow_path, validate=False)
+    orchestrator.run()
+    assert orchestrator.env["t1.TRUE"] == "1"
+    assert not next(t for t in orchestrator.tasks if t.name == "orphan").completed
+
+
+@pytest.mark.parametrize("engine", ["thread", "async"])
+def test_run_cleans_up_when_the_scheduler_raises(tmp_path, monkeypatch, engine):
+    plugins_dir, workflow_path = write_workflow(tmp_path, chain(3), engine=engine)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow_path)
+    (tmp_path / "runs").mkdir()
+    journal = orchestrator.start_journal(directory=str(tmp_path / "runs"))
+    closed = []
+    monkeypatch.setattr(orchestrator.plugin_manager, "close", lambda: closed.append("close"))
+
+    async def aclose():
+        closed.append("aclose")
+
+    monkeypatch.setattr(orchestrator.plugin_manager, "aclose", aclose)
+
+    def fail(task, result):
+        raise RuntimeError("merge failed")
+
+    monkeypatch.setattr(orchestrator, "_complete_task", fail)
+    with pytest.raises(RuntimeError, match="merge failed"):
+        orchestrator.run()
+    assert closed == ["aclose" if engine == "async" else "close"]
+    assert orchestrator.stats.makespan > 0
+    with open(journal.path) as f:
+        end = json.loads(f.read().splitlines()[-1])
+    assert (end["type"], end["completed"]) == ("end", False)
+
+
+def test_consumers_are_released_when_last_input_arrives(tmp_path):
+    tasks = chain(1) + [
+        {"name": "left", "plugin": "pass", "inputs": ["t0.TRUE"], "outputs": ["TRUE"]},
+        {"name": "right", "plugin": "pass", "inputs": ["t0.TRUE"], "outputs": ["TRUE"]},
+        {"name": "join", "plugin": "pass", "inputs": ["left.TRUE", "right.TRUE"], "outputs": ["TRUE"]},
+    ]
+    plugins_dir, workflow_path = write_workflow(tmp_path, tasks)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow_path)
+    assert [t.name for t in orchestrator.consumers["t0.TRUE"]] == ["left", "right"]
+    orchestrator.run()
+    join = next(t for t in orchestrator.tasks if t.name == "join")
+    assert join.completed
+    assert join.pending_inputs == 0
+    assert orchestrator.env["join.TRUE"] == "1"
+
+
+def test_wide_fan_out_schedules_in_linear_time(tmp_path):
+    tasks = chain(1) + [
+        {"name": f"leaf{i}", "plugin": "pass", "inputs": ["t0.TRUE"], "outputs": ["TRUE"]} for i in range(2000)
+    ]
+    plugins_dir, workflow_path = write_workflow(tmp_path, tasks)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow_path)
+    orchestrator.run()
+    assert all(task.completed for task in orchestrator.tasks)
+
+
+def fan_out(width, seconds=0.05):
+    return chain(1) + [
+        {"name": f"leaf{i}", "plugin": "sleep", "inputs": ["t0.TRUE"], "outputs": ["TRUE"],
+         "params": {"seconds": seconds}}
+        for i in range(width)
+    ]
+
+
+def test_workers_from_workflow_limits_concurrency(tmp_path):
+    plugins_dir, workflow_path = write_workflow(tmp_path, fan_out(6), workers=2)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow_path)
+    orchestrator.run()
+    assert orchestrator.stats.peak_running == 2
+    assert orchestrator.stats.tasks == 7
+    assert orchestrator.stats.queue_wait_max > 0.04
+
+
+def test_workers_argument_overrides_workflow(tmp_path):
+    plugins_dir, workflow_path = write_workflow(tmp_path, fan_out(20), workers=2)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir, workers="20")
+    orchestrator.load_workflow(workflow_path)
+    orchestrator.run()
+    assert orchestrator.stats.peak_running == 20
+
+
+def test_adaptive_workers_grow_for_blocking_tasks(tmp_path):
+    plugins_dir, workflow_path = write_workflow(tmp_path, fan_out(200, seconds=0.02), workers="auto")
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow_path)
+    orchestrator.run()
+    assert all(task.completed for task in orchestrator.tasks)
+    assert orchestrator.stats.peak_workers > 8
+
+
+def test_invalid_workers_value_is_rejected():
+    with pytest.raises(ValueError, match="Invalid workers value"):
+        TaskOrchestrator(workers="many")
+
+
+ASYNC_SLEEP_PLUGIN = '''import asyncio
+from typing import Any, Dict
+
+from chestra.orchestrator import TaskPlugin
+
+
+class AsyncSleepPlugin(TaskPlugin):
+    """Plugin that awaits params['seconds'] on the event loop and emits TRUE."""
+    def execute(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        return asyncio.run(self.execute_async(env, params))
+
+    async def execute_async(self, env: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        await asyncio.sleep(float(params.get("seconds", 0.05)))
+        return {"TRUE": "1"}
+'''
+
+
+def test_async_engine_runs_io_tasks_without_threads(tmp_path):
+    tasks = chain(1) + [
+        {"name": f"wait{i}", "plugin": "async_sleep", "inputs": ["t0.TRUE"], "outputs": ["TRUE"],
+         "params": {"seconds": 0.3}}
+        for i in range(500)
+    ]
+    tasks.append({"name": "sync", "plugin": "sleep", "inputs": ["wait0.TRUE"], "outputs": ["TRUE"]})
+    plugins_dir, workflow_path = write_workflow(tmp_path, tasks, engine="async", workers=2)
+    (tmp_path / "plugins" / "async_sleep.py").write_text(ASYNC_SLEEP_PLUGIN)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow_path)
+    started = time.perf_counter()
+    orchestrator.run()
+    assert all(task.completed for task in orchestrator.tasks)
+    assert orchestrator.env["sync.TRUE"] == "1"
+    # 500 waits of 0.3 s with only 2 worker threads must still overlap on the event loop
+    assert time.perf_counter() - started < 3
+    assert orchestrator.stats.peak_running >= 500
+
+
+def test_async_engine_runs_cmd_natively(tmp_path):
+    tasks = chain(1) + [
+        {"name": "echo", "plugin": "cmd", "inputs": ["t0.TRUE"], "outputs": ["ECHOED"],
+         "params": {"command": "echo ECHOED=$t0.TRUE"}}
+    ]
+    plugins_dir, workflow_path = write_workflow(tmp_path, tasks)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir, engine="async")
+    orchestrator.load_workflow(workflow_path)
+    orchestrator.run()
+    assert orchestrator.env["echo.ECHOED"] == "1"
+
+
+ENV_PROBE_PLUGIN = '''from chestra.orchestrator import TaskPlugin
+
+
+class EnvProbePlugin(TaskPlugin):
+    def execute(self, env, params):
+        env["scratch"] = params["task_name"]
+        return {"SEEN": ",".join(sorted(k for k in env if not k.startswith("_")))}
+'''
+
+
+def test_tasks_get_isolated_env_views(tmp_path):
+    plugins_dir, workflow = write_workflow(tmp_path, [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        {"name": "a", "plugin": "env_probe", "inputs": ["start.TRUE"], "outputs": ["SEEN"]},
+        {"name": "b", "plugin": "env_probe", "inputs": ["a.SEEN"], "outputs": ["SEEN"]},
+    ])
+    (tmp_path / "plugins" / "env_probe.py").write_text(ENV_PROBE_PLUGIN)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow)
+    orchestrator.run()
+    assert orchestrator.env["a.SEEN"] == "scratch,start.TRUE"
+    assert orchestrator.env["b.SEEN"] == "a.SEEN,scratch,start.TRUE"
+    assert "scratch" not in orchestrator.env
+    assert "_permissions" not in orchestrator.env
+
+
+def test_scoped_env_passes_only_declared_inputs(tmp_path):
+    plugins_dir, workflow = write_workflow(tmp_path, [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        {"name": "other", "plugin": "pass", "inputs": ["start.TRUE"], "outputs": ["TRUE"]},
+        {"name": "a", "plugin": "env_probe", "inputs": ["other.TRUE"], "outputs": ["SEEN"]},
+        {"name": "b", "plugin": "env_probe", "inputs": ["a.SEEN"], "outputs": ["SEEN"], "scoped_env": False},
+    ], scoped_env=True)
+    (tmp_path / "plugins" / "env_probe.py").write_text(ENV_PROBE_PLUGIN)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.env["AUTH_TOKEN"] = "secret"
+    orchestrator.load_workflow(workflow)
+    orchestrator.run()
+    assert orchestrator.env["a.SEEN"] == "AUTH_TOKEN,other.TRUE,scratch"
+    assert orchestrator.env["b.SEEN"] == "AUTH_TOKEN,a.SEEN,other.TRUE,scratch,start.TRUE"
+
+
+STATEFUL_PLUGIN = '''import threading
+import time
+
+from chestra.orchestrator import TaskPlugin
+
+created = []
+overlaps = []
+
+
+class StatefulPlugin(TaskPlugin):
+    CONCURRENCY = {concurrency!r}
+    POOL_SIZE = 2
+
+    def __init__(self):
+        created.append(self)
+        self.busy = False
+
+    def execute(self, env, params):
+        if self.busy:
+            overlaps.append(params["task_name"])
+        self.busy = True
+        time.sleep(0.05)
+        self.busy = False
+        return {{"TRUE": str(id(self))}}
+'''
+
+
+def run_stateful(tmp_path, concurrency, width=6, engine=None):
+    plugins_dir, workflow = write_workflow(tmp_path, [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        *({"name": f"s{i}", "plugin": "stateful", "inputs": ["start.TRUE"], "outputs": ["TRUE"]} for i in range(width)),
+    ])
+    (tmp_path / "plugins" / "stateful.py").write_text(STATEFUL_PLUGIN.format(concurrency=concurrency))
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir, workers=width, engine=engine)
+    orchestrator.load_workflow(workflow)
+    orchestrator.run()
+    plugin_globals = type(orchestrator.plugin_manager.instances()[-1]).__init__.__globals__
+    instances = {orchestrator.env[f"s{i}.TRUE"] for i in range(width)}
+    return plugin_globals, instances
+
+
+def test_shared_plugins_serve_every_task_from_one_instance(tmp_path):
+    plugin_globals, instances = run_stateful(tmp_path, "shared")
+    assert len(plugin_globals["created"]) == len(instances) == 1
+    assert plugin_globals["overlaps"]
+
+
+def test_per_task_plugins_get_their_own_instance(tmp_path):
+    plugin_globals, instances = run_stateful(tmp_path, "per_task")
+    assert len(plugin_globals["created"]) == len(instances) == 6
+    assert plugin_globals["overlaps"] == []
+
+
+@pytest.mark.parametrize("engine", ["thread", "async"])
+def test_pooled_plugins_are_bounded_and_reused(tmp_path, engine):
+    plugin_globals, instances = run_stateful(tmp_path, "pooled", engine=engine)
+    assert len(plugin_globals["created"]) == len(instances) == 2
+    assert plugin_globals["overlaps"] == []
+
+
+def test_unknown_concurrency_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="CONCURRENCY"):
+        run_stateful(tmp_path, "sometimes")
+
+
+CPU_PLUGIN = '''import os
+
+from chestra.orchestrator import TaskPlugin
+
+
+class CpuPlugin(TaskPlugin):
+    EXECUTOR = "process"
+
+    def execute(self, env, params):
+        total = sum(i * i for i in range(params.get("n", 1000)))
+        return {"PID": str(os.getpid()), "TOTAL": str(total), "UNDECLARED": "x" * 1000}
+'''
+
+PID_PLUGIN = '''import os
+
+from chestra.orchestrator import TaskPlugin
+
+
+class PidPlugin(TaskPlugin):
+    def execute(self, env, params):
+        return {"PID": str(os.getpid()), "SEEN": ",".join(sorted(k for k in env if not k.startswith("_")))}
+'''
+
+
+@pytest.mark.parametrize("engine", ["thread", "async"])
+def test_process_executor_runs_beside_threads(tmp_path, engine):
+    plugins_dir, workflow = write_workflow(tmp_path, [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        {"name": "a", "plugin": "cpu", "inputs": ["start.TRUE"], "outputs": ["PID", "TOTAL"], "params": {"n": 10}},
+        {"name": "b", "plugin": "cpu", "inputs": ["start.TRUE"], "outputs": ["PID"], "executor": "thread"},
+        {"name": "c", "plugin": "pid", "inputs": ["a.TOTAL"], "outputs": ["PID", "SEEN"], "executor": "process"},
+        {"name": "d", "plugin": "pid", "inputs": ["c.SEEN", "b.PID"], "outputs": ["PID"]},
+    ], process_workers=2)
+    (tmp_path / "plugins" / "cpu.py").write_text(CPU_PLUGIN)
+    (tmp_path / "plugins" / "pid.py").write_text(PID_PLUGIN)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir, engine=engine)
+    orchestrator.load_workflow(workflow)
+    orchestrator.run()
+    parent = str(os.getpid())
+    assert orchestrator.env["a.TOTAL"] == str(sum(i * i for i in range(10)))
+    assert "a.UNDECLARED" not in orchestrator.env
+    assert orchestrator.env["a.PID"] != parent
+    assert orchestrator.env["c.PID"] != parent
+    assert {"a.PID", "a.TOTAL", "start.TRUE"} <= set(orchestrator.env["c.SEEN"].split(","))
+    assert orchestrator.env["b.PID"] == parent
+    assert orchestrator.env["d.PID"] == parent
+
+
+def test_unknown_executor_is_rejected(tmp_path):
+    plugins_dir, workflow = write_workflow(tmp_path, [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"], "executor": "gpu"},
+    ])
+    with pytest.raises(ValueError, match="executor"):
+        TaskOrchestrator(plugins_dir=plugins_dir).load_workflow(workflow)
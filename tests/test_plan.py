@@ -0,0 +1,129 @@
+import os
+
+import pytest
+import yaml
+
+from chestra import plan
+from chestra.cli import generate_plantuml
+from chestra.orchestrator import TaskOrchestrator
+from chestra.plan import compile_workflow, load_plan
+
+TASKS = [
+    {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+    {"name": "a", "plugin": "cmd", "inputs": ["start.TRUE"], "outputs": ["OUT"],
+     "params": {"command": "echo OUT=1"}, "cache": True, "cache_ttl": 60},
+    {"name": "b", "plugin": "cmd", "inputs": ["start.TRUE", "a.OUT", "a.OUT"], "outputs": ["OUT"],
+     "params": {"command": "echo OUT=2"}, "scoped_env": False},
+    {"name": "end", "plugin": "end", "inputs": ["a.OUT", "b.OUT"]},
+]
+
+
+def write_workflow(tmp_path, tasks=TASKS, **options):
+    path = tmp_path / "workflow.yaml"
+    path.write_text(yaml.safe_dump({"workflow": {"name": "Test", **options, "tasks": tasks}}))
+    return str(path)
+
+
+def test_compile_indexes_plugins_and_edges():
+    compiled = compile_workflow({"workflow": {"name": "Test", "scoped_env": True, "tasks": TASKS}})
+    assert compiled.options == {"name": "Test", "scoped_env": True}
+    assert compiled.plugins == ["start", "cmd", "end"]
+    assert [t.plugin for t in compiled.tasks] == [0, 1, 1, 2]
+    assert compiled.consumers == {"start.TRUE": [1, 2], "a.OUT": [2, 3], "b.OUT": [3]}
+    a = compiled.tasks[1]
+    assert a.params == {"command": "echo OUT=1", "task_name": "a", "task_outputs": ["OUT"]}
+    assert (a.cache, a.cache_ttl, a.scoped_env) == (True, 60, None)
+    assert TASKS[1]["params"] == {"command": "echo OUT=1"}
+
+
+def test_compile_rejects_duplicate_names():
+    with pytest.raises(ValueError, match="Duplicate task name: start"):
+        compile_workflow({"workflow": {"tasks": [TASKS[0], TASKS[0]]}})
+
+
+def test_unchanged_workflow_is_not_parsed_again(tmp_path, monkeypatch):
+    path = write_workflow(tmp_path)
+    first = load_plan(path, directory=str(tmp_path / "plans"))
+
+    def fail(source):
+        raise AssertionError("parsed")
+
+    monkeypatch.setattr(plan, "load_yaml", fail)
+    assert load_plan(path, directory=str(tmp_path / "plans")) == first
+    with open(path, "a") as f:
+        f.write("# edited\n")
+    with pytest.raises(AssertionError, match="parsed"):
+        load_plan(path, directory=str(tmp_path / "plans"))
+
+
+def test_plans_are_keyed_by_chestra_version(tmp_path, monkeypatch):
+    path = write_workflow(tmp_path)
+    load_plan(path, directory=str(tmp_path / "plans"))
+    monkeypatch.setattr(plan, "__version__", "99.0")
+    load_plan(path, directory=str(tmp_path / "plans"))
+    assert len(os.listdir(tmp_path / "plans")) == 2
+
+
+def test_unreadable_plan_is_recompiled(tmp_path):
+    path = write_workflow(tmp_path)
+    directory = tmp_path / "plans"
+    expected = load_plan(path, directory=str(directory))
+    [cached] = directory.iterdir()
+    cached.write_bytes(b"not a pickle")
+    assert load_plan(path, directory=str(directory)) == expected
+    assert load_plan(path, directory=str(directory)) == expected
+
+
+def test_failed_plan_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    directory = tmp_path / "plans"
+    load_plan(write_workflow(tmp_path), directory=str(directory))
+    assert list(directory.iterdir()) == []
+
+
+def test_cache_keeps_the_most_recent_plans(tmp_path, monkeypatch):
+    monkeypatch.setattr(plan, "MAX_CACHED_PLANS", 2)
+    directory = tmp_path / "plans"
+    for n in range(4):
+        load_plan(write_workflow(tmp_path, TASKS[:1], version=n), directory=str(directory))
+    assert len(list(directory.iterdir())) == 2
+    load_plan(write_workflow(tmp_path, TASKS[:1], version=3), cache=False, directory=str(directory))
+    assert len(list(directory.iterdir())) == 2
+
+
+def test_orchestrator_builds_the_same_tasks_from_a_cached_plan(tmp_path):
+    path = write_workflow(tmp_path, scoped_env=True)
+    loaded = []
+    for _ in range(2):
+        orchestrator = TaskOrchestrator(plugins_dir=str(tmp_path))
+        orchestrator.load_workflow(path)
+        loaded.append(orchestrator)
+    assert os.listdir(os.path.join(os.environ["CHESTRA_CACHE_DIR"], "plans"))
+    for first, second in zip(loaded[0].tasks, loaded[1].tasks):
+        assert vars(first).keys() == vars(second).keys()
+        assert (first.name, first.plugin_name, first.inputs, first.params, first.scoped_env, first.cache_ttl) == \
+               (second.name, second.plugin_name, second.inputs, second.params, second.scoped_env, second.cache_ttl)
+    start, a, b, end = loaded[1].tasks
+    assert (a.scoped_env, b.scoped_env) == (True, False)
+    assert a.result_cache is not None and a.cache_ttl == 60 and b.result_cache is None
+    assert [t.name for t in loaded[1].consumers["a.OUT"]] == ["b", "end"]
+    loaded[1].run()
+    assert end.completed
+
+
+def test_missing_plugin_is_reported(tmp_path):
+    path = write_workflow(tmp_path, TASKS + [{"name": "x", "plugin": "nope", "inputs": ["a.OUT"]}])
+    orchestrator = TaskOrchestrator(plugins_dir=str(tmp_path))
+    with pytest.raises(KeyError, match="Plugin nope not found"):
+        orchestrator.load_workflow(path, plan_cache=False)
+
+
+def test_plantuml_from_plan(tmp_path):
+    output = tmp_path / "workflow.puml"
+    generate_plantuml(write_workflow(tmp_path), str(output))
+    lines = output.read_text().splitlines()
+    assert lines[:2] == ["@startuml", "title Test"]
+    assert "[a] --> [b] : OUT" in lines and "[b] --> [end] : OUT" in lines
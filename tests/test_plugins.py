@@ -1,4 +1,11 @@
-from chestra.orchestrator import TaskOrchestrator
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from chestra import plugin_index
+from chestra.orchestrator import PluginManager, TaskOrchestrator
+from chestra.plugin_index import PluginIndex
 from chestra.plugins.df import DfPlugin
 from chestra.plugins.start import StartPlugin
 
@@ -22,3 +29,122 @@ def test_df_plugin_with_permissions():
     result = plugin.execute(env, {})
     assert "MAIN_VOLUME" in result
     assert "FREE_SPACE" in result
+
+
+def write_plugins(directory):
+    directory.mkdir(exist_ok=True)
+    (directory / "hello.py").write_text(
+        "from chestra.orchestrator import TaskPlugin\n\n"
+        "class HelloPlugin(TaskPlugin):\n"
+        "    def execute(self, env, params):\n"
+        "        return {'HELLO': '1'}\n"
+    )
+    (directory / "hello_test.py").write_text("raise RuntimeError('test modules must not be imported')\n")
+    (directory / "broken.py").write_text("raise RuntimeError('only imported when used')\n\nclass BrokenPlugin: pass\n")
+    (directory / "nothing.py").write_text("x = 1\n")
+
+
+def test_only_referenced_plugins_are_imported(tmp_path):
+    plugins_dir = tmp_path / "plugins"
+    write_plugins(plugins_dir)
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(
+        'workflow:\n  tasks:\n'
+        '    - {name: start, plugin: start, outputs: ["TRUE"]}\n'
+        '    - {name: hello, plugin: hello, inputs: ["start.TRUE"], outputs: ["HELLO"]}\n'
+    )
+    orchestrator = TaskOrchestrator(plugins_dir=str(plugins_dir))
+    orchestrator.load_workflow(str(workflow))
+    assert orchestrator.plugin_manager.plugins == {}
+    assert {"cmd", "http", "broken"} <= set(orchestrator.plugin_manager.specs)
+    assert "hello_test" not in orchestrator.plugin_manager.specs
+    assert "nothing" not in orchestrator.plugin_manager.specs
+    orchestrator.run()
+    assert set(orchestrator.plugin_manager.plugins) == {"start", "hello"}
+    assert orchestrator.env["hello.HELLO"] == "1"
+
+
+def test_plugin_index_cache_is_reused_until_file_changes(tmp_path, monkeypatch):
+    plugins_dir = tmp_path / "plugins"
+    write_plugins(plugins_dir)
+    cache_path = str(tmp_path / "index.json")
+    index = PluginIndex(cache_path)
+    assert [spec.name for spec in index.scan(str(plugins_dir))] == ["broken", "hello"]
+    index.save()
+
+    parsed = []
+    monkeypatch.setattr(plugin_index, "_top_level_classes", lambda path: parsed.append(path) or ["NothingPlugin"])
+    index = PluginIndex(cache_path)
+    assert [spec.name for spec in index.scan(str(plugins_dir))] == ["broken", "hello"]
+    assert parsed == []
+    (plugins_dir / "nothing.py").write_text("class NothingPlugin: pass\n")
+    assert [spec.name for spec in index.scan(str(plugins_dir))] == ["broken", "hello", "nothing"]
+    assert parsed == [str(plugins_dir / "nothing.py")]
+
+
+def test_user_plugins_shadow_builtins(tmp_path):
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir()
+    (plugins_dir / "start.py").write_text(
+        "from chestra.orchestrator import TaskPlugin\n\n"
+        "class StartPlugin(TaskPlugin):\n"
+        "    def execute(self, env, params):\n"
+        "        return {'TRUE': 'custom'}\n"
+    )
+    manager = PluginManager()
+    manager.index_builtin_plugins()
+    manager.index_user_plugins(str(plugins_dir))
+    assert manager.get_plugin("start").execute({}, {}) == {"TRUE": "custom"}
+
+
+def test_shipped_manifest_is_up_to_date():
+    from chestra.manifest import build_manifest
+
+    manager = PluginManager()
+    manager.load_builtin_plugins()
+    with open(plugin_index.BUILTIN_MANIFEST) as f:
+        assert json.load(f) == build_manifest(manager)
+
+
+def test_builtins_resolve_from_manifest_without_importing(tmp_path, monkeypatch):
+    monkeypatch.setattr(plugin_index.PluginIndex, "scan", lambda *args, **kwargs: pytest.fail("scanned"))
+    manager = PluginManager(PluginIndex(str(tmp_path / "index.json")))
+    manager.index_builtin_plugins()
+    assert {"start", "end", "cmd", "http", "df", "changed"} <= set(manager.specs)
+    assert manager.specs["cmd"].module == "chestra.plugins.cmd"
+    assert manager.plugins == {}
+    assert manager.get_plugin("start").execute({}, {}) == {"TRUE": "1"}
+
+
+def test_entry_point_plugins(tmp_path, monkeypatch):
+    package = tmp_path / "ep_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "greet.py").write_text(
+        "from chestra.orchestrator import TaskPlugin\n\n"
+        "class Greeter(TaskPlugin):\n"
+        "    def execute(self, env, params):\n"
+        "        return {'GREETING': 'hi'}\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    entry_point = SimpleNamespace(name="greet", value="ep_pkg.greet:Greeter")
+    monkeypatch.setattr(plugin_index, "_entry_points", lambda group: [entry_point])
+    manager = PluginManager(PluginIndex(str(tmp_path / "index.json")))
+    manager.index_builtin_plugins()
+    manager.index_entry_point_plugins()
+    assert manager.specs["greet"] == plugin_index.PluginSpec("greet", "Greeter", None, "ep_pkg.greet")
+    assert manager.get_plugin("greet").execute({}, {}) == {"GREETING": "hi"}
+
+
+def test_manifest_round_trips(tmp_path):
+    from chestra.manifest import build_manifest, dump_manifest
+
+    plugins_dir = tmp_path / "plugins"
+    write_plugins(plugins_dir)
+    manager = PluginManager()
+    manager.index_user_plugins(str(plugins_dir))
+    manifest = build_manifest(manager, ["hello"])
+    assert manifest["plugins"][0]["path"] == str(plugins_dir / "hello.py")
+    for fname in ("manifest.json", "manifest.yaml"):
+        dump_manifest(manifest, str(tmp_path / fname))
+        assert plugin_index.load_manifest(str(tmp_path / fname)) == [manager.specs["hello"]]
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+
+import pytest
+import yaml
+
+from chestra.orchestrator import TaskOrchestrator
+from chestra.result_cache import ResultCache, task_key
+
+COUNTING_PLUGIN = '''from chestra.orchestrator import TaskPlugin
+
+
+class CountingPlugin(TaskPlugin):
+    def execute(self, env, params):
+        with open(params["log"], "a") as f:
+            f.write(params["task_name"] + "\\n")
+        return {"VALUE": str(params.get("value", "")) + env.get("start.TRUE", "")}
+'''
+
+
+def test_cache_hits_until_ttl_and_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite"), max_bytes=100)
+    a = task_key("p", "1", {"x": 1}, {"t.A": "1"})
+    assert a != task_key("p", "1", {"x": 1}, {"t.A": "2"})
+    assert a != task_key("p", "2", {"x": 1}, {"t.A": "1"})
+    assert cache.get(a) is None
+    cache.put(a, {"OUT": "x" * 30})
+    assert cache.get(a) == {"OUT": "x" * 30}
+    assert cache.get(a, ttl=-1) is None
+    cache.put("b", {"OUT": "y" * 30})
+    cache.get(a)
+    cache.put("c", {"OUT": "z" * 30})
+    # b was the least recently used entry
+    assert cache.get("b") is None
+    assert cache.get(a) is not None and cache.get("c") is not None
+    assert cache.stats()["hits"] == 4
+    assert ResultCache(cache.path).get("c") == {"OUT": "z" * 30}
+
+
+def write_counting_workflow(tmp_path, value="v", **options):
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir(exist_ok=True)
+    (plugins_dir / "counting.py").write_text(COUNTING_PLUGIN)
+    log = str(tmp_path / "runs.log")
+    tasks = [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        {"name": "a", "plugin": "counting", "inputs": ["start.TRUE"], "outputs": ["VALUE"],
+         "params": {"log": log, "value": value}},
+        {"name": "b", "plugin": "counting", "inputs": ["a.VALUE"], "outputs": ["VALUE"], "params": {"log": log}},
+        {"name": "c", "plugin": "counting", "inputs": ["a.VALUE"], "outputs": ["VALUE"], "params": {"log": log},
+         "cache": False},
+        {"name": "d", "plugin": "counting", "inputs": ["a.VALUE"], "outputs": ["MISSING"], "params": {"log": log}},
+    ]
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(yaml.safe_dump({"workflow": {"name": "Cached", **options, "tasks": tasks}}))
+    return str(plugins_dir), str(workflow)
+
+
+def run_counting(tmp_path, **kwargs):
+    plugins_dir, workflow = write_counting_workflow(tmp_path, **kwargs)
+    log = tmp_path / "runs.log"
+    log.write_text("")
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow)
+    orchestrator.run()
+    return sorted(log.read_text().split()), orchestrator
+
+
+def test_unchanged_tasks_are_not_rerun(tmp_path):
+    runs, orchestrator = run_counting(tmp_path, cache=True)
+    assert runs == ["a", "b", "c", "d"]
+    runs, orchestrator = run_counting(tmp_path, cache=True)
+    # c opted out; d never produced its declared output, so it was not cached
+    assert runs == ["c", "d"]
+    assert orchestrator.env["b.VALUE"] == "1"
+    assert orchestrator.result_cache.stats()["hits"] == 3
+    # A changed param re-runs the task, and its consumers since their input value changed
+    runs, _ = run_counting(tmp_path, cache=True, value="w")
+    assert runs == ["a", "b", "c", "d"]
+
+
+def test_cache_is_opt_in_and_honours_ttl(tmp_path):
+    runs, orchestrator = run_counting(tmp_path)
+    assert orchestrator.result_cache is None
+    run_counting(tmp_path, cache=True)
+    runs, _ = run_counting(tmp_path, cache=True, cache_ttl=-1)
+    assert runs == ["a", "b", "c", "d"]
+
+
+def test_run_closes_the_result_cache(tmp_path):
+    _, orchestrator = run_counting(tmp_path, cache=True)
+    cache = orchestrator.result_cache
+    with pytest.raises(sqlite3.ProgrammingError):
+        cache._db.execute("SELECT 1")
+    # Closing the last connection checkpointed the WAL back into the database
+    assert not os.path.exists(cache.path + "-wal")
+    assert cache.stats()["stores"] == 3
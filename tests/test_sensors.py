@@ -0,0 +1,112 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import yaml
+
+from chestra.metrics import REGISTRY
+from chestra.orchestrator import TaskOrchestrator
+from chestra.sensors import HttpPollTrigger, Reactor, TimerTrigger
+
+
+def test_timer_trigger_and_timeout():
+    reactor = Reactor()
+    started = time.perf_counter()
+    assert reactor.defer(TimerTrigger(0.05)).result(1) is True
+    assert reactor.defer(TimerTrigger(5, timeout=0.05)).result(1) is None
+    assert time.perf_counter() - started < 0.5
+
+
+def test_many_waits_share_one_thread():
+    reactor = Reactor()
+    reactor.defer(TimerTrigger(0))
+    before = threading.active_count()
+    futures = [reactor.defer(TimerTrigger(0.05 + i / 1000)) for i in range(500)]
+    assert all(f.result(2) for f in futures)
+    assert threading.active_count() == before
+
+
+class _ReadyAfter(BaseHTTPRequestHandler):
+    ready_at = 0.0
+
+    def do_GET(self):
+        self.send_response(200 if time.monotonic() >= self.ready_at else 503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_http_poll_trigger_fires_once_endpoint_is_up():
+    _ReadyAfter.ready_at = time.monotonic() + 0.2
+    server = HTTPServer(("127.0.0.1", 0), _ReadyAfter)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/health"
+        response = Reactor().defer(HttpPollTrigger(url, interval=0.05, timeout=5)).result(5)
+        assert response.status_code == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("engine", ["thread", "async"])
+def test_waiting_sensors_do_not_hold_workers(tmp_path, engine):
+    watched = tmp_path / "watched"
+    watched.mkdir()
+    tasks = [{"name": "start", "plugin": "start", "outputs": ["TRUE"]}]
+    tasks += [
+        {"name": f"watch{i}", "plugin": "changed", "inputs": ["start.TRUE"], "outputs": ["CHANGED"],
+         "params": {"file": str(watched / f"f{i}"), "timeout": 10}}
+        for i in range(10)
+    ]
+    # Touches every watched file; it can only run if the sensors left a worker free
+    command = " && ".join(f"touch {watched / f'f{i}'}" for i in range(10)) + " && echo DONE=1"
+    tasks.append({"name": "touch", "plugin": "cmd", "inputs": ["start.TRUE"], "outputs": ["DONE"],
+                  "params": {"command": command}})
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(yaml.safe_dump({"workflow": {"name": "Sensors", "workers": 2, "engine": engine,
+                                                     "tasks": tasks}}))
+    orchestrator = TaskOrchestrator(plugins_dir=str(tmp_path / "plugins"))
+    orchestrator.load_workflow(str(workflow))
+    started = time.perf_counter()
+    orchestrator.run()
+    assert time.perf_counter() - started < 5
+    assert all(orchestrator.env[f"watch{i}.CHANGED"] == "1" for i in range(10))
+
+
+DELAY_PLUGIN = '''from chestra.orchestrator import SensorPlugin
+from chestra.sensors import TimerTrigger
+
+
+class DelayPlugin(SensorPlugin):
+    def trigger(self, env, params):
+        return TimerTrigger(params["seconds"])
+
+    def on_event(self, env, params, event):
+        return {"FIRED": "1"}
+'''
+
+
+def test_sensor_tasks_are_timed_until_they_fire(tmp_path):
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir()
+    (plugins_dir / "delay.py").write_text(DELAY_PLUGIN)
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(yaml.safe_dump({"workflow": {"name": "Sensors", "tasks": [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        {"name": "wait", "plugin": "delay", "inputs": ["start.TRUE"], "outputs": ["FIRED"],
+         "params": {"seconds": 0.2}},
+    ]}}))
+    before = REGISTRY.get_sample_value("chestra_task_duration_seconds_sum", {"plugin": "delay"}) or 0
+    orchestrator = TaskOrchestrator(plugins_dir=str(plugins_dir))
+    orchestrator.load_workflow(str(workflow))
+    tracer = orchestrator.start_trace()
+    orchestrator.run()
+    assert orchestrator.env["wait.FIRED"] == "1"
+    assert orchestrator.stats.exec_max >= 0.2
+    assert REGISTRY.get_sample_value("chestra_task_duration_seconds_sum", {"plugin": "delay"}) - before >= 0.2
+    [execute] = [s for s in tracer.spans if s.task == "wait" and s.phase == "execute"]
+    assert execute.end - execute.start >= 0.2
@@ -0,0 +1,77 @@
+import pytest
+
+from chestra.plugins.cmd import CmdPlugin
+from chestra.template import Template, compile_template, render, render_value
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("echo $start.TRUE", "echo 1"),
+    ("echo ${start.TRUE}x", "echo 1x"),
+    ("echo $A $A.B", "echo a ab"),
+    ("echo $A.C", "echo a.C"),
+    ("echo ${missing:-fallback} ${A:-unused}", "echo fallback a"),
+    ("echo $HOME ${HOME} $$ $1", "echo $HOME ${HOME} $$ $1"),
+    ("echo $$A $${A}", "echo $A ${A}"),
+    ("cost: $5", "cost: $5"),
+    ("plain text", "plain text"),
+    ("echo $fetch-data.OUT ${2nd-step.OUT} $2nd-step.OUT.txt", "echo f s s.txt"),
+    ("echo $A-suffix $fetch-data.OUT-x $$fetch-data.OUT", "echo a-suffix f-x $fetch-data.OUT"),
+])
+def test_render(source, expected):
+    env = {"start.TRUE": "1", "A": "a", "A.B": "ab", "fetch-data.OUT": "f", "2nd-step.OUT": "s"}
+    assert render(source, env) == expected
+
+
+def test_render_is_independent_of_env_order():
+    assert render("$A.B", {"A": "x", "A.B": "y"}) == render("$A.B", {"A.B": "y", "A": "x"}) == "y"
+
+
+def test_template_lists_referenced_names():
+    template = Template("${x.Y} $a.b.c ${z:-0}")
+    assert template.names == {"x.Y", "a.b.c", "a.b", "a", "z"}
+    assert Template("$my-task.OUT").names == {"my-task.OUT", "my-task", "my"}
+    assert Template("no refs $$x").is_static
+
+
+def test_templates_are_compiled_once():
+    assert compile_template("echo $x") is compile_template("echo $x")
+
+
+def test_render_value_walks_nested_params():
+    env = {"auth.token": "t", "id": 7}
+    value = {"Authorization": "Bearer $auth.token", "items": [{"id": "$id"}, 3]}
+    assert render_value(value, env) == {"Authorization": "Bearer t", "items": [{"id": "7"}, 3]}
+
+
+def test_cmd_plugin_substitutes_only_referenced_variables(capsys):
+    env = {f"t{i}.X": str(i) for i in range(1000)}
+    env["echo.MSG"] = "hi"
+    assert CmdPlugin().execute(env, {"command": "echo OUT=$echo.MSG-$t10.X"}) == {"OUT": "hi-10"}
+
+
+def test_templates_are_compiled_per_task_when_the_workflow_loads(tmp_path):
+    import pickle
+
+    import yaml
+
+    from chestra import template
+    from chestra.orchestrator import TaskOrchestrator
+
+    tasks = [{"name": "start", "plugin": "start", "outputs": ["TRUE"]}]
+    tasks += [{"name": f"t{i}", "plugin": "cmd", "inputs": ["start.TRUE"], "outputs": ["OUT"],
+               "params": {"command": f"echo OUT={i}-$start.TRUE", "log_file": "plain"}} for i in range(50)]
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(yaml.safe_dump({"workflow": {"name": "Many", "tasks": tasks}}))
+    orchestrator = TaskOrchestrator(plugins_dir=str(tmp_path))
+    orchestrator.load_workflow(str(workflow), validate=False)
+    command = orchestrator.tasks[1].params["command"]
+    assert isinstance(command, Template) and command == "echo OUT=0-$start.TRUE"
+    assert type(orchestrator.tasks[1].params["log_file"]) is str
+
+    template.compile_template.cache_clear()
+    for task in orchestrator.tasks[1:]:
+        render(task.params["command"], {"start.TRUE": "1"})
+    # Rendering uses the task's own Template, not the shared cache
+    assert template.compile_template.cache_info().misses == 0
+    shipped = pickle.loads(pickle.dumps(command))
+    assert isinstance(shipped, Template) and shipped.render({"start.TRUE": "1"}) == "echo OUT=0-1"
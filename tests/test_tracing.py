@@ -0,0 +1,128 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+import yaml
+
+from chestra.orchestrator import TaskOrchestrator
+from chestra.tracing import Tracer
+
+CPU_PLUGIN = '''import os
+
+from chestra.orchestrator import TaskPlugin
+
+
+class CpuPlugin(TaskPlugin):
+    EXECUTOR = "process"
+
+    def execute(self, env, params):
+        return {"PID": str(os.getpid())}
+'''
+
+TASKS = [
+    {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+    {"name": "a", "plugin": "cmd", "inputs": ["start.TRUE"], "outputs": ["OUT"], "params": {"command": "echo OUT=abc"}},
+    {"name": "b", "plugin": "cmd", "inputs": ["start.TRUE"], "outputs": ["OUT"], "params": {"command": "echo OUT=x"}},
+    {"name": "end", "plugin": "end", "inputs": ["a.OUT", "b.OUT"]},
+]
+
+
+def write_workflow(tmp_path, tasks, **options):
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir(exist_ok=True)
+    (plugins_dir / "cpu.py").write_text(CPU_PLUGIN)
+    workflow_path = tmp_path / "workflow.yaml"
+    workflow_path.write_text(yaml.safe_dump({"workflow": {"name": "Test", **options, "tasks": tasks}}))
+    return str(plugins_dir), str(workflow_path)
+
+
+def traced_run(tmp_path, tasks, engine="thread", **options):
+    plugins_dir, workflow = write_workflow(tmp_path, tasks, **options)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir, engine=engine)
+    orchestrator.load_workflow(workflow)
+    tracer = orchestrator.start_trace()
+    orchestrator.run()
+    return orchestrator, tracer
+
+
+def phases(tracer, task):
+    return {span.phase: span for span in tracer.spans if span.task == task}
+
+
+@pytest.mark.parametrize("engine", ["thread", "async"])
+def test_every_task_records_its_phases(tmp_path, engine):
+    orchestrator, tracer = traced_run(tmp_path, TASKS, engine)
+    assert all(task.completed for task in orchestrator.tasks)
+    for task in orchestrator.tasks:
+        spans = phases(tracer, task.name)
+        assert {"queued", "execute", "merge"} <= set(spans)
+        assert spans["queued"].end <= spans["execute"].start <= spans["execute"].end <= spans["merge"].start
+        assert spans["execute"].attributes["plugin"] == task.plugin_name
+        assert spans["execute"].pid == os.getpid()
+    assert phases(tracer, "a")["execute"].attributes["output_bytes"] == 3
+    assert phases(tracer, "a")["merge"].attributes["outputs"] == 1
+
+
+def test_process_tasks_are_traced_in_the_worker(tmp_path):
+    orchestrator, tracer = traced_run(tmp_path, [
+        {"name": "start", "plugin": "start", "outputs": ["TRUE"]},
+        {"name": "a", "plugin": "cpu", "inputs": ["start.TRUE"], "outputs": ["PID"]},
+    ], process_workers=1)
+    execute = phases(tracer, "a")["execute"]
+    assert execute.pid == int(orchestrator.env["a.PID"]) != os.getpid()
+    assert phases(tracer, "a")["queued"].start <= execute.start <= execute.end
+
+
+def test_untraced_runs_record_nothing(tmp_path):
+    plugins_dir, workflow = write_workflow(tmp_path, TASKS)
+    orchestrator = TaskOrchestrator(plugins_dir=plugins_dir)
+    orchestrator.load_workflow(workflow)
+    orchestrator.run()
+    assert not orchestrator.tracer.enabled
+    assert not any(task.tracer.enabled for task in orchestrator.tasks)
+
+
+def test_chrome_trace_events(tmp_path):
+    _, tracer = traced_run(tmp_path, TASKS)
+    events = tracer.chrome_trace()["traceEvents"]
+    complete = [e for e in events if e["ph"] == "X"]
+    assert {e["name"] for e in complete} >= {"execute a", "merge a", "execute end"}
+    assert all(e["dur"] >= 0 and e["args"]["task"] for e in complete)
+    begins = {e["id"] for e in events if e["ph"] == "b"}
+    assert begins and begins == {e["id"] for e in events if e["ph"] == "e"}
+    assert any(e["ph"] == "M" and e["pid"] == os.getpid() for e in events)
+
+
+def test_otlp_trace_nests_phases_under_a_span_per_task(tmp_path):
+    _, tracer = traced_run(tmp_path, TASKS)
+    path = tmp_path / "trace.json"
+    tracer.dump(str(path), "otlp")
+    spans = json.loads(path.read_text())["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    roots = {s["spanId"]: s for s in spans if "parentSpanId" not in s}
+    assert sorted(s["name"] for s in roots.values()) == ["a", "b", "end", "start"]
+    for span in spans:
+        assert span["traceId"] == tracer.trace_id
+        if "parentSpanId" in span:
+            root = roots[span["parentSpanId"]]
+            assert int(root["startTimeUnixNano"]) <= int(span["startTimeUnixNano"])
+            assert int(span["endTimeUnixNano"]) <= int(root["endTimeUnixNano"])
+
+
+def test_unknown_trace_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="trace format"):
+        Tracer().dump(str(tmp_path / "trace.json"), "jaeger")
+
+
+def test_cli_writes_trace(tmp_path):
+    plugins_dir, workflow = write_workflow(tmp_path, TASKS)
+    trace = tmp_path / "trace.json"
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    subprocess.run(
+        [sys.executable, "-m", "chestra", "run", "workflow.yaml", "--workflows", str(tmp_path),
+         "--plugins", plugins_dir, "--trace", str(trace)],
+        check=True, capture_output=True, cwd=str(tmp_path), env={**os.environ, "PYTHONPATH": src},
+    )
+    names = {e["name"] for e in json.loads(trace.read_text())["traceEvents"]}
+    assert "execute end" in names
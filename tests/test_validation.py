@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from chestra.orchestrator import Task, TaskOrchestrator, WorkflowValidationError
+from chestra.validation import validate_workflow
+
+
+def build(task_defs):
+    orchestrator = TaskOrchestrator()
+    orchestrator.tasks = [Task(d["name"], "start", d.get("inputs", []), d.get("outputs", []), {}) for d in task_defs]
+    orchestrator._index_dependencies()
+    return orchestrator
+
+
+def problems_for(task_defs):
+    orchestrator = build(task_defs)
+    with pytest.raises(WorkflowValidationError) as excinfo:
+        validate_workflow(orchestrator.tasks, orchestrator.consumers)
+    return excinfo.value.problems
+
+
+def test_valid_workflow_passes():
+    orchestrator = build([
+        {"name": "start", "outputs": ["TRUE"]},
+        {"name": "free_space", "inputs": ["start.TRUE"], "outputs": ["FREE_SPACE"]},
+        {"name": "end", "inputs": ["free_space.FREE_SPACE", "start.TRUE"]},
+    ])
+    validate_workflow(orchestrator.tasks, orchestrator.consumers)
+
+
+def test_unproduced_input_is_reported_with_suggestion():
+    problems = problems_for([
+        {"name": "start", "outputs": ["TRUE"]},
+        {"name": "free_space", "inputs": ["start.TRUE"], "outputs": ["FREE_SPACE"]},
+        {"name": "echo", "inputs": ["free_space.FREESPACE"]},
+    ])
+    assert problems == [
+        "Task 'echo' input 'free_space.FREESPACE' is not produced by any task "
+        "(did you mean 'free_space.FREE_SPACE'?)"
+    ]
+
+
+def test_cycle_and_unreachable_tasks_are_reported():
+    problems = problems_for([
+        {"name": "start", "outputs": ["TRUE"]},
+        {"name": "a", "inputs": ["start.TRUE", "b.X"], "outputs": ["X"]},
+        {"name": "b", "inputs": ["a.X"], "outputs": ["X"]},
+        {"name": "downstream", "inputs": ["b.X"], "outputs": ["X"]},
+    ])
+    assert problems == ["Dependency cycle: a -> b -> a", "Tasks that can never become eligible: ['downstream']"]
+
+
+def test_inputs_already_in_env_are_available():
+    orchestrator = build([{"name": "task", "inputs": ["AUTH_TOKEN"]}])
+    validate_workflow(orchestrator.tasks, orchestrator.consumers, available={"AUTH_TOKEN"})
+    with pytest.raises(WorkflowValidationError, match="namespaced"):
+        validate_workflow(orchestrator.tasks, orchestrator.consumers)
+
+
+def test_load_workflow_rejects_invalid_graph(tmp_path):
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(
+        'workflow:\n  tasks:\n'
+        '    - {name: start, plugin: start, outputs: ["TRUE"]}\n'
+        '    - {name: end, plugin: end, inputs: ["start.FALSE"]}\n'
+    )
+    with pytest.raises(WorkflowValidationError):
+        TaskOrchestrator(plugins_dir=str(tmp_path)).load_workflow(str(workflow))
+
+
+@pytest.mark.parametrize("text, message", [
+    ('workflow:\n  tasks:\n    - {name: start, plugin: start}\n    - {name: start, plugin: end}\n',
+     "Duplicate task name: start"),
+    ('workflow:\n  tasks:\n    - {name: start, plugin: start\n', "while parsing a flow mapping"),
+])
+def test_cli_validate_reports_broken_workflows_on_one_line(tmp_path, capsys, text, message):
+    from chestra.cli import validate_workflow as validate_file
+
+    workflow = tmp_path / "workflow.yaml"
+    workflow.write_text(text)
+    assert validate_file(str(workflow), str(tmp_path)) is False
+    err = capsys.readouterr().err
+    assert err.startswith("❌ Invalid workflow: ") and message in err
+    assert err.count("\n") == 1
+
+
+def test_validation_is_linear_on_large_graphs():
+    task_defs = [{"name": "t0", "outputs": ["X"]}]
+    task_defs += [{"name": f"t{i}", "inputs": [f"t{i - 1}.X", "t0.X"], "outputs": ["X"]} for i in range(1, 20000)]
+    orchestrator = build(task_defs)
+    started = time.perf_counter()
+    validate_workflow(orchestrator.tasks, orchestrator.consumers)
+    assert time.perf_counter() - started < 1.0
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from chestra.plugins.changed import ChangedPlugin
+from chestra.watch import FileWatcher
+
+
+def touch_later(path, delay=0.05, data="x"):
+    def write():
+        time.sleep(delay)
+        path.write_text(data)
+    thread = threading.Thread(target=write)
+    thread.start()
+    return thread
+
+
+@pytest.fixture(params=[True, False], ids=["inotify", "poll"])
+def watcher(request):
+    return FileWatcher(use_inotify=request.param)
+
+
+def test_file_creation_and_change_wake_the_waiter(tmp_path, watcher):
+    target = tmp_path / "semaphore.txt"
+    touch_later(target)
+    assert watcher.wait_for_change(str(target), timeout=2) == str(target)
+    touch_later(target, data="changed")
+    assert watcher.wait_for_change(str(target), timeout=2) == str(target)
+
+
+def test_unrelated_files_and_timeouts(tmp_path, watcher):
+    touch_later(tmp_path / "other.txt").join()
+    started = time.perf_counter()
+    assert watcher.wait_for_change(str(tmp_path / "semaphore.txt"), timeout=0.3) is None
+    assert time.perf_counter() - started >= 0.3
+
+
+def test_glob_and_directory_watches(tmp_path, watcher):
+    touch_later(tmp_path / "b.csv")
+    assert watcher.wait_for_change(str(tmp_path / "*.csv"), timeout=2) == str(tmp_path / "b.csv")
+    touch_later(tmp_path / "c.txt")
+    assert watcher.wait_for_change(str(tmp_path), timeout=2) == str(tmp_path / "c.txt")
+
+
+def test_missing_directory_is_watched_until_it_appears(tmp_path, watcher):
+    target = tmp_path / "later" / "file.txt"
+
+    def create():
+        time.sleep(0.05)
+        target.parent.mkdir()
+        target.write_text("x")
+    threading.Thread(target=create).start()
+    assert watcher.wait_for_change(str(target), timeout=2) == str(target)
+
+
+def test_one_thread_serves_many_watches(tmp_path):
+    watcher = FileWatcher()
+    watches = [watcher.watch(str(tmp_path / f"f{i}.txt")) for i in range(200)]
+    before = threading.active_count()
+    for i in range(0, 200, 2):
+        (tmp_path / f"f{i}.txt").write_text("x")
+    assert all(w.wait(2) for w in watches[::2])
+    assert not any(w.changed for w in watches[1::2])
+    assert threading.active_count() == before
+    for w in watches:
+        w.cancel()
+
+
+def test_changed_plugin_reports_file(tmp_path):
+    target = tmp_path / "semaphore.txt"
+    touch_later(target, delay=0.1)
+    started = time.perf_counter()
+    result = ChangedPlugin().execute({}, {"file": str(target), "timeout": 5})
+    assert result == {"CHANGED": "1", "CHANGED_FILE": str(target)}
+    assert time.perf_counter() - started < 0.5
+
+
+def test_wildcards_only_in_file_name(tmp_path):
+    with pytest.raises(ValueError):
+        FileWatcher(use_inotify=False).watch(str(tmp_path / "*" / "x.txt"))